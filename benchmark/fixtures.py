@@ -0,0 +1,350 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import json
+import random
+import shutil
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Origins written into recorded bodies; the replay server rewrites them to its own address
+POKEAPI_ORIGIN = "https://pokeapi.co"
+
+# The BigQuery table whose GCS export the LandNerds fixtures stand in for
+LANDNERDS_TABLE = "landnerds.1_data_lake.all_prop_point_of_interest"
+
+
+def _write_json(path: str, body) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(body, f)
+
+
+def _pokemon_detail(rng: random.Random, i: int) -> dict:
+    """
+    A synthetic /pokemon/{id}/ page with the same shape and roughly the same size as the real one.
+    """
+
+    def ref(kind: str, n: int) -> dict:
+        return {"name": f"{kind}-{n}", "url": f"{POKEAPI_ORIGIN}/api/v2/{kind}/{n}/"}
+
+    return {
+        "id": i,
+        "order": i,
+        "name": f"pokemon-{i}",
+        "height": rng.randint(1, 200),
+        "weight": rng.randint(1, 10000),
+        "base_experience": rng.choice([rng.randint(30, 400), None]),
+        "is_default": True,
+        "species": ref("pokemon-species", i),
+        "stats": [
+            {
+                "base_stat": rng.randint(5, 255),
+                "effort": rng.randint(0, 3),
+                "stat": ref("stat", s),
+            }
+            for s in range(1, 7)
+        ],
+        "types": [
+            {"slot": slot, "type": ref("type", rng.randint(1, 18))}
+            for slot in range(1, rng.randint(2, 3))
+        ],
+        "moves": [
+            {
+                "move": ref("move", rng.randint(1, 900)),
+                "version_group_details": [
+                    {
+                        "level_learned_at": rng.randint(0, 100),
+                        "move_learn_method": ref(
+                            "move-learn-method", rng.randint(1, 4)
+                        ),
+                        "version_group": ref("version-group", g),
+                    }
+                    for g in range(1, rng.randint(2, 6))
+                ],
+            }
+            for _ in range(rng.randint(10, 100))
+        ],
+        "abilities": [
+            {
+                "ability": ref("ability", rng.randint(1, 300)),
+                "is_hidden": slot == 3,
+                "slot": slot,
+            }
+            for slot in range(1, rng.randint(2, 4))
+        ],
+        "location_area_encounters": f"{POKEAPI_ORIGIN}/api/v2/pokemon/{i}/encounters",
+        "sprites": {
+            "front_default": f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/{i}.png",
+            "back_default": f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/back/{i}.png",
+            "other": {
+                "dream_world": {
+                    "front_default": f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/dream-world/{i}.svg"
+                },
+                "official-artwork": {
+                    "front_default": f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/official-artwork/{i}.png"
+                },
+            },
+        },
+        "cries": {
+            "latest": f"https://raw.githubusercontent.com/PokeAPI/cries/main/cries/pokemon/latest/{i}.ogg",
+            "legacy": None,
+        },
+        "forms": [ref("pokemon-form", i)],
+        "game_indices": [
+            {"game_index": i, "version": ref("version", v)}
+            for v in range(1, rng.randint(2, 20))
+        ],
+    }
+
+
+def _card(rng: random.Random, i: int) -> dict:
+    """
+    A synthetic cardinfo.php card. Monsters have atk/def/level, spells and traps do not, and only
+    some cards have an archetype, as in the real dump.
+    """
+    card_type = rng.choice(
+        ["Effect Monster", "Normal Monster", "Spell Card", "Trap Card"]
+    )
+    card = {
+        "id": 10000000 + i,
+        "name": f"Card {i}",
+        "type": card_type,
+        "frameType": card_type.split()[0].lower(),
+        "desc": " ".join(
+            rng.choice(["draw", "destroy", "summon", "target", "card"])
+            for _ in range(40)
+        ),
+        "race": rng.choice(
+            ["Dragon", "Spellcaster", "Warrior", "Normal", "Continuous"]
+        ),
+        "ygoprodeck_url": f"https://ygoprodeck.com/card/card-{i}",
+        "card_sets": [
+            {
+                "set_name": f"Set {rng.randint(1, 500)}",
+                "set_code": f"SET-EN{rng.randint(1, 999):03d}",
+                "set_rarity": rng.choice(["Common", "Rare", "Super Rare"]),
+                "set_price": f"{rng.uniform(0, 50):.2f}",
+            }
+            for _ in range(rng.randint(0, 4))
+        ],
+        "card_images": [
+            {
+                "id": 10000000 + i,
+                "image_url": f"https://images.ygoprodeck.com/images/cards/{10000000 + i}.jpg",
+                "image_url_small": f"https://images.ygoprodeck.com/images/cards_small/{10000000 + i}.jpg",
+                "image_url_cropped": f"https://images.ygoprodeck.com/images/cards_cropped/{10000000 + i}.jpg",
+            }
+        ],
+        "card_prices": [
+            {
+                store: f"{rng.uniform(0, 100):.2f}"
+                for store in [
+                    "cardmarket_price",
+                    "tcgplayer_price",
+                    "ebay_price",
+                    "amazon_price",
+                ]
+            }
+        ],
+    }
+    if card_type.endswith("Monster"):
+        card.update(
+            atk=rng.randint(0, 5000), level=rng.randint(1, 12), attribute="LIGHT"
+        )
+        card["def"] = rng.randint(0, 5000)
+    if rng.random() < 0.6:
+        card["archetype"] = f"Archetype {rng.randint(1, 300)}"
+    return card
+
+
+def _post(rng: random.Random, subreddit: str, i: int) -> dict:
+    post_id = f"{subreddit.lower()}_{i:06d}"
+    return {
+        "id": post_id,
+        "name": f"t3_{post_id}",
+        "title": f"Post {i} in r/{subreddit}",
+        "score": rng.randint(0, 50000),
+        "author": f"user{rng.randint(1, 100000)}",
+        "created_utc": 1700000000.0 + rng.randint(0, 10**7),
+        "url": f"https://www.reddit.com/r/{subreddit}/comments/{post_id}/",
+        "num_comments": rng.randint(0, 5000),
+        "subreddit": subreddit,
+        "selftext": "",
+        "permalink": f"/r/{subreddit}/comments/{post_id}/",
+    }
+
+
+def generate_landnerds_fixtures(
+    fixtures_dir: str = FIXTURES_DIR,
+    rows: int = 200_000,
+    shards: int = 8,
+    seed: int = 0,
+) -> None:
+    """
+    Write parquet shards named like a BigQuery export of LANDNERDS_TABLE
+    (`<table>-000000000000.parquet`, ...), for the LandNerds scenario to stream from disk.
+
+    Args:
+        fixtures_dir (str): Directory holding the fixtures; shards go to its landnerds folder.
+        rows (int): Total number of points of interest.
+        shards (int): Number of parquet files.
+        seed (int): Random seed.
+    """
+    rng = random.Random(seed)
+    table_id = LANDNERDS_TABLE.rsplit(".", 1)[-1]
+    directory = os.path.join(fixtures_dir, "landnerds")
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    categories = ["school", "station", "park", "supermarket", "gp_surgery", "pub"]
+    per_shard = -(-rows // shards)
+    for shard in range(shards):
+        ids = range(shard * per_shard, min(rows, (shard + 1) * per_shard))
+        table = pa.table(
+            {
+                "poi_id": pa.array(ids, pa.int64()),
+                "name": [f"Point {i}" for i in ids],
+                "category": [rng.choice(categories) for _ in ids],
+                "latitude": [rng.uniform(49.9, 58.7) for _ in ids],
+                "longitude": [rng.uniform(-8.2, 1.8) for _ in ids],
+                "postcode": [
+                    f"AB{rng.randint(1, 99)} {rng.randint(1, 9)}CD" for _ in ids
+                ],
+                "updated_at": pa.array(
+                    [1700000000 + rng.randint(0, 10**7) for _ in ids],
+                    pa.timestamp("s"),
+                ),
+            }
+        )
+        pq.write_table(
+            table, os.path.join(directory, f"{table_id}-{shard:012d}.parquet")
+        )
+
+
+def generate_fixtures(
+    fixtures_dir: str = FIXTURES_DIR,
+    pokemon: int = 1000,
+    cards: int = 5000,
+    subreddits: int = 5,
+    posts: int = 200,
+    landnerds_rows: int = 200_000,
+    seed: int = 0,
+) -> None:
+    """
+    Write deterministic synthetic fixtures shaped like the real API responses, and the
+    LandNerds export shards (generate_landnerds_fixtures).
+
+    Args:
+        fixtures_dir (str): Directory to write to. Existing fixtures are replaced.
+        pokemon (int): Number of Pokémon in the listing, each with a detail page.
+        cards (int): Number of cards in cardinfo.php.
+        subreddits (int): Number of popular subreddits.
+        posts (int): Number of hot posts per subreddit.
+        landnerds_rows (int): Number of rows in the LandNerds export shards.
+        seed (int): Random seed, so every run benchmarks the same payloads.
+    """
+    rng = random.Random(seed)
+    shutil.rmtree(fixtures_dir, ignore_errors=True)
+
+    _write_json(
+        os.path.join(fixtures_dir, "pokemon", "listing.json"),
+        {
+            "count": pokemon,
+            "results": [
+                {"name": f"pokemon-{i}", "url": f"{POKEAPI_ORIGIN}/api/v2/pokemon/{i}/"}
+                for i in range(1, pokemon + 1)
+            ],
+        },
+    )
+    for i in range(1, pokemon + 1):
+        _write_json(
+            os.path.join(fixtures_dir, "pokemon", f"{i}.json"), _pokemon_detail(rng, i)
+        )
+
+    _write_json(
+        os.path.join(fixtures_dir, "yugioh", "cardinfo.json"),
+        {"data": [_card(rng, i) for i in range(cards)]},
+    )
+
+    names = [f"Subreddit{n}" for n in range(subreddits)]
+    _write_json(
+        os.path.join(fixtures_dir, "reddit", "popular.json"),
+        [{"display_name": name, "name": f"t5_{n:05d}"} for n, name in enumerate(names)],
+    )
+    for name in names:
+        _write_json(
+            os.path.join(fixtures_dir, "reddit", f"{name}.json"),
+            [_post(rng, name, i) for i in range(posts)],
+        )
+    generate_landnerds_fixtures(fixtures_dir, rows=landnerds_rows, seed=seed)
+    print(f"wrote synthetic fixtures to {fixtures_dir}")
+
+
+def record_fixtures(fixtures_dir: str = FIXTURES_DIR, pokemon: int = 200) -> None:
+    """
+    Replace the Pokémon and Yu-Gi-Oh fixtures with live responses from pokeapi.co and
+    ygoprodeck. Reddit fixtures stay synthetic, as recording them needs OAuth credentials.
+
+    Args:
+        fixtures_dir (str): Directory holding the fixtures.
+        pokemon (int): Number of Pokémon to record (listing and detail pages).
+    """
+    session = requests.Session()
+    listing = session.get(
+        f"{POKEAPI_ORIGIN}/api/v2/pokemon?limit={pokemon}&offset=0", timeout=30
+    )
+    listing.raise_for_status()
+    listing = listing.json()
+    shutil.rmtree(os.path.join(fixtures_dir, "pokemon"), ignore_errors=True)
+    _write_json(os.path.join(fixtures_dir, "pokemon", "listing.json"), listing)
+    for entry in listing["results"]:
+        detail = session.get(entry["url"], timeout=30)
+        detail.raise_for_status()
+        pokemon_id = entry["url"].rstrip("/").rsplit("/", 1)[-1]
+        _write_json(
+            os.path.join(fixtures_dir, "pokemon", f"{pokemon_id}.json"), detail.json()
+        )
+
+    cardinfo = session.get("https://db.ygoprodeck.com/api/v7/cardinfo.php", timeout=120)
+    cardinfo.raise_for_status()
+    os.makedirs(os.path.join(fixtures_dir, "yugioh"), exist_ok=True)
+    with open(os.path.join(fixtures_dir, "yugioh", "cardinfo.json"), "wb") as f:
+        f.write(cardinfo.content)
+    print(
+        f"recorded {len(listing['results'])} pokémon and cardinfo.php to {fixtures_dir}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Create fixtures for the ingest benchmarks"
+    )
+    parser.add_argument("mode", choices=["generate", "record"])
+    parser.add_argument("--dir", default=FIXTURES_DIR)
+    parser.add_argument("--pokemon", type=int, default=1000)
+    parser.add_argument("--cards", type=int, default=5000)
+    parser.add_argument("--subreddits", type=int, default=5)
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--landnerds-rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    if args.mode == "generate":
+        generate_fixtures(
+            args.dir,
+            pokemon=args.pokemon,
+            cards=args.cards,
+            subreddits=args.subreddits,
+            posts=args.posts,
+            landnerds_rows=args.landnerds_rows,
+        )
+    else:
+        if not os.path.isdir(args.dir):
+            generate_fixtures(args.dir, subreddits=args.subreddits, posts=args.posts)
+        record_fixtures(args.dir, pokemon=args.pokemon)
@@ -0,0 +1,229 @@
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from benchmark.fixtures import FIXTURES_DIR, POKEAPI_ORIGIN
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "ReplayServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, body) -> None:
+        self._send(200, json.dumps(body).encode(), {"Content-Type": "application/json"})
+
+    def _inject(self) -> bool:
+        """
+        Apply the configured latency, and answer with an error instead for a share of requests.
+        """
+        self.server.sleep()
+        if self.server.should_fail():
+            self._send(self.server.error_status, headers={"Retry-After": "0"})
+            return True
+        return False
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self._inject():
+            return
+        if urlparse(self.path).path == "/api/v1/access_token":
+            self._send_json(
+                {
+                    "access_token": "replay",
+                    "token_type": "bearer",
+                    "expires_in": 86400,
+                    "scope": "*",
+                }
+            )
+        else:
+            self._send(404)
+
+    def do_GET(self):
+        if self._inject():
+            return
+        url = urlparse(self.path)
+        path = url.path.rstrip("/")
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = path.split("/")
+
+        if path == "/api/v2/pokemon":
+            self._pokemon_listing(query)
+        elif path.startswith("/api/v2/pokemon/"):
+            self._file(os.path.join("pokemon", f"{parts[-1]}.json"))
+        elif path == "/api/v7/cardinfo.php":
+            self._file(os.path.join("yugioh", "cardinfo.json"))
+        elif path == "/subreddits/popular":
+            self._reddit_listing(
+                "t5", self.server.fixture("reddit", "popular.json"), query
+            )
+        elif len(parts) == 4 and parts[1] == "r" and parts[3] == "hot":
+            self._reddit_listing(
+                "t3", self.server.fixture("reddit", f"{parts[2]}.json"), query
+            )
+        else:
+            self._send(404)
+
+    def _file(self, relative_path: str) -> None:
+        body = self.server.raw(relative_path)
+        if body is None:
+            self._send(404)
+        else:
+            self._send(200, body, {"Content-Type": "application/json"})
+
+    def _pokemon_listing(self, query: dict) -> None:
+        listing = self.server.fixture("pokemon", "listing.json")
+        offset = int(query.get("offset", 0))
+        limit = int(query.get("limit", 20))
+        results = listing["results"][offset : offset + limit]
+        self._send_json(
+            {
+                "count": listing["count"],
+                "next": None,
+                "previous": None,
+                "results": [
+                    {**entry, "url": self.server.rewrite(entry["url"])}
+                    for entry in results
+                ],
+            }
+        )
+
+    def _reddit_listing(self, kind: str, items: Optional[list], query: dict) -> None:
+        """
+        Serve a Reddit Listing page, paginated with `limit` and `after` like the real API.
+        """
+        if items is None:
+            self._send(404)
+            return
+        start = 0
+        if query.get("after"):
+            names = [item["name"] for item in items]
+            start = (
+                names.index(query["after"]) + 1
+                if query["after"] in names
+                else len(items)
+            )
+        page = items[start : start + min(int(query.get("limit", 25)), 100)]
+        after = page[-1]["name"] if page and start + len(page) < len(items) else None
+        self._send_json(
+            {
+                "kind": "Listing",
+                "data": {
+                    "after": after,
+                    "before": None,
+                    "dist": len(page),
+                    "children": [{"kind": kind, "data": item} for item in page],
+                },
+            }
+        )
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    Local stand-in for pokeapi.co, db.ygoprodeck.com and the Reddit OAuth API that replays
+    fixtures from disk, with configurable latency and error injection.
+
+    Args:
+        fixtures_dir (str): Directory written by benchmark/fixtures.py.
+        latency_ms (float): Delay added to every response.
+        jitter_ms (float): Random extra delay, uniform between 0 and this.
+        error_rate (float): Share of requests answered with `error_status` instead.
+        error_status (int): Status code of the injected errors, e.g. 503 or 429.
+        port (int): Port to listen on, 0 for any free port.
+        seed (int): Random seed for the jitter and the injected errors.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        fixtures_dir: str = FIXTURES_DIR,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        port: int = 0,
+        seed: int = 0,
+    ):
+        super().__init__(("127.0.0.1", port), _ReplayHandler)
+        self.fixtures_dir = fixtures_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.injected_errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._raw_cache: dict[str, Optional[bytes]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def sleep(self) -> None:
+        with self._lock:
+            delay = self.latency_ms + self._rng.uniform(0, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.injected_errors += 1
+                return True
+        return False
+
+    def rewrite(self, url: str) -> str:
+        return url.replace(POKEAPI_ORIGIN, self.url)
+
+    def raw(self, relative_path: str) -> Optional[bytes]:
+        """
+        Fixture body with the recorded PokeAPI origin pointed at this server, cached in memory.
+        """
+        with self._lock:
+            if relative_path in self._raw_cache:
+                return self._raw_cache[relative_path]
+        try:
+            with open(os.path.join(self.fixtures_dir, relative_path), "rb") as f:
+                body = f.read().replace(POKEAPI_ORIGIN.encode(), self.url.encode())
+        except FileNotFoundError:
+            body = None
+        with self._lock:
+            self._raw_cache[relative_path] = body
+        return body
+
+    def fixture(self, *relative_path: str):
+        body = self.raw(os.path.join(*relative_path))
+        return None if body is None else json.loads(body)
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,248 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import json
+import multiprocessing
+import resource
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+import requests
+from benchmark.fixtures import (
+    FIXTURES_DIR,
+    LANDNERDS_TABLE,
+    generate_fixtures,
+    generate_landnerds_fixtures,
+)
+from benchmark.replay_server import ReplayServer
+
+
+class LatencyRecorder:
+    """
+    Records the duration of every request sent through requests in this process, i.e. the time
+    until the response headers arrive, including any retries made by the transport adapter.
+    """
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self._lock = threading.Lock()
+
+    def install(self) -> None:
+        send = requests.Session.send
+        recorder = self
+
+        def timed_send(session, request, **kwargs):
+            start = time.perf_counter()
+            try:
+                return send(session, request, **kwargs)
+            finally:
+                with recorder._lock:
+                    recorder.latencies.append(time.perf_counter() - start)
+
+        requests.Session.send = timed_send
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        values = sorted(self.latencies)
+        return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def _pokemon(args: dict) -> tuple[int, Callable[[], None]]:
+    from ingest import pokemon_api_pipeline
+
+    df = pokemon_api_pipeline.pokemon_details_df(max_workers=args["workers"])
+    return df.height, lambda: pokemon_api_pipeline.df_to_file_system(df)
+
+
+def _yugioh(args: dict) -> tuple[int, Callable[[], None]]:
+    from ingest import yugioh_api_pipeline
+
+    df = yugioh_api_pipeline.fetch_all_cards()
+    return df.height, lambda: yugioh_api_pipeline.df_to_file_system(df)
+
+
+def _reddit(args: dict) -> tuple[int, Callable[[], None]]:
+    from ingest import reddit_api_pipeline
+
+    df = reddit_api_pipeline.top_subreddits_posts(
+        top_n=args["top_n"], post_limit=args["post_limit"], max_workers=args["workers"]
+    )
+    return df.height, lambda: reddit_api_pipeline.df_to_file_system(df)
+
+
+def _landnerds(args: dict) -> tuple[int, Callable[[], None]]:
+    import fsspec
+    from ingest import landnerds_custom_pipeline
+
+    # the export shards are read from local disk, as the BigQuery export needs GCP
+    batches = list(
+        landnerds_custom_pipeline.gcs_shard_batches(
+            LANDNERDS_TABLE,
+            os.path.join(args["fixtures"], "landnerds"),
+            max_workers=args["workers"],
+            filesystem=fsspec.filesystem("file"),
+        )
+    )
+    records = sum(batch.num_rows for batch in batches)
+    return records, lambda: landnerds_custom_pipeline.df_to_file_system(
+        LANDNERDS_TABLE, batches
+    )
+
+
+SCENARIOS = {
+    "pokemon": _pokemon,
+    "yugioh": _yugioh,
+    "reddit": _reddit,
+    "landnerds": _landnerds,
+}
+
+
+def run_scenario(name: str, args: dict) -> dict:
+    """
+    Run one scenario in the current (fresh) process: fetch through the ingest functions, then
+    load the result with the pipeline's df_to_file_system.
+
+    Returns:
+        dict: records, fetch/load seconds, records/sec, request count, p50/p99 request latency
+        and the peak RSS of the process.
+    """
+    recorder = LatencyRecorder()
+    recorder.install()
+
+    start = time.perf_counter()
+    records, load = SCENARIOS[name](args)
+    fetched = time.perf_counter()
+    load()
+    loaded = time.perf_counter()
+
+    p50, p99 = recorder.percentile(50), recorder.percentile(99)
+    return {
+        "scenario": name,
+        "records": records,
+        "fetch_seconds": fetched - start,
+        "load_seconds": loaded - fetched,
+        "records_per_second": records / (loaded - start),
+        "requests": len(recorder.latencies),
+        "p50_ms": None if p50 is None else p50 * 1000,
+        "p99_ms": None if p99 is None else p99 * 1000,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def benchmark_env(server: ReplayServer, work_dir: str) -> dict:
+    """
+    Environment that points every ingest at the replay server and keeps the HTTP cache, the dlt
+    working directories and the loaded files inside `work_dir`.
+    """
+    return {
+        "POKEAPI_BASE_URL": f"{server.url}/api/v2/",
+        "YGOPRODECK_BASE_URL": f"{server.url}/api/v7/",
+        "REDDIT_OAUTH_URL": server.url,
+        "REDDIT_URL": server.url,
+        "REDDIT_CLIENT_ID": "replay",
+        "REDDIT_SECRET": "replay",
+        "praw_check_for_updates": "False",
+        "HTTP_CACHE_DIR": os.path.join(work_dir, "http_cache"),
+        "DLT_DATA_DIR": os.path.join(work_dir, "dlt"),
+        "INGEST_CHECKPOINT_DIR": os.path.join(work_dir, "checkpoints"),
+        "DESTINATION__FILESYSTEM__BUCKET_URL": f"file://{os.path.join(work_dir, 'lake')}",
+        "DATA_LAKE_URL": f"{os.path.join(work_dir, 'lake')}/",
+        "RUNTIME__DLTHUB_TELEMETRY": "false",
+    }
+
+
+def _format(value: Optional[float], spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def print_results(results: list[dict], server: ReplayServer) -> None:
+    print(
+        f"\n{'scenario':<10}{'records':>9}{'fetch s':>9}{'load s':>8}{'records/s':>11}"
+        f"{'requests':>10}{'p50 ms':>9}{'p99 ms':>9}{'peak RSS MB':>13}"
+    )
+    for r in results:
+        if "error" in r:
+            print(f"{r['scenario']:<10} failed: {r['error']}")
+            continue
+        print(
+            f"{r['scenario']:<10}{r['records']:>9,}{r['fetch_seconds']:>9.2f}"
+            f"{r['load_seconds']:>8.2f}{r['records_per_second']:>11,.0f}{r['requests']:>10,}"
+            f"{_format(r['p50_ms'], '.1f'):>9}{_format(r['p99_ms'], '.1f'):>9}"
+            f"{r['peak_rss_mb']:>13.0f}"
+        )
+    print(
+        f"replay server: {server.latency_ms:g}ms latency (+{server.jitter_ms:g}ms jitter), "
+        f"{server.injected_errors} injected {server.error_status} errors"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the ingests offline against a local replay server"
+    )
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--workers", type=int, default=10)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--post-limit", type=int, default=200)
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.fixtures):
+        generate_fixtures(args.fixtures)
+    elif not os.path.isdir(os.path.join(args.fixtures, "landnerds")):
+        generate_landnerds_fixtures(args.fixtures)
+
+    scenario_args = {
+        "workers": args.workers,
+        "top_n": args.top_n,
+        "post_limit": args.post_limit,
+        "fixtures": args.fixtures,
+    }
+    results = []
+    with ReplayServer(
+        args.fixtures,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    ) as server, tempfile.TemporaryDirectory() as work_dir:
+        os.environ.update(benchmark_env(server, work_dir))
+        for name in args.scenarios:
+            # a fresh process per scenario gives each its own peak RSS and a cold HTTP cache
+            os.environ["HTTP_CACHE_DIR"] = os.path.join(work_dir, "http_cache", name)
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                try:
+                    results.append(
+                        executor.submit(run_scenario, name, scenario_args).result()
+                    )
+                except Exception as e:
+                    results.append(
+                        {"scenario": name, "error": f"{type(e).__name__}: {e}"}
+                    )
+        print_results(results, server)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,250 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+TRANSFORM_DIR = os.path.join(os.path.dirname(__file__), "..", "transform")
+
+# model_defaults start in transform/config.yaml, the first day landed
+START = date(2025, 5, 25)
+
+
+def _write(lake_dir: str, folder: str, day: date, table: pa.Table) -> None:
+    """
+    Write `table` where the filesystem destination would land it for `day`.
+    """
+    path = os.path.join(lake_dir, folder, f"load_date={day.isoformat()}")
+    os.makedirs(path, exist_ok=True)
+    load_id = f"{time.mktime(day.timetuple()):.0f}.000001"
+    pq.write_table(
+        table, os.path.join(path, f"{load_id}.bench.parquet"), compression="zstd"
+    )
+
+
+def _strings(prefix: str, ids: np.ndarray) -> pa.Array:
+    return pa.array([f"{prefix}{i}" for i in ids.tolist()], pa.large_string())
+
+
+def _landed(columns: dict, strings: list[str], fetched: str = None) -> pa.Table:
+    """
+    A landed table: `columns`, the other string columns the models read (`strings`) filled with
+    placeholder text and, for fetched tables, the date_fetched timestamp.
+    """
+    rows = len(next(iter(columns.values())))
+    columns.update(
+        {name: pa.array([name] * rows, pa.large_string()) for name in strings}
+    )
+    if fetched is not None:
+        columns["date_fetched"] = pa.array([fetched] * rows, pa.string())
+    return pa.table(columns)
+
+
+def land_day(
+    lake_dir: str,
+    day: date,
+    cards: int,
+    pokemon: int,
+    posts: int,
+    rng: np.random.Generator,
+) -> int:
+    """
+    Land one day of synthetic data shaped like the ingests' output: the full card dump, the
+    Pokémon details and stats refreshed that day (all of them on the first day, 1/30 after) and
+    a page of hot posts that half repeats the previous day's.
+
+    Returns:
+        int: Number of rows landed.
+    """
+    fetched = f"{day.isoformat()} 08:00:00"
+    card_ids = np.arange(cards)
+    nested = {
+        "card_sets": {
+            "set_name": "Set",
+            "set_code": "S",
+            "set_rarity": "Common",
+            "set_price": "1",
+        },
+        "card_images": {
+            "id": 0,
+            "image_url": "u",
+            "image_url_small": "u",
+            "image_url_cropped": "u",
+        },
+        "card_prices": {
+            "cardmarket_price": "1",
+            "tcgplayer_price": "1",
+            "ebay_price": "1",
+            "amazon_price": "1",
+        },
+    }
+    _write(
+        lake_dir,
+        "yugioh_api/yugioh_cards",
+        day,
+        _landed(
+            {
+                "id": card_ids,
+                "name": _strings("card-", card_ids),
+                "type": pa.array(rng.choice(["Effect Monster", "Spell Card"], cards)),
+                "atk": rng.integers(0, 4000, cards),
+                "def": rng.integers(0, 4000, cards),
+                "level": rng.integers(1, 12, cards),
+                **{name: pa.array([[value]] * cards) for name, value in nested.items()},
+            },
+            ["frame_type", "desc", "race", "archetype", "attribute", "ygoprodeck_url"],
+            fetched,
+        ),
+    )
+
+    refreshed = pokemon if day == START else max(1, pokemon // 30)
+    pokemon_ids = rng.choice(pokemon, refreshed, replace=False) + 1
+    _write(
+        lake_dir,
+        "pokemon_api/pokemon_details",
+        day,
+        _landed(
+            {
+                "id": pokemon_ids,
+                "order": pokemon_ids,
+                "name": _strings("pokemon-", pokemon_ids),
+                "height": rng.integers(1, 200, refreshed),
+                "weight": rng.integers(1, 9000, refreshed),
+                "base_experience": rng.integers(1, 400, refreshed),
+            },
+            [
+                "species",
+                "location_area_encounters",
+                "cry_latest",
+                "cry_legacy",
+                "sprite_default",
+                "sprite_artwork",
+                "sprite_animated",
+            ],
+            fetched,
+        ),
+    )
+    stats = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+    _write(
+        lake_dir,
+        "pokemon_api/pokemon_stats",
+        day,
+        _landed(
+            {
+                "pokemon_id": np.repeat(pokemon_ids, len(stats)),
+                "stat": pa.array(stats * refreshed, pa.large_string()),
+                "base_stat": rng.integers(1, 255, refreshed * len(stats)),
+                "effort": rng.integers(0, 3, refreshed * len(stats)),
+            },
+            [],
+            fetched,
+        ),
+    )
+
+    offset = (day - START).days * posts // 2
+    post_ids = np.arange(offset, offset + posts)
+    _write(
+        lake_dir,
+        "reddit/posts",
+        day,
+        _landed(
+            {
+                "id": _strings("t3_", post_ids),
+                "title": _strings("post ", post_ids),
+                "score": rng.integers(0, 50000, posts),
+                "created_utc": time.mktime(day.timetuple())
+                - rng.integers(0, 2 * 86400, posts).astype(float),
+                "num_comments": rng.integers(0, 5000, posts),
+                "subreddit": pa.array(rng.choice(["pokemon", "yugioh"], posts)),
+            },
+            ["author", "url"],
+        ),
+    )
+    return cards + refreshed * (1 + len(stats)) + posts
+
+
+def run_benchmark(
+    work_dir: str, days: int, cards: int, pokemon: int, posts: int
+) -> list[dict]:
+    """
+    Land `days` days, plan the models from scratch over all but the last day (full backfill),
+    then land nothing new and run the scheduler for the last day (incremental run).
+
+    Returns:
+        list[dict]: run, intervals (days), rows landed in them, seconds.
+    """
+    lake_dir = os.path.join(work_dir, "lake")
+    rng = np.random.default_rng(0)
+    landed = [
+        land_day(lake_dir, START + timedelta(days=d), cards, pokemon, posts, rng)
+        for d in range(days)
+    ]
+
+    # read by constants.py / config.yaml when the SQLMesh context loads
+    os.environ["DATA_LAKE_URL"] = f"{lake_dir}/"
+    os.environ["SQLMESH_DUCKDB_DATABASE"] = os.path.join(work_dir, "bench.duckdb")
+    from sqlmesh import Context
+
+    context = Context(paths=TRANSFORM_DIR, gateway="local")
+    last_day = START + timedelta(days=days - 1)
+
+    start = time.perf_counter()
+    context.plan(auto_apply=True, no_prompts=True, execution_time=last_day)
+    full = time.perf_counter() - start
+
+    start = time.perf_counter()
+    context.run(execution_time=last_day + timedelta(days=1))
+    incremental = time.perf_counter() - start
+
+    return [
+        {
+            "run": "full",
+            "intervals": days - 1,
+            "rows": sum(landed[:-1]),
+            "seconds": full,
+        },
+        {
+            "run": "incremental",
+            "intervals": 1,
+            "rows": landed[-1],
+            "seconds": incremental,
+        },
+    ]
+
+
+def print_results(results: list[dict]) -> None:
+    print(f"\n{'run':<13}{'days':>6}{'rows landed':>13}{'seconds':>9}")
+    for r in results:
+        print(f"{r['run']:<13}{r['intervals']:>6}{r['rows']:>13,}{r['seconds']:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time a full backfill and an incremental run of the SQLMesh models on the "
+        "local DuckDB gateway, over synthetic landed data"
+    )
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--cards", type=int, default=13000)
+    parser.add_argument("--pokemon", type=int, default=1300)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = run_benchmark(
+            work_dir, args.days, args.cards, args.pokemon, args.posts
+        )
+    print_results(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
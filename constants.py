@@ -29,6 +29,90 @@ AWS_REGION = os.getenv("AWS_REGION")
 REDDIT_CLIENT_ID = os.getenv("REDDIT_CLIENT_ID")
 REDDIT_SECRET = os.getenv("REDDIT_SECRET")
 
+# API base URLs (override to point the ingests at a local stand-in, e.g. for benchmarks)
+POKEAPI_BASE_URL = os.getenv("POKEAPI_BASE_URL", "https://pokeapi.co/api/v2/")
+YGOPRODECK_BASE_URL = os.getenv(
+    "YGOPRODECK_BASE_URL", "https://db.ygoprodeck.com/api/v7/"
+)
+REDDIT_OAUTH_URL = os.getenv("REDDIT_OAUTH_URL", "https://oauth.reddit.com")
+REDDIT_URL = os.getenv("REDDIT_URL", "https://www.reddit.com")
+
+# Ingest tuning
+POKEMON_FETCH_WORKERS = int(os.getenv("POKEMON_FETCH_WORKERS", "10"))
+POKEAPI_REQUESTS_PER_SECOND = float(os.getenv("POKEAPI_REQUESTS_PER_SECOND", "20"))
+POKEMON_DETAILS_TTL_DAYS = float(os.getenv("POKEMON_DETAILS_TTL_DAYS", "30"))
+# PokeAPI list resources whose items' detail pages are also loaded, comma separated
+POKEAPI_DETAIL_RESOURCES = [
+    name
+    for name in os.getenv("POKEAPI_DETAIL_RESOURCES", "move,item").split(",")
+    if name
+]
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+REDDIT_FETCH_WORKERS = int(os.getenv("REDDIT_FETCH_WORKERS", "4"))
+REDDIT_REQUESTS_PER_MINUTE = float(os.getenv("REDDIT_REQUESTS_PER_MINUTE", "100"))
+REDDIT_MAX_RETRIES = int(os.getenv("REDDIT_MAX_RETRIES", "5"))
+LANDNERDS_SHARD_WORKERS = int(
+    os.getenv("LANDNERDS_SHARD_WORKERS", str(os.cpu_count() or 4))
+)
+LANDNERDS_BATCH_SIZE = int(os.getenv("LANDNERDS_BATCH_SIZE", "65536"))
+INGEST_PIPELINE_WORKERS = int(os.getenv("INGEST_PIPELINE_WORKERS", "4"))
+
+# Shared HTTP session used by the REST ingests
+INGEST_HTTP_POOL_SIZE = int(os.getenv("INGEST_HTTP_POOL_SIZE", "32"))
+INGEST_HTTP_RETRIES = int(os.getenv("INGEST_HTTP_RETRIES", "5"))
+INGEST_HTTP_INITIAL_CONCURRENCY = int(os.getenv("INGEST_HTTP_INITIAL_CONCURRENCY", "4"))
+INGEST_HTTP_MAX_CONCURRENCY = int(
+    os.getenv("INGEST_HTTP_MAX_CONCURRENCY", str(INGEST_HTTP_POOL_SIZE))
+)
+INGEST_HTTP_BACKOFF_SECONDS = float(os.getenv("INGEST_HTTP_BACKOFF_SECONDS", "0.5"))
+INGEST_HTTP_MAX_DELAY_SECONDS = float(os.getenv("INGEST_HTTP_MAX_DELAY_SECONDS", "120"))
+
+# HTTP response cache shared by the REST ingests
+HTTP_CACHE_DIR = os.getenv(
+    "HTTP_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache", "http")
+)
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(2 * 1024**3)))
+HTTP_CACHE_MAX_AGE_SECONDS = float(
+    os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", str(30 * 24 * 3600))
+)
+HTTP_CACHE_FRESH_SECONDS = float(os.getenv("HTTP_CACHE_FRESH_SECONDS", "0"))
+
+# Spill files of long extractions, so a failed run resumes instead of refetching
+INGEST_CHECKPOINT_DIR = os.getenv(
+    "INGEST_CHECKPOINT_DIR",
+    os.path.join(os.path.dirname(__file__), ".cache", "checkpoints"),
+)
+INGEST_CHECKPOINT_MAX_AGE_SECONDS = float(
+    os.getenv("INGEST_CHECKPOINT_MAX_AGE_SECONDS", str(24 * 3600))
+)
+
+# Data lake the filesystem destination writes to, read by the dashboards
+DATA_LAKE_URL = os.getenv("DATA_LAKE_URL", "s3://0-data-lake/")
+
+# Parquet layout of the tables the ingests write to the data lake
+LAKE_ROW_GROUP_SIZE = int(os.getenv("LAKE_ROW_GROUP_SIZE", "100000"))
+LAKE_ZSTD_LEVEL = int(os.getenv("LAKE_ZSTD_LEVEL", "3"))
+LAKE_FILE_MAX_BYTES = int(os.getenv("LAKE_FILE_MAX_BYTES", str(256 * 1024**2)))
+
+# Local copies of the serving snapshots the dashboards memory-map
+SERVING_CACHE_DIR = os.getenv(
+    "SERVING_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache", "serving")
+)
+
+# Local cache of the artwork shown by the dashboards
+IMAGE_CACHE_DIR = os.getenv(
+    "IMAGE_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache", "images")
+)
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(512 * 1024**2)))
+IMAGE_THUMBNAIL_SIZE = int(os.getenv("IMAGE_THUMBNAIL_SIZE", "96"))
+IMAGE_FETCH_WORKERS = int(os.getenv("IMAGE_FETCH_WORKERS", "8"))
+IMAGE_TABLE_WAIT_SECONDS = float(os.getenv("IMAGE_TABLE_WAIT_SECONDS", "5"))
+
+# Per-run ingest metrics (JSON and Prometheus text exports)
+INGEST_METRICS_DIR = os.getenv(
+    "INGEST_METRICS_DIR", os.path.join(os.path.dirname(__file__), ".cache", "metrics")
+)
+
 # dbt constants
 dbt_project_path = "/Users/zaineisa/Documents/VSCode/LandNerds_orchestration/LandNerds_datapipeline/landnerds"
 dbt_profiles_dir = "/Users/zaineisa/Documents/VSCode/LandNerds_orchestration/LandNerds_datapipeline/landnerds/local_config"
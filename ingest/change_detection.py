@@ -0,0 +1,159 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import threading
+from typing import Iterable, Optional, Union
+
+import fsspec
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+from constants import DATA_LAKE_URL
+from ingest.metrics import get_run_metrics
+
+# Hash indexes of the last landed content, one parquet file per table
+CHANGE_INDEX_URL = f"{DATA_LAKE_URL}change_index/"
+
+# Fixed seeds, so hashes only change with the content (and the Polars version, see below)
+HASH_SEEDS = (0x9E3779B9, 0x85EBCA6B, 0xC2B2AE35, 0x27D4EB2F)
+
+# A null field of the JSON encoding. Quotes inside strings are escaped, so a `"` right after
+# `{` or `,` always starts a key.
+NULL_FIELD = r'"(?:[^"\\]|\\.)*":null'
+
+# Version of the content encoding, bumped whenever it changes so older indexes are ignored
+HASH_VERSION = "2"
+
+
+class ChangeDetector:
+    """
+    Drops the rows of a full dump whose content is unchanged since the last load.
+
+    Each row (or, for child tables, all rows of a key) is reduced to a 64-bit hash of its
+    content: the columns are packed into a struct, JSON-encoded and hashed with vectorised
+    Polars expressions. Rows whose key is new or whose hash differs from the index are kept.
+
+    The index is a (key, hash) parquet file under CHANGE_INDEX_URL, updated by `commit` once
+    the kept rows have been loaded. Polars hashes are only stable within a Polars version, so
+    an index written by another version (or HASH_VERSION) is ignored and the next load emits
+    every row once.
+    Rows that disappear from the dump are not detected and stay in the lake.
+
+    Args:
+        table (str): Path of the index under CHANGE_INDEX_URL, e.g. "yugioh_api/yugioh_cards".
+        key (str): Key column.
+        ignore (list[str]): Columns left out of the hash, e.g. the fetch timestamp.
+        unique (bool): False for child tables with several rows per key, which are hashed and
+            kept or dropped together.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        key: str,
+        ignore: Iterable[str] = ("date_fetched",),
+        unique: bool = True,
+    ):
+        self.url = f"{CHANGE_INDEX_URL}{table}.parquet"
+        self.key = key
+        self.ignore = set(ignore)
+        self.unique = unique
+        self._index: Optional[pl.DataFrame] = None
+        self._changes: list[pl.DataFrame] = []
+        self._lock = threading.Lock()
+
+    def _load_index(self) -> pl.DataFrame:
+        if self._index is None:
+            self.reset()
+            fs, path = fsspec.core.url_to_fs(self.url)
+            if fs.exists(path):
+                with fs.open(path, "rb") as f:
+                    table = pq.read_table(f)
+                metadata = table.schema.metadata or {}
+                if (
+                    metadata.get(b"polars_version", b"").decode() == pl.__version__
+                    and metadata.get(b"hash_version", b"").decode() == HASH_VERSION
+                ):
+                    self._index = pl.from_arrow(table)
+                else:
+                    print(
+                        f"{self.url} was hashed by another Polars or hash version, ignoring it"
+                    )
+        return self._index
+
+    def reset(self) -> None:
+        """
+        Forget the landed hashes, so every row is emitted and the index is rebuilt on commit.
+        """
+        self._index = pl.DataFrame(schema={self.key: pl.Int64, "hash": pl.UInt64})
+
+    def hashes(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        The content hash of each key of `df`, as (key, hash).
+        """
+        columns = sorted(c for c in df.columns if c not in self.ignore)
+        content = (
+            pl.struct(columns)
+            .struct.json_encode()
+            .str.replace_all(f",{NULL_FIELD}", "")
+            .str.replace_all(rf"\{{{NULL_FIELD},?", "{")
+        )
+        hashes = df.select(self.key, content.hash(*HASH_SEEDS).alias("hash"))
+        if not self.unique:
+            hashes = (
+                hashes.group_by(self.key)
+                .agg(pl.col("hash").sort())
+                .with_columns(pl.col("hash").hash(*HASH_SEEDS))
+            )
+        return hashes
+
+    def changes(
+        self, data: Union[pl.DataFrame, pa.Table]
+    ) -> Union[pl.DataFrame, pa.Table]:
+        """
+        The rows of `data` that are new or changed since the last commit, in the same type
+        as `data`.
+        """
+        df = pl.from_arrow(data) if isinstance(data, pa.Table) else data
+        with get_run_metrics().stage("change_detection") as stage:
+            index = self._load_index()
+            hashes = self.hashes(df).cast({self.key: index.schema[self.key]})
+            changed = hashes.join(
+                index, on=self.key, how="left", suffix="_landed"
+            ).filter(
+                pl.col("hash_landed").is_null()
+                | (pl.col("hash") != pl.col("hash_landed"))
+            )
+            with self._lock:
+                self._changes.append(changed.select(self.key, "hash"))
+            keep = df[self.key].is_in(changed[self.key])
+            stage.rows = int(keep.sum())
+        if isinstance(data, pa.Table):
+            return data.filter(keep.to_arrow())
+        return df.filter(keep)
+
+    def commit(self) -> None:
+        """
+        Record the hashes of the rows returned by `changes` in the index. Call after they
+        have been loaded.
+        """
+        with self._lock:
+            changes, self._changes = self._changes, []
+        changed = pl.concat(changes) if changes else None
+        if changed is None or changed.is_empty():
+            return
+        index = self._load_index()
+        index = pl.concat([index.join(changed, on=self.key, how="anti"), changed]).sort(
+            self.key
+        )
+        table = index.to_arrow().replace_schema_metadata(
+            {"polars_version": pl.__version__, "hash_version": HASH_VERSION}
+        )
+        fs, path = fsspec.core.url_to_fs(self.url)
+        fs.makedirs(os.path.dirname(path), exist_ok=True)
+        with fs.open(path, "wb") as f:
+            pq.write_table(table, f, compression="zstd")
+        self._index = index
+        print(f"{changed.height} new or changed keys recorded in {self.url}")
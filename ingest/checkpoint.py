@@ -0,0 +1,158 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import hashlib
+import json
+import shutil
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+import polars as pl
+import pyarrow as pa
+from constants import INGEST_CHECKPOINT_DIR, INGEST_CHECKPOINT_MAX_AGE_SECONDS
+from ingest.metrics import get_run_metrics
+
+
+class Checkpoint:
+    """
+    Spills the batches of a long extraction to local Arrow IPC segments, so a rerun after a
+    failure resumes where the last run stopped instead of refetching everything.
+
+    The work is a fixed, ordered list of items (e.g. detail URLs). Each segment holds the
+    results of the next items, and manifest.json records the segments and the number of items
+    they cover (the committed offset). A segment is written and renamed into place before the
+    manifest points to it, so a crash never leaves a half-written segment committed.
+
+    A checkpoint is discarded when the item list changes or it is older than `max_age_seconds`.
+    Call `clear` (or `Checkpoint.discard(name)`) once the results have been loaded.
+
+    Args:
+        name (str): Name of the extraction, the folder under `directory`.
+        items (list[str]): The ordered work list. Its hash identifies the checkpoint.
+        directory (str): Parent folder of the checkpoints.
+        max_age_seconds (float): Start over when the checkpoint was started longer ago.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        items: list[str],
+        directory: str = INGEST_CHECKPOINT_DIR,
+        max_age_seconds: float = INGEST_CHECKPOINT_MAX_AGE_SECONDS,
+    ):
+        self.path = os.path.join(directory, name)
+        self.key = hashlib.sha256("\n".join(items).encode()).hexdigest()
+        self.manifest = self._read_manifest()
+        if (
+            self.manifest is None
+            or self.manifest["key"] != self.key
+            or time.time() - self.manifest["started_at"] > max_age_seconds
+        ):
+            self.clear()
+            self.manifest = {
+                "key": self.key,
+                "started_at": time.time(),
+                "committed": 0,
+                "segments": [],
+            }
+        elif self.committed:
+            print(f"resuming {name} from checkpoint at item {self.committed}")
+
+    @property
+    def committed(self) -> int:
+        """
+        Number of items whose results are in the committed segments.
+        """
+        return self.manifest["committed"]
+
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.path, "manifest.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self) -> None:
+        manifest_path = os.path.join(self.path, "manifest.json")
+        with open(f"{manifest_path}.tmp", "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    def append(self, batch: pa.Table, items: int) -> None:
+        """
+        Write `batch`, the results of the next `items` items, as a segment and commit it.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        name = f"segment-{len(self.manifest['segments']):05d}.arrow"
+        segment_path = os.path.join(self.path, name)
+        with get_run_metrics().stage("checkpoint") as stage:
+            with pa.OSFile(f"{segment_path}.tmp", "wb") as sink:
+                with pa.ipc.new_file(sink, batch.schema) as writer:
+                    writer.write_table(batch)
+            os.replace(f"{segment_path}.tmp", segment_path)
+            self.manifest["segments"].append(name)
+            self.manifest["committed"] += items
+            self._write_manifest()
+            stage.rows = batch.num_rows
+            stage.bytes = os.path.getsize(segment_path)
+
+    def batches(self) -> Iterator[pa.Table]:
+        """
+        Yield the committed segments in order, read one at a time.
+        """
+        for name in self.manifest["segments"]:
+            with pa.OSFile(os.path.join(self.path, name)) as source:
+                yield pa.ipc.open_file(source).read_all()
+
+    def schema(self) -> Optional[pl.Schema]:
+        """
+        Schema of the committed segments, widened to fit all of them, or None if there are none.
+        Only the segment footers are read.
+        """
+        frames = []
+        for name in self.manifest["segments"]:
+            with pa.OSFile(os.path.join(self.path, name)) as source:
+                frames.append(
+                    pl.from_arrow(pa.ipc.open_file(source).schema.empty_table())
+                )
+        if not frames:
+            return None
+        return pl.concat(frames, how="diagonal_relaxed").schema
+
+    def clear(self) -> None:
+        """
+        Delete the segments and the manifest.
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    @staticmethod
+    def discard(name: str, directory: str = INGEST_CHECKPOINT_DIR) -> None:
+        """
+        Delete the checkpoint `name`, e.g. once its results have been loaded.
+        """
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def checkpointed_batches(
+    checkpoint: Checkpoint,
+    items: list,
+    fetch: Callable[[list], Iterable[pa.Table]],
+) -> Iterator[pa.Table]:
+    """
+    Yield the committed batches of `checkpoint`, then fetch the remaining `items` and commit
+    each batch before yielding it.
+
+    Args:
+        checkpoint (Checkpoint): Checkpoint of the extraction over `items`.
+        items (list): The ordered work list.
+        fetch (Callable): Takes the remaining items and yields their results as Arrow tables,
+            one row per item in the same order.
+    Yields:
+        pa.Table: The batches of the whole extraction, in item order.
+    """
+    yield from checkpoint.batches()
+    for batch in fetch(items[checkpoint.committed :]):
+        checkpoint.append(batch, batch.num_rows)
+        yield batch
@@ -0,0 +1,115 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+import gcsfs
+import praw
+import requests
+from google.cloud import bigquery
+from google.oauth2 import service_account
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from constants import (
+    BIGQUERY_SERVICE_ACCOUNT_FILE,
+    PROJECT_ID,
+    REDDIT_CLIENT_ID,
+    REDDIT_SECRET,
+    REDDIT_OAUTH_URL,
+    REDDIT_URL,
+    INGEST_HTTP_POOL_SIZE,
+    INGEST_HTTP_RETRIES,
+)
+from ingest.metrics import get_run_metrics
+
+if TYPE_CHECKING:
+    from ingest.concurrent_fetch import TokenBucket
+
+_http_session_lock = threading.Lock()
+_http_session = None
+_reddit_clients = threading.local()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Return the process-wide requests Session used by the REST ingests.
+    Connections are kept alive and pooled per host (INGEST_HTTP_POOL_SIZE), and connection
+    errors are retried with exponential backoff. 429/5xx responses are retried by the
+    RequestController (ingest.request_controller). Every response is counted in the run
+    metrics.
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            retries = Retry(
+                total=INGEST_HTTP_RETRIES,
+                backoff_factor=0.5,
+                allowed_methods=["GET", "HEAD"],
+                # statuses, even with a Retry-After, are left to the RequestController
+                respect_retry_after_header=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=INGEST_HTTP_POOL_SIZE,
+                pool_maxsize=INGEST_HTTP_POOL_SIZE,
+                max_retries=retries,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.hooks["response"].append(get_run_metrics().record_http)
+            _http_session = session
+        return _http_session
+
+
+@lru_cache(maxsize=None)
+def get_credentials() -> service_account.Credentials:
+    """
+    Load the Google service-account credentials once per process.
+    """
+    return service_account.Credentials.from_service_account_file(
+        BIGQUERY_SERVICE_ACCOUNT_FILE
+    )
+
+
+@lru_cache(maxsize=None)
+def get_bigquery_client() -> bigquery.Client:
+    """
+    Return a BigQuery client shared by all LandNerds calls in this process.
+    """
+    return bigquery.Client(credentials=get_credentials(), project=PROJECT_ID)
+
+
+@lru_cache(maxsize=None)
+def get_gcs_filesystem() -> gcsfs.GCSFileSystem:
+    """
+    Return a GCS filesystem authenticated with the same service account as BigQuery.
+    """
+    return gcsfs.GCSFileSystem(project=PROJECT_ID, token=get_credentials())
+
+
+def get_reddit_client(bucket: Optional["TokenBucket"] = None) -> praw.Reddit:
+    """
+    Return the calling thread's Reddit client. praw clients are not thread safe, so each
+    thread gets its own, which it then reuses for every request.
+    Args:
+        bucket (TokenBucket): Optional rate limiter the client's requests are drawn from. A new
+            client makes its own OAuth token request, so creating one takes a token from it.
+    """
+    if not hasattr(_reddit_clients, "reddit"):
+        if bucket is not None:
+            bucket.acquire()
+        session = requests.Session()
+        session.hooks["response"].append(get_run_metrics().record_http)
+        _reddit_clients.reddit = praw.Reddit(
+            client_id=REDDIT_CLIENT_ID,
+            client_secret=REDDIT_SECRET,
+            user_agent="dlt-reddit-pipeline by /u/PuzzleheadedAge7992",
+            oauth_url=REDDIT_OAUTH_URL,
+            reddit_url=REDDIT_URL,
+            requestor_kwargs={"session": session},
+        )
+    return _reddit_clients.reddit
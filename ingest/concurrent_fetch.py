@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional
+from urllib.parse import urlparse
+
+import requests
+from ingest.clients import get_http_session
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to cap the request rate against a single API.
+
+    Args:
+        rate (float): Tokens added per second (i.e. the sustained requests/sec).
+        capacity (float): Maximum burst size. Defaults to one second worth of tokens.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Block until `tokens` are available and take them from the bucket.
+
+        Raises:
+            ValueError: If `tokens` exceeds the capacity, as the bucket could never hold them.
+        """
+        if tokens > self.capacity:
+            raise ValueError(
+                f"cannot acquire {tokens} tokens from a bucket of capacity {self.capacity}"
+            )
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """
+    Keeps one token bucket per host so each API gets its own requests/sec budget.
+
+    Args:
+        requests_per_second (float): Sustained rate allowed per host. None disables limiting.
+    """
+
+    def __init__(self, requests_per_second: Optional[float]):
+        self.requests_per_second = requests_per_second
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        if not self.requests_per_second:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.requests_per_second)
+                self._buckets[host] = bucket
+        bucket.acquire()
+
+
+def iter_ordered(
+    fn: Callable[[Any], Any], items: Iterable[Any], max_workers: int
+) -> Iterator[Any]:
+    """
+    Apply `fn` to every item on a thread pool and yield the results in input order.
+    At most `2 * max_workers` results are held at once, so a slow consumer bounds memory.
+
+    Args:
+        fn (Callable): Function applied to each item.
+        items (Iterable): The inputs.
+        max_workers (int): Number of threads.
+    Yields:
+        The results of `fn`, in the same order as `items`.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_concurrently(
+    urls: list[str],
+    fetch: Callable[[str, requests.Session], Any],
+    max_workers: int = 10,
+    requests_per_second: Optional[float] = None,
+) -> Iterator[Any]:
+    """
+    Run `fetch(url, session)` for every url on a thread pool and yield the results in order.
+    All workers share the pooled keep-alive session from ingest.clients.
+
+    Args:
+        urls (list[str]): The URLs to fetch.
+        fetch (Callable): Function taking a url and a shared session, returning the parsed result.
+        max_workers (int): Maximum number of requests in flight at once.
+        requests_per_second (float): Per-host rate limit. None means unlimited.
+    Yields:
+        The results of `fetch`, in the same order as `urls`.
+    """
+    limiter = HostRateLimiter(requests_per_second)
+    session = get_http_session()
+
+    def rate_limited_fetch(url: str) -> Any:
+        limiter.wait(url)
+        return fetch(url, session)
+
+    start = time.perf_counter()
+    yield from iter_ordered(rate_limited_fetch, urls, max_workers)
+    elapsed = time.perf_counter() - start
+
+    rate = len(urls) / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"fetched {len(urls)} urls in {elapsed:.1f}s with {max_workers} workers "
+        f"({rate:.1f} requests/sec)"
+    )
+
+
+def fetch_concurrently(
+    urls: list[str],
+    fetch: Callable[[str, requests.Session], Any],
+    max_workers: int = 10,
+    requests_per_second: Optional[float] = None,
+) -> list[Any]:
+    """
+    Run `fetch(url, session)` for every url on a thread pool.
+
+    Args:
+        urls (list[str]): The URLs to fetch.
+        fetch (Callable): Function taking a url and a shared session, returning the parsed result.
+        max_workers (int): Maximum number of requests in flight at once.
+        requests_per_second (float): Per-host rate limit. None means unlimited.
+    Returns:
+        list: The results of `fetch`, in the same order as `urls`.
+    """
+    return list(iter_concurrently(urls, fetch, max_workers, requests_per_second))
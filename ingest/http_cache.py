@@ -0,0 +1,322 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import hashlib
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+import requests
+from ingest.metrics import get_run_metrics
+from ingest.request_controller import get_request_controller
+from constants import (
+    HTTP_CACHE_DIR,
+    HTTP_CACHE_MAX_BYTES,
+    HTTP_CACHE_MAX_AGE_SECONDS,
+    HTTP_CACHE_FRESH_SECONDS,
+)
+
+# Entries written this recently are never evicted, as another process may still be storing
+# them (a body is written before its meta)
+EVICT_GRACE_SECONDS = 60
+
+
+@dataclass
+class CachedResponse:
+    """
+    A response body stored on local disk by the ResponseCache.
+
+    Attributes:
+        url (str): The requested URL.
+        path (str): Path of the cached body on disk.
+        status (str): "fresh" (served from disk), "revalidated" (304) or "miss" (downloaded).
+    """
+
+    url: str
+    path: str
+    status: str
+
+    @property
+    def content(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def json(self) -> Any:
+        with open(self.path, "rb") as f:
+            return json.load(f)
+
+
+class ResponseCache:
+    """
+    Persistent on-disk HTTP response cache keyed by URL.
+
+    Stores the ETag / Last-Modified validators of each response and revalidates them with
+    conditional requests, so unchanged resources cost a 304 (or nothing, while the response is
+    still fresh). Entries older than `max_age_seconds` are dropped and the least recently used
+    entries are evicted once the cache grows past `max_bytes`.
+
+    Args:
+        cache_dir (str): Directory holding the cached bodies and metadata.
+        max_bytes (int): Maximum total size of cached bodies.
+        max_age_seconds (float): Entries stored longer ago than this are refetched in full.
+        fresh_seconds (float): Serve entries without revalidating for this long after storing.
+            A `Cache-Control: max-age` sent by the server takes precedence when it is longer.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int,
+        max_age_seconds: float,
+        fresh_seconds: float = 0,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.fresh_seconds = fresh_seconds
+        self.stats = {"fresh": 0, "revalidated": 0, "miss": 0}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url: str) -> tuple[str, str]:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.body", f"{base}.meta.json"
+
+    def _read_meta(self, meta_path: str) -> Optional[dict]:
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta_path: str, meta: dict) -> None:
+        tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def _record(self, status: str) -> None:
+        with self._lock:
+            self.stats[status] += 1
+        get_run_metrics().add(f"http_cache_{status}")
+
+    def _lookup(
+        self, url: str, session: Optional[requests.Session]
+    ) -> tuple[Optional[str], Optional[requests.Response]]:
+        """
+        Check the cached entry for `url`, revalidating it upstream when needed.
+
+        Returns:
+            tuple: ("fresh" | "revalidated", None) when the cached body can be used, otherwise
+            (None, response) with an open, streaming 200 response to be stored.
+        """
+        body_path, meta_path = self._paths(url)
+        meta = self._read_meta(meta_path) if os.path.exists(body_path) else None
+        now = time.time()
+
+        if meta and now - meta["stored_at"] > self.max_age_seconds:
+            meta = None
+
+        headers = {}
+        if meta:
+            fresh_for = max(self.fresh_seconds, meta.get("max_age") or 0)
+            if now - meta["validated_at"] < fresh_for:
+                os.utime(body_path)
+                self._record("fresh")
+                return "fresh", None
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = get_request_controller().get(
+            url, session, headers=headers, stream=True
+        )
+        if meta and response.status_code == 304:
+            response.close()
+            meta["validated_at"] = now
+            meta["max_age"] = _max_age(response) or meta.get("max_age")
+            self._write_meta(meta_path, meta)
+            os.utime(body_path)
+            self._record("revalidated")
+            return "revalidated", None
+
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        return None, response
+
+    def _store(
+        self, url: str, response: requests.Response, chunk_size: int
+    ) -> Iterator[bytes]:
+        """
+        Write a streaming response to the cache, yielding each chunk as it arrives.
+        """
+        body_path, meta_path = self._paths(url)
+        tmp_path = f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        now = time.time()
+        size = 0
+        try:
+            with response, open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+            # the old validators must never describe the new body: without meta the entry
+            # is a miss until the new meta is written
+            _remove(meta_path)
+            os.replace(tmp_path, body_path)
+        finally:
+            _remove(tmp_path)
+        self._write_meta(
+            meta_path,
+            {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "max_age": _max_age(response),
+                "stored_at": now,
+                "validated_at": now,
+                "size": size,
+            },
+        )
+        self._record("miss")
+
+    def get(
+        self, url: str, session: Optional[requests.Session] = None
+    ) -> CachedResponse:
+        """
+        Return the body for `url`, from disk when it is unchanged upstream.
+
+        Args:
+            url (str): The URL to fetch.
+            session (requests.Session): Session to use. Defaults to the shared ingest session.
+        Returns:
+            CachedResponse: Handle to the cached body.
+        """
+        body_path, _ = self._paths(url)
+        status, response = self._lookup(url, session)
+        if response is not None:
+            for _ in self._store(url, response, chunk_size=1 << 16):
+                pass
+            status = "miss"
+        return CachedResponse(url, body_path, status)
+
+    def iter_bytes(
+        self,
+        url: str,
+        session: Optional[requests.Session] = None,
+        chunk_size: int = 1 << 16,
+    ) -> Iterator[bytes]:
+        """
+        Yield the body for `url` in chunks: straight from the network as it arrives (while it is
+        written to the cache) on a miss, otherwise from disk. Lets large payloads be parsed
+        incrementally instead of being held in memory.
+
+        Args:
+            url (str): The URL to fetch.
+            session (requests.Session): Session to use. Defaults to the shared ingest session.
+            chunk_size (int): Size of the yielded chunks in bytes.
+        Yields:
+            bytes: Consecutive chunks of the response body.
+        """
+        body_path, _ = self._paths(url)
+        _, response = self._lookup(url, session)
+        if response is not None:
+            yield from self._store(url, response, chunk_size)
+            return
+        with open(body_path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def evict(self) -> None:
+        """
+        Drop entries past `max_age_seconds`, then the least recently used entries until the
+        cache fits in `max_bytes`. Entries written in the last EVICT_GRACE_SECONDS are kept.
+        """
+        now = time.time()
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".body"):
+                continue
+            body_path = os.path.join(self.cache_dir, name)
+            meta_path = body_path[: -len(".body")] + ".meta.json"
+            try:
+                stat = os.stat(body_path)
+            except FileNotFoundError:  # evicted by another ingest process
+                continue
+            total += stat.st_size
+            if now - stat.st_mtime < EVICT_GRACE_SECONDS:
+                # just stored; its meta may not be written yet
+                continue
+            meta = self._read_meta(meta_path)
+            if meta is None or now - meta["stored_at"] > self.max_age_seconds:
+                _remove(body_path, meta_path)
+                total -= stat.st_size
+                continue
+            entries.append((stat.st_mtime, stat.st_size, body_path, meta_path))
+
+        for _, size, body_path, meta_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            _remove(body_path, meta_path)
+            total -= size
+
+    def summary(self) -> str:
+        total = sum(self.stats.values())
+        hits = self.stats["fresh"] + self.stats["revalidated"]
+        hit_rate = hits / total if total else 0.0
+        return (
+            f"http cache: {total} requests, {hit_rate:.1%} hit rate "
+            f"({self.stats['fresh']} fresh, {self.stats['revalidated']} revalidated, "
+            f"{self.stats['miss']} downloaded)"
+        )
+
+    def close(self) -> None:
+        """
+        Enforce the size/age limits and print the hit-rate summary for this run.
+        """
+        self.evict()
+        print(self.summary())
+
+
+def _max_age(response: requests.Response) -> Optional[int]:
+    match = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+    return int(match.group(1)) if match else None
+
+
+def _remove(*paths: str) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Return the process-wide ResponseCache configured from constants.py.
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                HTTP_CACHE_DIR,
+                max_bytes=HTTP_CACHE_MAX_BYTES,
+                max_age_seconds=HTTP_CACHE_MAX_AGE_SECONDS,
+                fresh_seconds=HTTP_CACHE_FRESH_SECONDS,
+            )
+        return _response_cache
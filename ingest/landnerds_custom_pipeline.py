@@ -3,48 +3,166 @@ import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-import dlt
+import argparse
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Union
+import fsspec
 import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
 from google.cloud import bigquery
-from google.oauth2 import service_account
-from constants import BIGQUERY_SERVICE_ACCOUNT_FILE, PROJECT_ID
-import gcsfs
+from constants import LANDNERDS_SHARD_WORKERS, LANDNERDS_BATCH_SIZE
+from ingest.clients import get_bigquery_client, get_gcs_filesystem
+from ingest.loader import ParquetLayout, load_to_file_system
+from ingest.metrics import get_run_metrics
+from ingest.streaming import to_arrow
 
+# Legacy BigQuery schema types mapped to the GoogleSQL types used in CAST
+BIGQUERY_SQL_TYPES = {"INTEGER": "INT64", "FLOAT": "FLOAT64", "BOOLEAN": "BOOL"}
 
-def gbq_to_gcs_storage(full_table_name: str, bucket_name: str) -> str:
+
+def load_export_state(bucket_name: str, table_id: str) -> dict:
+    """
+    Read the state of the last export of `table_id`, stored next to its shards in GCS.
+    Returns an empty dict if the table has not been exported yet.
+    """
+    fs = get_gcs_filesystem()
+    path = f"{bucket_name}/{table_id}.export_state.json"
+    if not fs.exists(path):
+        return {}
+    with fs.open(path, "r") as f:
+        return json.load(f)
+
+
+def save_export_state(bucket_name: str, table_id: str, state: dict) -> None:
+    fs = get_gcs_filesystem()
+    with fs.open(f"{bucket_name}/{table_id}.export_state.json", "w") as f:
+        json.dump(state, f)
+
+
+def gbq_to_gcs_storage(
+    full_table_name: str,
+    bucket_name: str,
+    watermark_column: Optional[str] = None,
+    force: bool = False,
+) -> Optional[tuple[str, dict]]:
     """
     Load data from a BigQuery table into GCS (Google Cloud Storage).
     This is because the data will be and faster to process in smaller file chunks.
     Saves data in parquet format.
 
+    The table's `modified` timestamp and row count are compared with the last export, and
+    nothing is exported when both are unchanged. With a `watermark_column` (e.g. the partition
+    column or an updated_at timestamp), only rows above the last exported watermark are written,
+    via an EXPORT DATA query, into `{bucket_name}/increments/<run>/`.
+
+    The new export state is returned rather than saved, so a failed load is exported again:
+    save it with save_export_state once the shards have been loaded.
+
     Args:
         full_table_name (str): The (full) name of the BigQuery table to save
         bucket_name (str): The name of the GCS bucket to save the data
+        watermark_column (str): Optional column to export incrementally on.
+        force (bool): Export even if the table has not changed since the last export.
     Returns:
-        a statement indicating the table has been saved to GCS.
+        tuple[str, dict]: The GCS path holding the newly exported shards and the export state to
+            save after loading them, or None if nothing was exported.
 
     """
-    credentials = service_account.Credentials.from_service_account_file(
-        BIGQUERY_SERVICE_ACCOUNT_FILE
-    )
-    project_id = PROJECT_ID
-    client = bigquery.Client(credentials=credentials, project=project_id)
+    client = get_bigquery_client()
     project, dataset_id, table_id = full_table_name.split(".")
 
-    destination_uri = "gs://{}/{}".format(bucket_name, f"{table_id}-*.parquet")
     dataset_ref = bigquery.DatasetReference(project, dataset_id)
     table_ref = dataset_ref.table(table_id)
+    table = client.get_table(table_ref)
 
-    job_config = bigquery.job.ExtractJobConfig(
-        destination_format=bigquery.DestinationFormat.PARQUET
-    )
-    extract_job = client.extract_table(
-        table_ref, destination_uri, location="US", job_config=job_config
-    )
-    extract_job.result()
-    return print(
+    state = load_export_state(bucket_name, table_id)
+    if state.get("watermark_column") != watermark_column:
+        state = {}
+    modified = table.modified.isoformat()
+    if (
+        not force
+        and state.get("modified") == modified
+        and state.get("num_rows") == table.num_rows
+    ):
+        print(f"{full_table_name} unchanged since {modified}, skipping export")
+        return None
+
+    if watermark_column is None:
+        export_path = bucket_name
+        destination_uri = "gs://{}/{}".format(export_path, f"{table_id}-*.parquet")
+        job_config = bigquery.job.ExtractJobConfig(
+            destination_format=bigquery.DestinationFormat.PARQUET
+        )
+        with get_run_metrics().stage("export"):
+            extract_job = client.extract_table(
+                table_ref, destination_uri, location="US", job_config=job_config
+            )
+            extract_job.result()
+        watermark = None
+    else:
+        field_type = next(
+            (f.field_type for f in table.schema if f.name == watermark_column), None
+        )
+        if field_type is None:
+            raise ValueError(f"{full_table_name} has no column {watermark_column}")
+        source = f"`{project}.{dataset_id}.{table_id}`"
+        watermark = next(
+            iter(
+                client.query(
+                    f"SELECT CAST(MAX(`{watermark_column}`) AS STRING) AS watermark FROM {source}",
+                    location="US",
+                ).result()
+            )
+        ).watermark
+        if watermark is None or watermark == state.get("watermark"):
+            print(f"{full_table_name} has no rows past {watermark_column}={watermark}")
+            save_export_state(
+                bucket_name,
+                table_id,
+                {
+                    **state,
+                    "modified": modified,
+                    "num_rows": table.num_rows,
+                    "watermark_column": watermark_column,
+                },
+            )
+            return None
+
+        export_path = f"{bucket_name}/increments/{datetime.now():%Y%m%dT%H%M%S}"
+        destination_uri = "gs://{}/{}".format(export_path, f"{table_id}-*.parquet")
+        sql_type = BIGQUERY_SQL_TYPES.get(field_type, field_type)
+        condition = f"`{watermark_column}` <= CAST(@high AS {sql_type})"
+        params = [bigquery.ScalarQueryParameter("high", "STRING", watermark)]
+        if state.get("watermark") is not None:
+            condition += f" AND `{watermark_column}` > CAST(@low AS {sql_type})"
+            params.append(
+                bigquery.ScalarQueryParameter("low", "STRING", state["watermark"])
+            )
+        with get_run_metrics().stage("export"):
+            export_job = client.query(
+                f"""
+                EXPORT DATA OPTIONS (uri = '{destination_uri}', format = 'PARQUET', overwrite = true)
+                AS SELECT * FROM {source} WHERE {condition}
+                """,
+                job_config=bigquery.QueryJobConfig(query_parameters=params),
+                location="US",
+            )
+            export_job.result()
+
+    print(
         "Exported {}:{}.{} to {}".format(project, dataset_id, table_id, destination_uri)
     )
+    return export_path, {
+        "modified": modified,
+        "num_rows": table.num_rows,
+        "watermark_column": watermark_column,
+        "watermark": watermark,
+    }
 
 
 def gcs_to_df(full_table_name: str, bucket_name: str) -> pl.DataFrame:
@@ -58,13 +176,7 @@ def gcs_to_df(full_table_name: str, bucket_name: str) -> pl.DataFrame:
         pl.DataFrame: A Polars DataFrame containing the loaded data.
 
     """
-    credentials = service_account.Credentials.from_service_account_file(
-        BIGQUERY_SERVICE_ACCOUNT_FILE
-    )
-    project_id = PROJECT_ID
-    client = bigquery.Client(credentials=credentials, project=project_id)
     _, _, table_id = full_table_name.split(".")
-    fs = gcsfs.GCSFileSystem()
     gcs_file_path = f"gs://{bucket_name}/{table_id}-*.parquet"
     try:
         lf = pl.scan_parquet(gcs_file_path)
@@ -72,7 +184,10 @@ def gcs_to_df(full_table_name: str, bucket_name: str) -> pl.DataFrame:
         print(
             "\nLazy Polars DataFrame created. Collecting results (this will read data):"
         )
-        df_collected = lf.collect()  # Data is read and processed here
+        with get_run_metrics().stage("fetch") as stage:
+            df_collected = lf.collect()  # Data is read and processed here
+            stage.rows = df_collected.height
+            stage.bytes = df_collected.estimated_size()
 
         print(df_collected.head())
         print(f"\nCollected DataFrame shape: {df_collected.shape}")
@@ -83,40 +198,153 @@ def gcs_to_df(full_table_name: str, bucket_name: str) -> pl.DataFrame:
     return df_collected
 
 
-def df_to_file_system(full_table_name: str, df: pl.DataFrame) -> str:
+def gcs_shard_batches(
+    full_table_name: str,
+    bucket_name: str,
+    max_workers: int = LANDNERDS_SHARD_WORKERS,
+    batch_size: int = LANDNERDS_BATCH_SIZE,
+    filesystem: Optional[fsspec.AbstractFileSystem] = None,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Stream the `{table_id}-*.parquet` shards written by gbq_to_gcs_storage as Arrow record batches.
+    Shards are read in parallel and their batches are handed over through a bounded queue, so
+    memory stays at roughly `2 * max_workers` batches however large the table is.
+
+    Args:
+        full_table_name (str): The (full) name of the BigQuery table to load
+        bucket_name (str): The name of the GCS bucket to load the data from
+        max_workers (int): Number of shards read at once.
+        batch_size (int): Maximum number of rows per record batch.
+        filesystem (fsspec.AbstractFileSystem): Filesystem holding the shards, e.g. a local one
+            for the benchmarks. Defaults to GCS.
+    Yields:
+        pa.RecordBatch: Record batches from all shards, in no particular order.
+    """
+    _, _, table_id = full_table_name.split(".")
+    fs = filesystem or get_gcs_filesystem()
+    shards = sorted(fs.glob(f"{bucket_name}/{table_id}-*.parquet"))
+    print(f"streaming {len(shards)} shards of {table_id} with {max_workers} workers")
+
+    batches = queue.Queue(maxsize=2 * max_workers)
+    stop = threading.Event()
+    shard_done = object()
+
+    def put(item) -> None:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    metrics = get_run_metrics()
+
+    def read_shard(path: str) -> None:
+        try:
+            with fs.open(path, "rb") as f:
+                reader = pq.ParquetFile(f).iter_batches(batch_size=batch_size)
+                while not stop.is_set():
+                    with metrics.stage("fetch") as stage:
+                        batch = next(reader, None)
+                        if batch is not None:
+                            stage.rows = batch.num_rows
+                            stage.bytes = batch.nbytes
+                    if batch is None:
+                        return
+                    put(batch)
+        except Exception as e:
+            put(e)
+        finally:
+            put(shard_done)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for shard in shards:
+            executor.submit(read_shard, shard)
+        try:
+            remaining = len(shards)
+            while remaining:
+                item = batches.get()
+                if item is shard_done:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stop.set()
+
+
+def df_to_file_system(
+    full_table_name: str, df: Union[pl.DataFrame, Iterable[pa.RecordBatch]]
+) -> str:
     """
     Landnerds pipeline to load from a df to s3 storage.
 
     Args:
         full_table_name (str): The (full) name of the BigQuery table to load
-        df (pl.DataFrame): The Polars DataFrame to load
+        df (pl.DataFrame | Iterable[pa.RecordBatch]): The Polars DataFrame to load, or a stream
+            of Arrow batches (e.g. from gcs_shard_batches) that is loaded batch by batch.
     Returns:
         statement indicating the table has been saved to the filesystem.
 
     """
     table_name = full_table_name.split(".")[-1]
-    arrow_table = df.to_arrow()
-    resource = dlt.resource(arrow_table, name=table_name)
-
-    # Create a dlt pipeline object
-    pipeline = dlt.pipeline(
+    data = to_arrow(df) if isinstance(df, pl.DataFrame) else df
+    load_to_file_system(
+        data,
+        table_name,
         pipeline_name="sql_database_landnerds",
-        destination="filesystem",
         dataset_name="landnerds",
+        layout=ParquetLayout(),
     )
-
-    # Run the pipeline
-    load_info = pipeline.run(resource, loader_file_format="parquet")
-
-    # Pretty print load information
-    print(f"dlt load data: {load_info}")
-    print(f"dataset of shape: {df.shape} uploaded!")
+    if isinstance(df, pl.DataFrame):
+        print(f"dataset of shape: {df.shape} uploaded!")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest a BigQuery table via GCS")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="stream the exported shards into dlt instead of collecting one DataFrame",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=LANDNERDS_SHARD_WORKERS,
+        help="shards read in parallel in --stream mode (env: LANDNERDS_SHARD_WORKERS)",
+    )
+    parser.add_argument(
+        "--watermark-column",
+        help="only export rows above the last exported value of this column",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="export even if the table has not changed since the last export",
+    )
+    args = parser.parse_args()
+
     full_table_name = "landnerds.1_data_lake.all_prop_point_of_interest"
     bucket_name = "landnerds/3_data_analytics/all_prop_point_of_interest"
 
-    gbq_to_gcs_storage(full_table_name, bucket_name)
-    df = gcs_to_df(full_table_name, bucket_name)
-    df_to_file_system(full_table_name, df)
+    export = gbq_to_gcs_storage(
+        full_table_name,
+        bucket_name,
+        watermark_column=args.watermark_column,
+        force=args.force,
+    )
+    if export is None:
+        print("nothing new to load")
+    else:
+        export_path, export_state = export
+        if args.stream:
+            batches = gcs_shard_batches(
+                full_table_name, export_path, max_workers=args.workers
+            )
+            df_to_file_system(full_table_name, batches)
+        else:
+            df = gcs_to_df(full_table_name, export_path)
+            df_to_file_system(full_table_name, df)
+        save_export_state(bucket_name, full_table_name.split(".")[-1], export_state)
+    get_run_metrics().publish("sql_database_landnerds")
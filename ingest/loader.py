@@ -0,0 +1,417 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import tempfile
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+import dlt
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dlt.common.normalizers.naming.snake_case import NamingConvention
+from dlt.common.pipeline import LoadInfo
+from constants import LAKE_FILE_MAX_BYTES, LAKE_ROW_GROUP_SIZE, LAKE_ZSTD_LEVEL
+from ingest.metrics import get_run_metrics
+
+# Hive partition of the day a table was loaded. dlt fills it from the load package's time,
+# not from the rows, so it can be later than their date_fetched (e.g. for rows resumed from
+# a checkpoint of an earlier run).
+LOAD_DATE_PARTITION = {"load_date": "{YYYY}-{MM}-{DD}"}
+
+
+@dataclass
+class ParquetLayout:
+    """
+    How the parquet files of a table are written to the data lake.
+
+    The files are written here with pyarrow and imported into the dlt load package as they are,
+    as dlt's own parquet writer always uses snappy and one row group per extracted batch.
+
+    Attributes:
+        row_group_size (int): Rows per row group. Query engines skip whole row groups using
+            their min/max statistics, so larger groups compress better and smaller ones prune
+            finer.
+        compression (str): Parquet compression codec.
+        compression_level (int): Codec level, e.g. 1-22 for zstd. None uses the codec default.
+        use_dictionary (bool | list[str]): Dictionary-encode all columns, none, or only these.
+        file_max_bytes (int): Start a new file once the current one reaches this size.
+        partition_by (dict[str, str]): Hive partition folders, key -> dlt layout placeholder
+            template (e.g. LOAD_DATE_PARTITION). The values are per load package, not per
+            row: dlt fills them from the load time, or from `extra_placeholders`.
+        extra_placeholders (dict[str, str]): Constant values for custom placeholders used in
+            `partition_by`.
+    """
+
+    row_group_size: int = LAKE_ROW_GROUP_SIZE
+    compression: str = "zstd"
+    compression_level: Optional[int] = LAKE_ZSTD_LEVEL
+    use_dictionary: Union[bool, list[str]] = True
+    file_max_bytes: int = LAKE_FILE_MAX_BYTES
+    partition_by: dict[str, str] = field(default_factory=dict)
+    extra_placeholders: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def path_layout(self) -> str:
+        """
+        The filesystem destination `layout` for this table, e.g.
+        {table_name}/load_date={YYYY}-{MM}-{DD}/{load_id}.{file_id}.{ext}
+        """
+        partitions = "".join(
+            f"{key}={value}/" for key, value in self.partition_by.items()
+        )
+        return f"{{table_name}}/{partitions}{{load_id}}.{{file_id}}.{{ext}}"
+
+    def destination(self):
+        """
+        A filesystem destination writing with this layout. The bucket url and credentials
+        come from the dlt config as for destination="filesystem".
+        """
+        return dlt.destinations.filesystem(
+            layout=self.path_layout,
+            extra_placeholders=self.extra_placeholders or None,
+        )
+
+
+def _writer(path: str, schema: pa.Schema, layout: ParquetLayout) -> pq.ParquetWriter:
+    return pq.ParquetWriter(
+        path,
+        schema,
+        compression=layout.compression,
+        compression_level=layout.compression_level,
+        use_dictionary=layout.use_dictionary,
+        write_statistics=True,
+    )
+
+
+class ParquetFileWriter:
+    """
+    Write batches of one table to parquet files with the given layout.
+
+    Batches are buffered until a full row group is available, and a file is closed once it
+    reaches `file_max_bytes` or the batch schema changes (e.g. a new column appears).
+
+    Args:
+        directory (str): Directory to write the files to.
+        layout (ParquetLayout): Row group, compression and file size settings.
+        prefix (str): File name prefix, so several writers can share a directory.
+    """
+
+    def __init__(self, directory: str, layout: ParquetLayout, prefix: str = "part"):
+        self.directory = directory
+        self.layout = layout
+        self.prefix = prefix
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._path: Optional[str] = None
+        self._rows = 0
+        self._schema: Optional[pa.Schema] = None
+        self._buffered: list[pa.Table] = []
+        self._buffered_rows = 0
+        self._files = 0
+        self._metrics = get_run_metrics()
+
+    def _flush(self, final: bool) -> None:
+        row_group_size = self.layout.row_group_size
+        table = pa.concat_tables(self._buffered)
+        while table.num_rows >= row_group_size or (final and table.num_rows):
+            group = table.slice(0, row_group_size)
+            with self._metrics.stage("write") as stage:
+                self._writer.write_table(group, row_group_size=row_group_size)
+                stage.rows = group.num_rows
+                stage.bytes = group.nbytes
+            self._rows += group.num_rows
+            table = table.slice(group.num_rows)
+        self._buffered = [table] if table.num_rows else []
+        self._buffered_rows = table.num_rows
+
+    def close(self) -> list[tuple[str, int, pa.Schema]]:
+        """
+        Close the current file.
+
+        Returns:
+            list: [(path, rows, schema)] of the closed file, [] if none was open.
+        """
+        if self._writer is None:
+            return []
+        if self._buffered:
+            self._flush(final=True)
+        self._writer.close()
+        self._writer = None
+        return [(self._path, self._rows, self._schema)]
+
+    def write(
+        self, batch: Union[pa.Table, pa.RecordBatch]
+    ) -> list[tuple[str, int, pa.Schema]]:
+        """
+        Write one batch.
+
+        Returns:
+            list: (path, rows, schema) of the files finished by this batch.
+        """
+        if isinstance(batch, pa.RecordBatch):
+            batch = pa.Table.from_batches([batch])
+        if batch.num_rows == 0:
+            return []
+        finished = []
+        if self._writer is not None and not batch.schema.equals(self._schema):
+            finished += self.close()
+        if self._writer is None:
+            self._schema, self._rows = batch.schema, 0
+            self._path = os.path.join(
+                self.directory, f"{self.prefix}-{self._files}.parquet"
+            )
+            self._files += 1
+            self._writer = _writer(self._path, self._schema, self.layout)
+        self._buffered.append(batch)
+        self._buffered_rows += batch.num_rows
+        if self._buffered_rows >= self.layout.row_group_size:
+            self._flush(final=False)
+            if os.path.getsize(self._path) >= self.layout.file_max_bytes:
+                finished += self.close()
+        return finished
+
+
+def write_parquet_files(
+    data: Iterable[Union[pa.Table, pa.RecordBatch]],
+    directory: str,
+    layout: ParquetLayout,
+) -> Iterator[tuple[str, int, pa.Schema]]:
+    """
+    Write a stream of Arrow batches to parquet files with the given layout (see
+    ParquetFileWriter).
+
+    Args:
+        data (Iterable[pa.Table | pa.RecordBatch]): The batches to write.
+        directory (str): Directory to write the files to.
+        layout (ParquetLayout): Row group, compression and file size settings.
+    Yields:
+        tuple: (path, rows, schema) of each finished file.
+    """
+    writer = ParquetFileWriter(directory, layout)
+    for batch in data:
+        yield from writer.write(batch)
+    yield from writer.close()
+
+
+def _as_loaded(
+    batches: Iterable[Union[pa.Table, pa.RecordBatch]], primary_key: list[str]
+) -> Iterator[pa.Table]:
+    """
+    Give batches the column names and nullability dlt would give them (snake_case names,
+    primary keys not null). dlt imports a parquet file as-is only when nothing has to be
+    normalised, otherwise it rewrites it with its own writer settings.
+    """
+    for batch in batches:
+        yield _as_loaded_batch(batch, primary_key)
+
+
+def _as_loaded_batch(
+    batch: Union[pa.Table, pa.RecordBatch], primary_key: list[str]
+) -> pa.Table:
+    if isinstance(batch, pa.RecordBatch):
+        batch = pa.Table.from_batches([batch])
+    naming = NamingConvention()
+    schema = pa.schema(
+        field.with_name(naming.normalize_path(field.name)).with_nullable(
+            field.nullable and field.name not in primary_key
+        )
+        for field in batch.schema
+    )
+    if not schema.equals(batch.schema):
+        batch = pa.Table.from_arrays(batch.columns, schema=schema)
+    return batch
+
+
+def parquet_files(
+    data: Iterable[Union[pa.Table, pa.RecordBatch]],
+    layout: ParquetLayout,
+    primary_key: Union[str, list[str], None] = None,
+) -> Iterator:
+    """
+    Yield `data` to a dlt resource as parquet files written with `layout`, so dlt imports them
+    into the load package as they are instead of rewriting them.
+
+    Use inside a dlt resource (e.g. `yield from parquet_files(batches, layout)`) that is loaded
+    with `layout.destination()`, passing the primary key of the resource if it has one.
+    """
+    if isinstance(primary_key, str):
+        primary_key = [primary_key]
+    batches = _as_loaded(data, primary_key or [])
+    with tempfile.TemporaryDirectory(prefix="dlt_parquet_") as directory:
+        for path, rows, schema in write_parquet_files(batches, directory, layout):
+            yield dlt.mark.with_file_import(
+                path, "parquet", rows, hints=schema.empty_table()
+            )
+
+
+def file_imports(
+    files: list[tuple[str, int, pa.Schema]],
+    update_state: Optional[Callable[[dict], None]] = None,
+) -> Iterator:
+    """
+    Yield files from write_table_files to a dlt resource, imported into the load package as
+    they are. `update_state` is then called with the resource state, e.g. to record what was
+    loaded; dlt only stores resource state written while the resource is extracted.
+    """
+    for path, rows, schema in files:
+        yield dlt.mark.with_file_import(
+            path, "parquet", rows, hints=schema.empty_table()
+        )
+    if update_state is not None:
+        update_state(dlt.current.resource_state())
+
+
+def write_table_files(
+    data: Iterable[dict[str, Union[pa.Table, pa.RecordBatch]]],
+    directory: str,
+    layout: ParquetLayout,
+    primary_keys: Optional[dict[str, Union[str, list[str]]]] = None,
+) -> dict[str, list[tuple[str, int, pa.Schema]]]:
+    """
+    Write a stream of {table name: batch} dicts, e.g. a parent table and its child tables
+    normalised from the same rows, to parquet files per table.
+
+    Args:
+        data (Iterable[dict]): Batches of every table, one dict per step of the stream.
+        directory (str): Directory to write the files to.
+        layout (ParquetLayout): File layout of every table.
+        primary_keys (dict): table name -> primary key, for tables that have one.
+    Returns:
+        dict: table name -> (path, rows, schema) of its files, in the order of first appearance.
+    """
+    primary_keys = {
+        name: [key] if isinstance(key, str) else key
+        for name, key in (primary_keys or {}).items()
+    }
+    writers: dict[str, ParquetFileWriter] = {}
+    files: dict[str, list[tuple[str, int, pa.Schema]]] = {}
+    for tables in data:
+        for name, batch in tables.items():
+            if name not in writers:
+                writers[name] = ParquetFileWriter(directory, layout, prefix=name)
+                files[name] = []
+            batch = _as_loaded_batch(batch, primary_keys.get(name, []))
+            files[name] += writers[name].write(batch)
+    for name, writer in writers.items():
+        files[name] += writer.close()
+    return files
+
+
+def table_resources(
+    files: dict[str, list[tuple[str, int, pa.Schema]]],
+    state_updates: Optional[dict[str, Callable[[dict], None]]] = None,
+    **hints,
+) -> list:
+    """
+    One dlt resource per table, importing the files from write_table_files as they are.
+    `state_updates` maps a table name to the update_state of its file_imports, and `hints`
+    (e.g. write_disposition) are passed to every dlt.resource.
+    """
+    state_updates = state_updates or {}
+    return [
+        dlt.resource(
+            file_imports(table_files, state_updates.get(name)), name=name, **hints
+        )
+        for name, table_files in files.items()
+    ]
+
+
+def load_tables_to_file_system(
+    data: Union[
+        dict[str, pa.Table], Iterable[dict[str, Union[pa.Table, pa.RecordBatch]]]
+    ],
+    pipeline_name: str,
+    dataset_name: str,
+    layout: Optional[ParquetLayout] = None,
+    primary_keys: Optional[dict[str, Union[str, list[str]]]] = None,
+    write_disposition: str = "append",
+    state_updates: Optional[dict[str, Callable[[dict], None]]] = None,
+) -> LoadInfo:
+    """
+    Load several Arrow tables into the filesystem destination in one load package, e.g. a
+    table and the child tables normalised from it.
+
+    The stream is written to local parquet files first, one writer per table, and the files
+    are then imported by one dlt resource per table, so only one batch per table is held in
+    memory.
+
+    Args:
+        data (dict | Iterable[dict]): {table name: table}, or a stream of {table name: batch}.
+        pipeline_name (str): Name of the dlt pipeline.
+        dataset_name (str): Dataset (top-level folder) of the tables.
+        layout (ParquetLayout): File layout of every table. Defaults to ParquetLayout().
+        primary_keys (dict): table name -> primary key, for tables that have one.
+        write_disposition (str): dlt write disposition of every table.
+        state_updates (dict): table name -> function updating its dlt resource state once its
+            files are extracted (see file_imports).
+    Returns:
+        LoadInfo: The dlt load info of the run.
+    """
+    layout = layout or ParquetLayout()
+    primary_keys = primary_keys or {}
+    if isinstance(data, dict):
+        data = [data]
+
+    pipeline = dlt.pipeline(
+        pipeline_name=pipeline_name,
+        destination=layout.destination(),
+        dataset_name=dataset_name,
+    )
+    with tempfile.TemporaryDirectory(prefix="dlt_parquet_") as directory:
+        files = write_table_files(data, directory, layout, primary_keys=primary_keys)
+        resources = table_resources(
+            files, state_updates, write_disposition=write_disposition
+        )
+        for resource in resources:
+            if resource.name in primary_keys:
+                resource.apply_hints(primary_key=primary_keys[resource.name])
+        load_info = pipeline.run(resources)
+    get_run_metrics().record_dlt_trace(pipeline.last_trace)
+    print(f"dlt load data: {load_info}")
+    return load_info
+
+
+def load_to_file_system(
+    data: Union[pa.Table, Iterable[Union[pa.Table, pa.RecordBatch]]],
+    table_name: str,
+    pipeline_name: str,
+    dataset_name: str,
+    layout: Optional[ParquetLayout] = None,
+    write_disposition: str = "append",
+    primary_key: Union[str, list[str], None] = None,
+) -> LoadInfo:
+    """
+    Load Arrow data into one table of the filesystem destination.
+
+    Args:
+        data (pa.Table | Iterable[pa.Table | pa.RecordBatch]): A table, or a stream of batches
+            that is written file by file.
+        table_name (str): Name of the destination table.
+        pipeline_name (str): Name of the dlt pipeline.
+        dataset_name (str): Dataset (top-level folder) of the table.
+        layout (ParquetLayout): File layout. Defaults to ParquetLayout().
+        write_disposition (str): dlt write disposition of the table.
+        primary_key (str | list[str]): Primary key of the table, e.g. for merge.
+    Returns:
+        LoadInfo: The dlt load info of the run.
+    """
+    layout = layout or ParquetLayout()
+    if isinstance(data, pa.Table):
+        data = [data]
+
+    resource = dlt.resource(
+        parquet_files(data, layout, primary_key=primary_key),
+        name=table_name,
+        write_disposition=write_disposition,
+        primary_key=primary_key,
+    )
+    pipeline = dlt.pipeline(
+        pipeline_name=pipeline_name,
+        destination=layout.destination(),
+        dataset_name=dataset_name,
+    )
+    load_info = pipeline.run(resource)
+    get_run_metrics().record_dlt_trace(pipeline.last_trace)
+    print(f"dlt load data: {load_info}")
+    return load_info
@@ -0,0 +1,342 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import resource
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+import dlt
+import requests
+from constants import INGEST_METRICS_DIR
+
+
+def peak_rss_bytes() -> int:
+    """
+    Peak resident set size of this process so far.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class StageMetrics:
+    """
+    Totals for one stage of an ingest run.
+
+    Attributes:
+        calls (int): Number of times the stage ran (e.g. one per HTTP call or batch).
+        seconds (float): Time spent in the stage, summed over calls (and threads).
+        wall_seconds (float): Time from the first call starting to the last call ending.
+        rows (int): Rows produced by the stage.
+        bytes (int): Bytes read or written by the stage.
+        peak_rss_bytes (int): Peak RSS of the process when the stage last finished.
+    """
+
+    calls: int = 0
+    seconds: float = 0.0
+    wall_seconds: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    peak_rss_bytes: int = 0
+    _first_start: Optional[float] = None
+    _last_end: Optional[float] = None
+
+
+class StageTimer:
+    """
+    Handle yielded by RunMetrics.stage; set `rows` / `bytes` on it inside the block.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+
+
+class RunMetrics:
+    """
+    Per-stage timings, row/byte counts, HTTP calls and peak memory of one ingest run.
+
+    Stages are recorded with `stage()` from any thread and accumulate by name, so a stage run
+    per item or per batch (e.g. "fetch") reports its call count, summed time and wall span.
+    `publish()` writes them as a run_metrics table to the filesystem destination and as
+    JSON / Prometheus text files in INGEST_METRICS_DIR.
+    """
+
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex
+        self.started_at = datetime.now(timezone.utc)
+        self.stages: dict[str, StageMetrics] = {}
+        self.hosts: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        name: str,
+        seconds: float = 0.0,
+        rows: int = 0,
+        size: int = 0,
+        calls: int = 1,
+        start: Optional[float] = None,
+    ) -> None:
+        """
+        Add one observation to stage `name`. `start` is the perf_counter value at which the
+        observation started; it defaults to `seconds` before now.
+        """
+        end = time.perf_counter()
+        start = end - seconds if start is None else start
+        with self._lock:
+            stage = self.stages.setdefault(name, StageMetrics())
+            stage.calls += calls
+            stage.seconds += seconds
+            stage.rows += rows
+            stage.bytes += size
+            stage.peak_rss_bytes = peak_rss_bytes()
+            if stage._first_start is None or start < stage._first_start:
+                stage._first_start = start
+            if stage._last_end is None or end > stage._last_end:
+                stage._last_end = end
+            stage.wall_seconds = stage._last_end - stage._first_start
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageTimer]:
+        """
+        Time the enclosed block as one call of stage `name`.
+        """
+        timer = StageTimer()
+        start = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            self.add(
+                name,
+                time.perf_counter() - start,
+                rows=timer.rows,
+                size=timer.bytes,
+                start=start,
+            )
+
+    def record_http(self, response: requests.Response, *args, **kwargs) -> None:
+        """
+        requests response hook counting HTTP calls, their latency and body sizes.
+        """
+        self.add(
+            "http",
+            response.elapsed.total_seconds(),
+            size=int(response.headers.get("Content-Length") or 0),
+        )
+
+    def record_host(self, host: dict) -> None:
+        """
+        Keep the latest request metrics of a host (RequestController): requests, retries,
+        throttled responses, concurrency and requests_per_second.
+        """
+        with self._lock:
+            self.hosts[host["host"]] = dict(host)
+
+    def record_dlt_trace(self, trace) -> None:
+        """
+        Record the extract, normalize and load steps of a dlt pipeline run from its trace.
+        """
+        if trace is None:
+            return
+        for step in trace.steps:
+            if step.step not in ("extract", "normalize", "load"):
+                continue
+            rows = size = 0
+            if step.step == "normalize" and step.step_info is not None:
+                rows = sum(
+                    count
+                    for table, count in step.step_info.row_counts.items()
+                    if not table.startswith("_dlt")
+                )
+            if step.step == "load" and step.step_info is not None:
+                size = sum(
+                    job.file_size
+                    for package in step.step_info.load_packages
+                    for job in package.jobs["completed_jobs"]
+                    if not job.job_file_info.table_name.startswith("_dlt")
+                )
+            seconds = (step.finished_at - step.started_at).total_seconds()
+            self.add(f"dlt_{step.step}", seconds, rows=rows, size=size)
+
+    def rows(self, pipeline_name: str) -> list[dict]:
+        """
+        One row per stage, as written to the run_metrics table.
+        """
+        with self._lock:
+            return [
+                {
+                    "run_id": self.run_id,
+                    "pipeline_name": pipeline_name,
+                    "started_at": self.started_at.isoformat(),
+                    "stage": name,
+                    "calls": stage.calls,
+                    "seconds": round(stage.seconds, 6),
+                    "wall_seconds": round(stage.wall_seconds, 6),
+                    "rows": stage.rows,
+                    "bytes": stage.bytes,
+                    "peak_rss_bytes": stage.peak_rss_bytes,
+                }
+                for name, stage in self.stages.items()
+            ]
+
+    def to_json(self, pipeline_name: str) -> str:
+        return json.dumps(
+            {
+                "run_id": self.run_id,
+                "pipeline_name": pipeline_name,
+                "started_at": self.started_at.isoformat(),
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "peak_rss_bytes": peak_rss_bytes(),
+                "stages": self.rows(pipeline_name),
+                "hosts": list(self.hosts.values()),
+            },
+            indent=2,
+        )
+
+    def to_prometheus(self, pipeline_name: str) -> str:
+        """
+        The run in the Prometheus text exposition format, e.g. for the node_exporter textfile
+        collector.
+        """
+        metrics = {
+            "calls": ("ingest_stage_calls", "Number of calls of each ingest stage"),
+            "seconds": (
+                "ingest_stage_seconds",
+                "Time spent in each ingest stage, summed over calls",
+            ),
+            "wall_seconds": (
+                "ingest_stage_wall_seconds",
+                "Time from the first to the last call of each ingest stage",
+            ),
+            "rows": ("ingest_stage_rows", "Rows produced by each ingest stage"),
+            "bytes": (
+                "ingest_stage_bytes",
+                "Bytes read or written by each ingest stage",
+            ),
+        }
+        rows = self.rows(pipeline_name)
+        lines = []
+        for field_name, (metric, help_text) in metrics.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for row in rows:
+                lines.append(
+                    f'{metric}{{pipeline="{pipeline_name}",stage="{row["stage"]}"}} '
+                    f"{row[field_name]}"
+                )
+        host_metrics = {
+            "requests": (
+                "ingest_http_host_requests",
+                "HTTP requests sent to each host",
+            ),
+            "retries": ("ingest_http_host_retries", "Retried HTTP requests per host"),
+            "throttled": (
+                "ingest_http_host_throttled",
+                "429/503 responses received from each host",
+            ),
+            "concurrency": (
+                "ingest_http_host_concurrency",
+                "Current adaptive concurrency limit of each host",
+            ),
+            "requests_per_second": (
+                "ingest_http_host_requests_per_second",
+                "HTTP request throughput of each host",
+            ),
+        }
+        with self._lock:
+            hosts = list(self.hosts.values())
+        for field_name, (metric, help_text) in host_metrics.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for host in hosts:
+                lines.append(
+                    f'{metric}{{pipeline="{pipeline_name}",host="{host["host"]}"}} '
+                    f"{host[field_name]}"
+                )
+        lines += [
+            "# HELP ingest_peak_rss_bytes Peak resident set size of the ingest process",
+            "# TYPE ingest_peak_rss_bytes gauge",
+            f'ingest_peak_rss_bytes{{pipeline="{pipeline_name}"}} {peak_rss_bytes()}',
+            "# HELP ingest_run_started_timestamp_seconds Start time of the ingest run",
+            "# TYPE ingest_run_started_timestamp_seconds gauge",
+            f'ingest_run_started_timestamp_seconds{{pipeline="{pipeline_name}"}} '
+            f"{self.started_at.timestamp()}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def summary(self, pipeline_name: str) -> str:
+        lines = [
+            f"{pipeline_name} run metrics:",
+            f"  {'stage':<18}{'calls':>8}{'seconds':>10}{'wall s':>9}{'rows':>10}{'bytes':>13}",
+        ]
+        for row in self.rows(pipeline_name):
+            lines.append(
+                f"  {row['stage']:<18}{row['calls']:>8,}{row['seconds']:>10.2f}"
+                f"{row['wall_seconds']:>9.2f}{row['rows']:>10,}{row['bytes']:>13,}"
+            )
+        with self._lock:
+            hosts = list(self.hosts.values())
+        for host in hosts:
+            lines.append(
+                f"  {host['host']}: {host['requests']:,} requests, {host['retries']:,} "
+                f"retried, {host['throttled']:,} throttled, concurrency "
+                f"{host['concurrency']}, {host['requests_per_second']:.1f} requests/sec"
+            )
+        lines.append(f"  peak RSS {peak_rss_bytes() / 1024**2:.0f} MB")
+        return "\n".join(lines)
+
+    def publish(self, pipeline_name: str) -> None:
+        """
+        Print the per-stage summary, write the JSON and Prometheus exports to INGEST_METRICS_DIR
+        and append the stages to the run_metrics table of the `observability` dataset.
+
+        Args:
+            pipeline_name (str): Name of the dlt pipeline the run loaded with.
+        """
+        print(self.summary(pipeline_name))
+
+        os.makedirs(INGEST_METRICS_DIR, exist_ok=True)
+        base = os.path.join(INGEST_METRICS_DIR, pipeline_name)
+        with open(f"{base}.json", "w") as f:
+            f.write(self.to_json(pipeline_name))
+        with open(f"{base}.prom.tmp", "w") as f:
+            f.write(self.to_prometheus(pipeline_name))
+        os.replace(f"{base}.prom.tmp", f"{base}.prom")
+
+        # a pipeline of its own, so the metrics load does not replace the trace of the run
+        pipeline = dlt.pipeline(
+            pipeline_name=f"{pipeline_name}_run_metrics",
+            destination="filesystem",
+            dataset_name="observability",
+        )
+        pipeline.run(
+            self.rows(pipeline_name),
+            table_name="run_metrics",
+            write_disposition="append",
+            loader_file_format="parquet",
+        )
+
+
+_run_metrics: Optional[RunMetrics] = None
+_run_metrics_lock = threading.Lock()
+
+
+def get_run_metrics() -> RunMetrics:
+    """
+    Return the RunMetrics of this process's ingest run.
+    """
+    global _run_metrics
+    with _run_metrics_lock:
+        if _run_metrics is None:
+            _run_metrics = RunMetrics()
+        return _run_metrics
@@ -1,12 +1,112 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import tempfile
 import dlt
 from dlt.sources.rest_api import (
     rest_api_source,
     check_connection,
 )
-from dlt.common.pendulum import pendulum
-import requests
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Iterator, Optional, Union
 import polars as pl
+import pyarrow as pa
+from constants import (
+    POKEAPI_BASE_URL,
+    POKEMON_FETCH_WORKERS,
+    POKEAPI_REQUESTS_PER_SECOND,
+    POKEMON_DETAILS_TTL_DAYS,
+    POKEAPI_DETAIL_RESOURCES,
+    INGEST_BATCH_SIZE,
+)
+from ingest.change_detection import ChangeDetector
+from ingest.checkpoint import Checkpoint, checkpointed_batches
+from ingest.concurrent_fetch import fetch_concurrently, iter_concurrently
+from ingest.http_cache import get_response_cache
+from ingest.loader import (
+    LOAD_DATE_PARTITION,
+    ParquetLayout,
+    file_imports,
+    load_tables_to_file_system,
+    table_resources,
+    write_table_files,
+)
+from ingest.metrics import get_run_metrics
+from ingest.streaming import arrow_batches, to_arrow
+from visualise.serving import SERVING_SNAPSHOTS
+
+# Shared by the full and the incremental pokemon_details loads
+POKEMON_DETAILS_LAYOUT = ParquetLayout(partition_by=LOAD_DATE_PARTITION)
+
+# List endpoints loaded by load_pokemon
+POKEAPI_RESOURCES = ["berry", "location", "item", "move", "version"]
+
+# Checkpoint of the full pokemon_details extraction (ingest.checkpoint)
+POKEMON_DETAILS_CHECKPOINT = "pokemon_details"
+
+# Sprite URLs kept on pokemon_details: column -> path in the sprites struct
+POKEMON_SPRITES = {
+    "sprite_default": ("front_default",),
+    "sprite_artwork": ("other", "dream_world", "front_default"),
+    "sprite_animated": (
+        "versions",
+        "generation-v",
+        "black-white",
+        "animated",
+        "front_default",
+    ),
+}
+
+# Child tables of pokemon_details, one row per list element, keyed by pokemon_id:
+# table -> (list column, {column: (path in the element, type)})
+POKEMON_CHILD_TABLES = {
+    "pokemon_stats": (
+        "stats",
+        {
+            "stat": (("stat", "name"), pl.String),
+            "base_stat": (("base_stat",), pl.Int64),
+            "effort": (("effort",), pl.Int64),
+        },
+    ),
+    "pokemon_types": (
+        "types",
+        {"slot": (("slot",), pl.Int64), "type": (("type", "name"), pl.String)},
+    ),
+    "pokemon_abilities": (
+        "abilities",
+        {
+            "slot": (("slot",), pl.Int64),
+            "ability": (("ability", "name"), pl.String),
+            "is_hidden": (("is_hidden",), pl.Boolean),
+        },
+    ),
+    "pokemon_moves": ("moves", {"move": ((), pl.String)}),
+    "pokemon_forms": ("forms", {"form": (("name",), pl.String)}),
+    "pokemon_game_indices": (
+        "game_indices",
+        {
+            "game_index": (("game_index",), pl.Int64),
+            "version": (("version", "name"), pl.String),
+        },
+    ),
+}
+
+# Child tables that rarely change, loaded only for the Pokémon whose rows changed
+POKEMON_CHANGE_DETECTED_TABLES = ["pokemon_moves", "pokemon_game_indices"]
+
+
+def pokemon_change_detectors() -> dict[str, ChangeDetector]:
+    """
+    A ChangeDetector per table in POKEMON_CHANGE_DETECTED_TABLES, hashing all the rows of a
+    Pokémon together.
+    """
+    return {
+        table: ChangeDetector(f"pokemon_api/{table}", key="pokemon_id", unique=False)
+        for table in POKEMON_CHANGE_DETECTED_TABLES
+    }
 
 
 def fetch_pokemon():
@@ -15,23 +115,31 @@ def fetch_pokemon():
     Returns:
         list: A list of dictionaries containing Pokémon names and URLs.
     """
-    url = "https://pokeapi.co/api/v2/pokemon?limit=100000&offset=0"
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json()["results"]
+    url = f"{POKEAPI_BASE_URL}pokemon?limit=100000&offset=0"
+    metrics = get_run_metrics()
+    with metrics.stage("fetch"):
+        response = get_response_cache().get(url)
+    with metrics.stage("parse") as stage:
+        results = response.json()["results"]
+        stage.rows = len(results)
+    return results
 
 
-def fetch_pokemon_details(url):
+def fetch_pokemon_details(url, session=None):
     """
     Fetch detailed information about a Pokémon from the given URL.
     Args:
         url (str): The URL to fetch Pokémon details from.
+        session (requests.Session): Session to use. Defaults to the shared ingest session.
     Returns:
         dict: A dictionary containing detailed information about the Pokémon.
     """
-    response = requests.get(url)
-    response.raise_for_status()
-    data = response.json()
+    metrics = get_run_metrics()
+    with metrics.stage("fetch"):
+        response = get_response_cache().get(url, session)
+    with metrics.stage("parse") as stage:
+        data = response.json()
+        stage.rows = 1
     moves = [
         move["move"]["name"] for move in data["moves"]
     ]  # Extract move names only and add to rows as list
@@ -56,54 +164,390 @@ def fetch_pokemon_details(url):
     }
 
 
-def pokemon_details_df() -> pl.DataFrame:
+def _path(
+    column: str, dtype: pl.DataType, path: tuple[str, ...], cast: pl.DataType
+) -> pl.Expr:
+    """
+    Expression following `path` into the struct column `column` of type `dtype`. A level that
+    was never seen in the data (e.g. no Pokémon of a batch has an animated sprite) is null.
+    """
+    expr = pl.col(column)
+    for name in path:
+        fields = {f.name: f.dtype for f in getattr(dtype, "fields", [])}
+        if name not in fields:
+            return pl.lit(None, cast)
+        expr, dtype = expr.struct.field(name), fields[name]
+    return expr.cast(cast)
+
+
+def normalise_pokemon_details(df: pl.DataFrame) -> dict[str, pl.DataFrame]:
+    """
+    Split the nested Pokémon details into a flat pokemon_details table and one child table per
+    list field (POKEMON_CHILD_TABLES), using vectorised Polars explode / struct operations.
+
+    Sprites are reduced to the URLs in POKEMON_SPRITES, species and cries to their name and
+    URLs. Child rows carry the pokemon_id and date_fetched of their Pokémon, so the rows of a
+    merged fetch can be matched with its pokemon_details row.
+
+    Args:
+        df (pl.DataFrame): Rows as returned by fetch_pokemon_details.
+    Returns:
+        dict: table name -> DataFrame, pokemon_details first.
+    """
+    with get_run_metrics().stage("normalise") as stage:
+        schema = df.schema
+        details = df.select(
+            "id",
+            "order",
+            "name",
+            "height",
+            "weight",
+            "base_experience",
+            _path("species", schema.get("species"), ("name",), pl.String).alias(
+                "species"
+            ),
+            "location_area_encounters",
+            _path("cries", schema.get("cries"), ("latest",), pl.String).alias(
+                "cry_latest"
+            ),
+            _path("cries", schema.get("cries"), ("legacy",), pl.String).alias(
+                "cry_legacy"
+            ),
+            *(
+                _path("sprites", schema.get("sprites"), path, pl.String).alias(name)
+                for name, path in POKEMON_SPRITES.items()
+            ),
+            "date_fetched",
+        )
+        tables = {"pokemon_details": details}
+
+        for table_name, (column, fields) in POKEMON_CHILD_TABLES.items():
+            exploded = (
+                df.select(pl.col("id").alias("pokemon_id"), column, "date_fetched")
+                .explode(column)
+                .drop_nulls(column)
+            )
+            dtype = exploded.schema[column]
+            tables[table_name] = exploded.select(
+                "pokemon_id",
+                *(
+                    _path(column, dtype, path, cast).alias(name)
+                    for name, (path, cast) in fields.items()
+                ),
+                "date_fetched",
+            )
+        stage.rows = sum(table.height for table in tables.values())
+    return tables
+
+
+def pokemon_details_df(
+    max_workers: int = POKEMON_FETCH_WORKERS, batch_size: int = INGEST_BATCH_SIZE
+) -> pl.DataFrame:
     """
     Fetches a list of all pokémon names and passes through fetch_pokemon_details to get detailed information for all pokémon.
+    Detail pages are fetched concurrently, rate limited per host, and returned in listing order.
+    They are checkpointed every `batch_size` Pokémon (pokemon_details_batches), so a failed
+    run resumes from the last checkpoint.
+    Args:
+        max_workers (int): Number of detail requests in flight at once.
+        batch_size (int): Number of Pokémon per checkpointed batch.
     Returns:
         pl.DataFrame: A Polars DataFrame containing detailed information about all Pokémon.
     """
-    pokemon_list = fetch_pokemon()
-    all_pokemon = []
-    for pokemon in pokemon_list:
-        details = fetch_pokemon_details(pokemon["url"])
-        all_pokemon.append(details)
-    df = pl.DataFrame(all_pokemon)
-    print(f"completed {len(pokemon_list)} records")
-    print(all_pokemon[:10])
+    batches = [
+        pl.from_arrow(batch)
+        for batch in pokemon_details_batches(
+            batch_size=batch_size, max_workers=max_workers
+        )
+    ]
+    with get_run_metrics().stage("concat") as stage:
+        df = pl.concat(batches, how="diagonal_relaxed")
+        stage.rows = df.height
+    print(f"completed {df.height} records")
+    print(df.head(10))
     return df
 
 
-def df_to_file_system(df: pl.DataFrame) -> str:
+def pokemon_details_batches(
+    batch_size: int = INGEST_BATCH_SIZE, max_workers: int = POKEMON_FETCH_WORKERS
+) -> Iterator[pa.Table]:
+    """
+    Streaming version of pokemon_details_df: yields the details as fixed-size Arrow tables,
+    so peak memory is bounded by `batch_size` rather than the number of Pokémon.
+
+    Each batch is spilled to the pokemon_details Checkpoint before it is yielded. When the
+    previous run failed, its batches are read back from the checkpoint and only the remaining
+    Pokémon are fetched, batched with the schema of the checkpointed ones so no column is
+    lost or narrowed. df_to_file_system clears the checkpoint once loaded.
+    Args:
+        batch_size (int): Number of Pokémon per Arrow table.
+        max_workers (int): Number of detail requests in flight at once.
+    Yields:
+        pa.Table: Arrow tables of Pokémon details, in listing order.
+    """
+    urls = [pokemon["url"] for pokemon in fetch_pokemon()]
+
+    def fetch(remaining: list[str]) -> Iterator[pa.Table]:
+        details = iter_concurrently(
+            remaining,
+            fetch_pokemon_details,
+            max_workers=max_workers,
+            requests_per_second=POKEAPI_REQUESTS_PER_SECOND,
+        )
+        return arrow_batches(details, batch_size, schema=checkpoint.schema())
+
+    checkpoint = Checkpoint(POKEMON_DETAILS_CHECKPOINT, urls)
+    yield from checkpointed_batches(checkpoint, urls, fetch)
+
+
+def pokemon_id_from_url(url: str) -> int:
     """
-    Pipeline to load from a df to s3 storage.
+    Extract the Pokémon id from a detail URL such as https://pokeapi.co/api/v2/pokemon/25/.
+    """
+    return int(url.rstrip("/").rsplit("/", 1)[-1])
+
+
+def pokemon_details_tables(
+    df: Union[pl.DataFrame, Iterable[pa.Table]],
+    detectors: Optional[dict[str, ChangeDetector]] = None,
+) -> Iterator[dict[str, pa.Table]]:
+    """
+    Normalise Pokémon details into pokemon_details and its child tables, batch by batch.
 
     Args:
-        full_table_name (str): The (full) name of the BigQuery table to load
-        df (pl.DataFrame): The Polars DataFrame to load
+        df (pl.DataFrame | Iterable[pa.Table]): The details as one DataFrame, or a stream of
+            Arrow tables (e.g. from pokemon_details_batches).
+        detectors (dict): table name -> ChangeDetector keeping only its new or changed rows.
+    Yields:
+        dict: table name -> Arrow table, for each batch.
+    """
+    detectors = detectors or {}
+    batches = [df] if isinstance(df, pl.DataFrame) else df
+    for batch in batches:
+        if isinstance(batch, pa.Table):
+            batch = pl.from_arrow(batch)
+        tables = normalise_pokemon_details(batch)
+        for name, detector in detectors.items():
+            tables[name] = detector.changes(tables[name])
+        yield {name: to_arrow(table) for name, table in tables.items()}
+
+
+@dlt.source(name="rest_api_pokemon")
+def pokemon_details_incremental(
+    directory: str,
+    ttl_days: float = POKEMON_DETAILS_TTL_DAYS,
+    max_workers: int = POKEMON_FETCH_WORKERS,
+    detectors: Optional[dict[str, ChangeDetector]] = None,
+):
+    """
+    Details only for Pokémon that have not been landed yet, or whose last fetch is older than
+    `ttl_days`, as pokemon_details and its child tables. The id -> date_fetched map of landed
+    Pokémon is kept in dlt resource state, which dlt also stores in the destination so it
+    survives a fresh working directory.
+    Args:
+        directory (str): Directory for the parquet files, kept until the pipeline has run.
+        ttl_days (float): Refetch Pokémon whose details are older than this many days.
+        max_workers (int): Number of detail requests in flight at once.
+        detectors (dict): table name -> ChangeDetector keeping only its new or changed rows.
     Returns:
-        statement indicating the table has been saved to the filesystem.
+        list: One resource per table, importing the parquet files written with
+        POKEMON_DETAILS_LAYOUT.
+    """
+    landed = dlt.current.resource_state("pokemon_details").get("date_fetched", {})
+    cutoff = (datetime.now() - timedelta(days=ttl_days)).strftime("%Y-%m-%d %H:%M:%S")
 
+    pokemon_list = fetch_pokemon()
+    urls = [
+        pokemon["url"]
+        for pokemon in pokemon_list
+        if landed.get(str(pokemon_id_from_url(pokemon["url"])), "") < cutoff
+    ]
+    print(
+        f"{len(urls)} of {len(pokemon_list)} pokémon are new or older than {ttl_days} days"
+    )
+    if not urls:
+        return []
+
+    details = fetch_concurrently(
+        urls,
+        fetch_pokemon_details,
+        max_workers=max_workers,
+        requests_per_second=POKEAPI_REQUESTS_PER_SECOND,
+    )
+    files = write_table_files(
+        pokemon_details_tables(pl.DataFrame(details), detectors),
+        directory,
+        POKEMON_DETAILS_LAYOUT,
+        primary_keys={"pokemon_details": "id"},
+    )
+
+    details_files = files.pop("pokemon_details")
+    landed = {str(row["id"]): row["date_fetched"] for row in details}
+    return [
+        dlt.resource(
+            file_imports(details_files, record_landed(landed)),
+            name="pokemon_details",
+            write_disposition="merge",
+            primary_key="id",
+        ),
+        *table_resources(files, write_disposition="merge"),
+    ]
+
+
+def record_landed(landed: dict[str, str]) -> Callable[[dict], None]:
     """
-    table_name = "pokemon_details"
-    arrow_table = df.to_arrow()
-    resource = dlt.resource(arrow_table, name=table_name)
+    State update of the pokemon_details resource recording the date_fetched of the landed
+    Pokémon (id -> date_fetched), which pokemon_details_incremental reads. Both the full and
+    the incremental load write it, so either can follow the other.
+    """
+
+    def update_state(state: dict) -> None:
+        state.setdefault("date_fetched", {}).update(landed)
+
+    return update_state
+
 
-    # Create a dlt pipeline object
+def incremental_to_file_system(
+    ttl_days: float = POKEMON_DETAILS_TTL_DAYS,
+    max_workers: int = POKEMON_FETCH_WORKERS,
+) -> None:
+    """
+    Pipeline to merge only new or stale Pokémon details into s3 storage.
+    The filesystem destination writes merged rows as new parquet files, so downstream models
+    should keep the latest `date_fetched` per id (per pokemon_id for the child tables).
+
+    Args:
+        ttl_days (float): Refetch Pokémon whose details are older than this many days.
+        max_workers (int): Number of detail requests in flight at once.
+    """
     pipeline = dlt.pipeline(
         pipeline_name="rest_api_pokemon",
-        destination="filesystem",
+        destination=POKEMON_DETAILS_LAYOUT.destination(),
         dataset_name="pokemon_api",
     )
 
-    # Run the pipeline
-    load_info = pipeline.run(resource, loader_file_format="parquet")
+    # restore the landed map from the destination before the source reads it
+    pipeline.sync_destination()
+    detectors = pokemon_change_detectors()
+    with tempfile.TemporaryDirectory(prefix="dlt_parquet_") as directory:
+        load_info = pipeline.run(
+            pokemon_details_incremental(
+                directory,
+                ttl_days=ttl_days,
+                max_workers=max_workers,
+                detectors=detectors,
+            )
+        )
+    for detector in detectors.values():
+        detector.commit()
 
-    # Pretty print load information
+    get_run_metrics().record_dlt_trace(pipeline.last_trace)
     print(f"dlt load data: {load_info}")
-    print(f"dataset of shape: {df.shape} uploaded!")
 
 
-def load_pokemon() -> None:
+def df_to_file_system(df: Union[pl.DataFrame, Iterable[pa.Table]]) -> str:
+    """
+    Pipeline to load from a df to s3 storage, normalised into pokemon_details and its child
+    tables (POKEMON_CHILD_TABLES). The POKEMON_CHANGE_DETECTED_TABLES only get the rows of
+    Pokémon whose moves or game indices changed since the last load. The landed Pokémon are
+    recorded in the state pokemon_details_incremental reads (record_landed).
+
+    Args:
+        df (pl.DataFrame | Iterable[pa.Table]): The Polars DataFrame to load, or a stream of
+            Arrow tables (e.g. from pokemon_details_batches) that is loaded batch by batch.
+    Returns:
+        statement indicating the table has been saved to the filesystem.
+
+    """
+    detectors = pokemon_change_detectors()
+    landed: dict[str, str] = {}
+
+    def tables() -> Iterator[dict[str, pa.Table]]:
+        for batch in pokemon_details_tables(df, detectors):
+            details = batch["pokemon_details"]
+            landed.update(
+                zip(
+                    map(str, details["id"].to_pylist()),
+                    details["date_fetched"].to_pylist(),
+                )
+            )
+            yield batch
+
+    load_tables_to_file_system(
+        tables(),
+        pipeline_name="rest_api_pokemon",
+        dataset_name="pokemon_api",
+        layout=POKEMON_DETAILS_LAYOUT,
+        primary_keys={"pokemon_details": "id"},
+        write_disposition="merge",
+        state_updates={"pokemon_details": record_landed(landed)},
+    )
+    for detector in detectors.values():
+        detector.commit()
+    # the fetched details are in the lake, so the next run starts a new extraction
+    Checkpoint.discard(POKEMON_DETAILS_CHECKPOINT)
+    if isinstance(df, pl.DataFrame):
+        print(f"dataset of shape: {df.shape} uploaded!")
+
+
+def fetch_resource_details(url: str, session=None) -> dict:
+    """
+    Fetch the detail page of one item of a PokeAPI list resource, e.g. a move.
+    Args:
+        url (str): The detail URL from the list page.
+        session (requests.Session): Session to use. Defaults to the shared ingest session.
+    Returns:
+        dict: The detail page as returned by the API.
+    """
+    metrics = get_run_metrics()
+    with metrics.stage("fetch"):
+        response = get_response_cache().get(url, session)
+    with metrics.stage("parse") as stage:
+        data = response.json()
+        stage.rows = 1
+    return data
+
+
+def resource_details(resource: str, max_workers: int = POKEMON_FETCH_WORKERS):
+    """
+    A dlt transformer loading the detail page of every item of the list resource `resource`
+    into <resource>_details. Each list page is fanned out to its items' detail URLs with at
+    most `max_workers` requests in flight, sharing the PokeAPI rate limit.
+    Args:
+        resource (str): Name of the list resource, e.g. "move".
+        max_workers (int): Number of detail requests in flight at once.
+    Returns:
+        The transformer, to be piped from the list resource.
+    """
+
+    @dlt.transformer(
+        name=f"{resource}_details", write_disposition="replace", max_table_nesting=1
+    )
+    def details(items: list[dict]) -> Iterator[list[dict]]:
+        yield fetch_concurrently(
+            [item["url"] for item in items],
+            fetch_resource_details,
+            max_workers=max_workers,
+            requests_per_second=POKEAPI_REQUESTS_PER_SECOND,
+        )
+
+    return details
+
+
+def load_pokemon(
+    detail_resources: list[str] = POKEAPI_DETAIL_RESOURCES,
+    max_workers: int = POKEMON_FETCH_WORKERS,
+) -> None:
+    """
+    Load the POKEAPI_RESOURCES list endpoints, and the detail pages of `detail_resources`.
+
+    The list resources are extracted in parallel on dlt's extract worker pool (EXTRACT__WORKERS,
+    5 by default). Detail pages are fetched by resource_details transformers piped from their
+    list resource, so each list is only requested once.
+    Args:
+        detail_resources (list[str]): List resources whose items' detail pages are loaded.
+        max_workers (int): Number of detail requests in flight at once.
+    """
     pipeline = dlt.pipeline(
         pipeline_name="rest_api_pokemon",
         destination="filesystem",
@@ -113,7 +557,7 @@ def load_pokemon() -> None:
     pokemon_source = rest_api_source(
         {
             "client": {
-                "base_url": "https://pokeapi.co/api/v2/",
+                "base_url": POKEAPI_BASE_URL,
                 # If you leave out the paginator, it will be inferred from the API:
                 # "paginator": "json_link",
             },
@@ -124,10 +568,16 @@ def load_pokemon() -> None:
                     },
                 },
                 "write_disposition": "replace",
+                "parallelized": True,
             },
-            "resources": ["berry", "location", "item", "move", "version"],
+            "resources": POKEAPI_RESOURCES,
         }
     )
+    for resource in detail_resources:
+        pokemon_source.resources.add(
+            pokemon_source.resources[resource]
+            | resource_details(resource, max_workers=max_workers)
+        )
 
     def check_network_and_authentication() -> None:
         (can_connect, error_msg) = check_connection(
@@ -140,9 +590,74 @@ def load_pokemon() -> None:
     check_network_and_authentication()
 
     load_info = pipeline.run(pokemon_source, loader_file_format="parquet")
+    get_run_metrics().record_dlt_trace(pipeline.last_trace)
     print(load_info)
 
 
 if __name__ == "__main__":
-    df_to_file_system(pokemon_details_df())
-    load_pokemon()
+    parser = argparse.ArgumentParser(description="Ingest Pokémon data from the PokeAPI")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=POKEMON_FETCH_WORKERS,
+        help="concurrent detail requests (env: POKEMON_FETCH_WORKERS)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only fetch pokémon that are new or older than --ttl-days",
+    )
+    parser.add_argument(
+        "--ttl-days",
+        type=float,
+        default=POKEMON_DETAILS_TTL_DAYS,
+        help="refetch landed pokémon older than this (env: POKEMON_DETAILS_TTL_DAYS)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="load details in fixed-size Arrow batches instead of one DataFrame",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=INGEST_BATCH_SIZE,
+        help="rows per Arrow batch and checkpoint (env: INGEST_BATCH_SIZE)",
+    )
+    parser.add_argument(
+        "--details",
+        nargs="*",
+        choices=POKEAPI_RESOURCES,
+        default=POKEAPI_DETAIL_RESOURCES,
+        help="REST resources whose detail pages are also loaded "
+        "(env: POKEAPI_DETAIL_RESOURCES)",
+    )
+    parser.add_argument(
+        "--only",
+        choices=["details", "rest"],
+        help="load only the pokemon_details table or only the REST API resources",
+    )
+    args = parser.parse_args()
+
+    if args.only == "rest":
+        print("skipping pokemon_details")
+    elif args.incremental:
+        incremental_to_file_system(ttl_days=args.ttl_days, max_workers=args.workers)
+    elif args.stream:
+        df_to_file_system(
+            pokemon_details_batches(
+                batch_size=args.batch_size, max_workers=args.workers
+            )
+        )
+    else:
+        df_to_file_system(
+            pokemon_details_df(max_workers=args.workers, batch_size=args.batch_size)
+        )
+    if args.only != "rest":
+        with get_run_metrics().stage("snapshot"):
+            snapshot_url = SERVING_SNAPSHOTS["pokemon_details"].publish()
+            print(f"serving snapshot: {snapshot_url}")
+    if args.only != "details":
+        load_pokemon(detail_resources=args.details, max_workers=args.workers)
+    get_response_cache().close()
+    get_run_metrics().publish("rest_api_pokemon")
@@ -3,16 +3,71 @@ import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+import argparse
+import random
+import time
+from typing import Iterable, Iterator, Optional, Union
 import praw
-import dlt
+from prawcore.exceptions import TooManyRequests
 import polars as pl
-from constants import REDDIT_CLIENT_ID, REDDIT_SECRET
-
-reddit = praw.Reddit(
-    client_id=REDDIT_CLIENT_ID,
-    client_secret=REDDIT_SECRET,
-    user_agent="dlt-reddit-pipeline by /u/PuzzleheadedAge7992",
+import pyarrow as pa
+from constants import (
+    INGEST_BATCH_SIZE,
+    REDDIT_FETCH_WORKERS,
+    REDDIT_REQUESTS_PER_MINUTE,
+    REDDIT_MAX_RETRIES,
 )
+from ingest.clients import get_reddit_client
+from ingest.concurrent_fetch import TokenBucket, iter_ordered
+from ingest.loader import LOAD_DATE_PARTITION, ParquetLayout, load_to_file_system
+from ingest.metrics import get_run_metrics
+from ingest.streaming import arrow_batches, to_arrow
+
+# Reddit listings return at most 100 items per request
+REDDIT_PAGE_SIZE = 100
+
+
+reddit = get_reddit_client()
+
+
+def iter_subreddit_posts(
+    subreddit: str,
+    limit: int = 100,
+    client: Optional[praw.Reddit] = None,
+    bucket: Optional[TokenBucket] = None,
+) -> Iterator[dict]:
+    """
+    Yields posts from a given subreddit as they are paged in from the API.
+    Args:
+        subreddit (str): The name of the subreddit to fetch posts from.
+        limit (int): The maximum number of posts to fetch. Default is 100.
+        client (praw.Reddit): The client to use. Defaults to the module-level client.
+        bucket (TokenBucket): Optional shared rate limiter; one token is taken per listing page.
+    Yields:
+        dict: A dictionary containing post details.
+    """
+    metrics = get_run_metrics()
+    sub = (client or reddit).subreddit(subreddit)
+    listing = sub.hot(limit=limit)
+
+    for count in range(limit):
+        if bucket is not None and count % REDDIT_PAGE_SIZE == 0:
+            bucket.acquire()
+        with metrics.stage("fetch") as stage:
+            post = next(listing, None)
+            stage.rows = int(post is not None)
+        if post is None:
+            return
+        yield {
+            "id": post.id,
+            "title": post.title,
+            "score": post.score,
+            "author": str(post.author),
+            "created_utc": post.created_utc,
+            "url": post.url,
+            "num_comments": post.num_comments,
+            "subreddit": post.subreddit.display_name,
+        }
 
 
 def fetch_subreddit_posts(subreddit: str, limit: int = 100) -> list[dict]:
@@ -24,76 +79,192 @@ def fetch_subreddit_posts(subreddit: str, limit: int = 100) -> list[dict]:
     Returns:
         list[dict]: A list of dictionaries containing post details.
     """
-    sub = reddit.subreddit(subreddit)
-    posts = []
-
-    for post in sub.hot(limit=limit):
-        posts.append(
-            {
-                "id": post.id,
-                "title": post.title,
-                "score": post.score,
-                "author": str(post.author),
-                "created_utc": post.created_utc,
-                "url": post.url,
-                "num_comments": post.num_comments,
-                "subreddit": post.subreddit.display_name,
-            }
-        )
+    return list(iter_subreddit_posts(subreddit, limit=limit))
+
+
+def fetch_subreddit_posts_with_backoff(
+    subreddit: str,
+    limit: int,
+    bucket: TokenBucket,
+    max_retries: int = REDDIT_MAX_RETRIES,
+) -> list[dict]:
+    """
+    Fetches posts from a given subreddit on the calling thread's own client, sharing `bucket`
+    with the other workers. On a 429 the subreddit is refetched from the start (so its post
+    order is preserved) after the Retry-After delay, or an exponential backoff with jitter.
+    Args:
+        subreddit (str): The name of the subreddit to fetch posts from.
+        limit (int): The maximum number of posts to fetch.
+        bucket (TokenBucket): Rate limiter shared by all workers.
+        max_retries (int): Number of retries after a 429 before giving up.
+    Returns:
+        list[dict]: A list of dictionaries containing post details.
+    """
+    print(f"Fetching: r/{subreddit}")
+    for attempt in range(max_retries + 1):
+        try:
+            return list(
+                iter_subreddit_posts(
+                    subreddit,
+                    limit=limit,
+                    client=get_reddit_client(bucket),
+                    bucket=bucket,
+                )
+            )
+        except TooManyRequests as e:
+            if attempt == max_retries:
+                raise
+            if e.retry_after:
+                delay = float(e.retry_after)
+            else:
+                delay = 2**attempt + random.uniform(0, 1)
+            print(f"r/{subreddit}: rate limited by Reddit, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def iter_top_subreddits_posts(
+    top_n: int = 20, post_limit: int = 50, max_workers: int = 1
+) -> Iterator[dict]:
+    """
+    Yields the posts of the top N subreddits, subreddit by subreddit in popularity order.
+    With `max_workers` > 1 several subreddits are fetched concurrently, all drawing from one
+    token bucket sized to Reddit's OAuth quota (REDDIT_REQUESTS_PER_MINUTE).
+    Args:
+        top_n (int): The number of top subreddits to fetch posts from. Default is 20.
+        post_limit (int): The maximum number of posts to fetch from each subreddit. Default is 50.
+        max_workers (int): Number of subreddits fetched at once. Default is 1 (sequential).
+    Yields:
+        dict: A dictionary containing post details.
+    """
+    if max_workers <= 1:
+        for sub in reddit.subreddits.popular(limit=top_n):
+            print(f"Fetching: r/{sub.display_name}")
+            yield from iter_subreddit_posts(sub.display_name, limit=post_limit)
+        return
+
+    bucket = TokenBucket(REDDIT_REQUESTS_PER_MINUTE / 60, capacity=max_workers)
+    # the listing client may still have to fetch its OAuth token, which counts against the quota
+    bucket.acquire()
+    listing = reddit.subreddits.popular(limit=top_n)
+    names = []
+    for count in range(top_n):
+        if count % REDDIT_PAGE_SIZE == 0:
+            bucket.acquire()
+        sub = next(listing, None)
+        if sub is None:
+            break
+        names.append(sub.display_name)
+
+    def fetch(name: str) -> list[dict]:
+        return fetch_subreddit_posts_with_backoff(name, post_limit, bucket)
 
-    return posts
+    for posts in iter_ordered(fetch, names, max_workers):
+        yield from posts
 
 
-def top_subreddits_posts(top_n: int = 20, post_limit: int = 50) -> pl.DataFrame:
+def top_subreddits_posts(
+    top_n: int = 20, post_limit: int = 50, max_workers: int = 1
+) -> pl.DataFrame:
     """
     Fetches posts from the top N subreddits.
     Args:
         top_n (int): The number of top subreddits to fetch posts from. Default is 20.
         post_limit (int): The maximum number of posts to fetch from each subreddit. Default is 50.
+        max_workers (int): Number of subreddits fetched at once. Default is 1 (sequential).
     Returns:
         pl.DataFrame: A Polars DataFrame containing posts from the top subreddits.
     """
-    top_subs = reddit.subreddits.popular(limit=top_n)
+    all_posts = list(iter_top_subreddits_posts(top_n, post_limit, max_workers))
 
-    all_posts = []
-    for sub in top_subs:
-        print(f"Fetching: r/{sub.display_name}")
-        posts = fetch_subreddit_posts(sub.display_name, limit=post_limit)
-        all_posts.extend(posts)
-
-    df = pl.DataFrame(all_posts)
+    with get_run_metrics().stage("dataframe") as stage:
+        df = pl.DataFrame(all_posts)
+        stage.rows = df.height
 
     return df
 
 
-def df_to_file_system(df: pl.DataFrame) -> str:
+def top_subreddits_post_batches(
+    top_n: int = 20,
+    post_limit: int = 50,
+    batch_size: int = INGEST_BATCH_SIZE,
+    max_workers: int = 1,
+) -> Iterator[pa.Table]:
+    """
+    Streaming version of top_subreddits_posts: yields the posts as fixed-size Arrow tables,
+    so peak memory is bounded by `batch_size` rather than `top_n * post_limit`.
+    Args:
+        top_n (int): The number of top subreddits to fetch posts from. Default is 20.
+        post_limit (int): The maximum number of posts to fetch from each subreddit. Default is 50.
+        batch_size (int): Number of posts per Arrow table.
+        max_workers (int): Number of subreddits fetched at once. Default is 1 (sequential).
+    Yields:
+        pa.Table: Arrow tables of posts from the top subreddits.
+    """
+    posts = iter_top_subreddits_posts(top_n, post_limit, max_workers)
+    yield from arrow_batches(posts, batch_size)
+
+
+def df_to_file_system(df: Union[pl.DataFrame, Iterable[pa.Table]]) -> str:
     """
     Pipeline to load from a df to s3 storage.
 
     Args:
-        full_table_name (str): The (full) name of the BigQuery table to load
-        df (pl.DataFrame): The Polars DataFrame to load
+        df (pl.DataFrame | Iterable[pa.Table]): The Polars DataFrame to load, or a stream of
+            Arrow tables (e.g. from top_subreddits_post_batches) that is loaded batch by batch.
     Returns:
         statement indicating the table has been saved to the filesystem.
 
     """
     table_name = "posts"
-    arrow_table = df.to_arrow()
-    resource = dlt.resource(arrow_table, name=table_name)
-
-    # Create a dlt pipeline object
-    pipeline = dlt.pipeline(
-        pipeline_name="rest_api_reddit", destination="filesystem", dataset_name="reddit"
+    data = to_arrow(df) if isinstance(df, pl.DataFrame) else df
+    load_to_file_system(
+        data,
+        table_name,
+        pipeline_name="rest_api_reddit",
+        dataset_name="reddit",
+        layout=ParquetLayout(partition_by=LOAD_DATE_PARTITION),
     )
-
-    # Run the pipeline
-    load_info = pipeline.run(resource, loader_file_format="parquet")
-
-    # Pretty print load information
-    print(f"dlt load data: {load_info}")
-    print(f"dataset of shape: {df.shape} uploaded!")
+    if isinstance(df, pl.DataFrame):
+        print(f"dataset of shape: {df.shape} uploaded!")
 
 
 if __name__ == "__main__":
-    df = top_subreddits_posts(top_n=20, post_limit=1000)
-    df_to_file_system(df)
+    parser = argparse.ArgumentParser(
+        description="Ingest hot posts from popular subreddits"
+    )
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument("--post-limit", type=int, default=1000)
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="load posts in fixed-size Arrow batches instead of one DataFrame",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=INGEST_BATCH_SIZE,
+        help="rows per Arrow batch in --stream mode (env: INGEST_BATCH_SIZE)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=REDDIT_FETCH_WORKERS,
+        help="subreddits fetched concurrently, 1 for sequential (env: REDDIT_FETCH_WORKERS)",
+    )
+    args = parser.parse_args()
+
+    if args.stream:
+        df_to_file_system(
+            top_subreddits_post_batches(
+                top_n=args.top_n,
+                post_limit=args.post_limit,
+                batch_size=args.batch_size,
+                max_workers=args.workers,
+            )
+        )
+    else:
+        df = top_subreddits_posts(
+            top_n=args.top_n, post_limit=args.post_limit, max_workers=args.workers
+        )
+        df_to_file_system(df)
+    get_run_metrics().publish("rest_api_reddit")
@@ -0,0 +1,260 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from constants import (
+    INGEST_HTTP_RETRIES,
+    INGEST_HTTP_INITIAL_CONCURRENCY,
+    INGEST_HTTP_MAX_CONCURRENCY,
+    INGEST_HTTP_BACKOFF_SECONDS,
+    INGEST_HTTP_MAX_DELAY_SECONDS,
+)
+from ingest.clients import get_http_session
+from ingest.metrics import get_run_metrics
+
+# Responses worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Responses that mean the host wants fewer requests, so its concurrency is halved
+THROTTLE_STATUSES = {429, 503}
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """
+    The delay asked for by a Retry-After header, given in seconds or as an HTTP date.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostWindow:
+    """
+    AIMD concurrency window of one host: the number of requests allowed in flight grows by
+    about one per window of successful responses, and halves when the host throttles.
+    Server errors and connection failures leave it unchanged. Only one halving is applied
+    per window, i.e. requests sent before the last decrease do not decrease it again.
+
+    Args:
+        host (str): The host, e.g. pokeapi.co.
+        initial (int): Starting concurrency.
+        maximum (int): Concurrency ceiling.
+    """
+
+    def __init__(self, host: str, initial: int, maximum: int):
+        self.host = host
+        self.maximum = max(1, maximum)
+        self.limit = float(min(max(1, initial), self.maximum))
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self._resume_at = 0.0
+        self._decreased_at = 0.0
+        self._first_sent: Optional[float] = None
+        self._last_done: Optional[float] = None
+        self._condition = threading.Condition()
+
+    def acquire(self) -> float:
+        """
+        Block until a request may be sent and count it as in flight.
+
+        Returns:
+            float: The monotonic time the request was let through, for `release`.
+        """
+        with self._condition:
+            while True:
+                wait = self._resume_at - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(wait)
+                elif self.in_flight >= int(self.limit):
+                    self._condition.wait()
+                else:
+                    break
+            self.in_flight += 1
+            sent = time.monotonic()
+            if self._first_sent is None:
+                self._first_sent = sent
+            return sent
+
+    def release(
+        self,
+        sent: float,
+        status: Optional[int],
+        pause: Optional[float] = None,
+        retry: bool = False,
+    ) -> None:
+        """
+        Finish a request let through at `sent` that got a response with `status` (None when
+        the request failed). The window halves after a throttled response (THROTTLE_STATUSES),
+        is held after another server error or a failure, and widens after anything else.
+        `pause` holds back every request to the host for that many seconds, e.g. for a
+        Retry-After. `retry` counts it as retried.
+        """
+        with self._condition:
+            now = time.monotonic()
+            self.in_flight -= 1
+            self.requests += 1
+            self.retries += retry
+            self._last_done = now
+            if status in THROTTLE_STATUSES:
+                self.throttled += 1
+                if sent >= self._decreased_at:
+                    self.limit = max(1.0, self.limit / 2)
+                    self._decreased_at = now
+            elif status is not None and status < 500:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            if pause:
+                self._resume_at = max(self._resume_at, now + pause)
+            self._condition.notify_all()
+
+    def metrics(self) -> dict:
+        with self._condition:
+            elapsed = (self._last_done or 0.0) - (self._first_sent or 0.0)
+            return {
+                "host": self.host,
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "concurrency": int(self.limit),
+                "requests_per_second": self.requests / elapsed if elapsed > 0 else 0.0,
+            }
+
+
+class RequestController:
+    """
+    Sends GET requests with per-host adaptive concurrency and retries.
+
+    Transient responses (RETRY_STATUSES) are retried up to `max_retries` times, after the
+    Retry-After delay when the server sends one, otherwise after an exponential backoff with
+    full jitter. Each host gets a HostWindow, so concurrency ramps up while the host answers
+    successfully until it pushes back with a 429/503, and then settles just below that level.
+    Connection errors are retried by the session itself (ingest.clients).
+
+    The window only bounds concurrency. Callers that also rate limit a host (e.g. the
+    requests_per_second of ingest.concurrent_fetch, a fixed TokenBucket per host) cap its
+    throughput at that rate, however far the window opens.
+
+    Args:
+        max_retries (int): Retries per request before the last response is returned as is.
+        initial_concurrency (int): Requests in flight per host at the start.
+        max_concurrency (int): Ceiling on the requests in flight per host.
+        backoff_seconds (float): Base of the exponential backoff.
+        max_delay_seconds (float): Cap on the backoff. A longer Retry-After is not waited for,
+            and the throttled response is returned instead.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = INGEST_HTTP_RETRIES,
+        initial_concurrency: int = INGEST_HTTP_INITIAL_CONCURRENCY,
+        max_concurrency: int = INGEST_HTTP_MAX_CONCURRENCY,
+        backoff_seconds: float = INGEST_HTTP_BACKOFF_SECONDS,
+        max_delay_seconds: float = INGEST_HTTP_MAX_DELAY_SECONDS,
+    ):
+        self.max_retries = max_retries
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.backoff_seconds = backoff_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._hosts: dict[str, HostWindow] = {}
+        self._lock = threading.Lock()
+
+    def window(self, url: str) -> HostWindow:
+        host = urlparse(url).netloc
+        with self._lock:
+            window = self._hosts.get(host)
+            if window is None:
+                window = HostWindow(
+                    host, self.initial_concurrency, self.max_concurrency
+                )
+                self._hosts[host] = window
+        return window
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Full-jitter exponential backoff before retry number `attempt` (from 0).
+        """
+        cap = min(self.max_delay_seconds, self.backoff_seconds * 2**attempt)
+        return random.uniform(0, cap)
+
+    def get(
+        self, url: str, session: Optional[requests.Session] = None, **kwargs
+    ) -> requests.Response:
+        """
+        GET `url`, retrying transient failures.
+
+        Args:
+            url (str): The URL to fetch.
+            session (requests.Session): Session to use. Defaults to the shared ingest session.
+            **kwargs: Passed to session.get, e.g. headers or stream.
+        Returns:
+            requests.Response: The first response that is not transient, or the last one.
+        """
+        http = session or get_http_session()
+        window = self.window(url)
+        for attempt in range(self.max_retries + 1):
+            sent = window.acquire()
+            try:
+                response = http.get(url, **kwargs)
+            except requests.RequestException:
+                window.release(sent, None)
+                raise
+            status = response.status_code
+            if status not in RETRY_STATUSES or attempt == self.max_retries:
+                window.release(sent, status)
+                break
+
+            throttled = status in THROTTLE_STATUSES
+            retry_after = retry_after_seconds(response)
+            if retry_after is not None and retry_after > self.max_delay_seconds:
+                window.release(sent, status)
+                break
+            delay = retry_after if retry_after is not None else self.backoff(attempt)
+            response.close()
+            window.release(
+                sent, status, pause=retry_after if throttled else None, retry=True
+            )
+            time.sleep(delay)
+
+        get_run_metrics().record_host(window.metrics())
+        return response
+
+    def metrics(self) -> list[dict]:
+        """
+        Requests, retries, throttled responses, current concurrency and throughput per host.
+        """
+        with self._lock:
+            windows = list(self._hosts.values())
+        return [window.metrics() for window in windows]
+
+
+_request_controller: Optional[RequestController] = None
+_request_controller_lock = threading.Lock()
+
+
+def get_request_controller() -> RequestController:
+    """
+    Return the process-wide RequestController configured from constants.py.
+    """
+    global _request_controller
+    with _request_controller_lock:
+        if _request_controller is None:
+            _request_controller = RequestController()
+        return _request_controller
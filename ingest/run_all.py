@@ -0,0 +1,267 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import multiprocessing
+import runpy
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Optional
+
+import dlt
+from constants import INGEST_PIPELINE_WORKERS
+
+INGEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass
+class IngestPipeline:
+    """
+    One node of the ingest DAG.
+
+    Attributes:
+        name (str): Name used on the command line and in the summary.
+        script (str): Pipeline script in ingest/, run as __main__.
+        pipeline_name (str): The dlt pipeline the script loads with, read back for row/byte counts.
+        args (list[str]): Command line arguments passed to the script.
+        depends_on (list[str]): Nodes that must succeed before this one starts. Nodes that load
+            through the same dlt pipeline must be chained, as they share its working directory
+            and state.
+    """
+
+    name: str
+    script: str
+    pipeline_name: str
+    args: list[str] = field(default_factory=list)
+    depends_on: list[str] = field(default_factory=list)
+
+
+PIPELINES = [
+    IngestPipeline(
+        "pokemon_details",
+        "pokemon_api_pipeline.py",
+        "rest_api_pokemon",
+        args=["--only", "details"],
+    ),
+    IngestPipeline(
+        "pokemon",
+        "pokemon_api_pipeline.py",
+        "rest_api_pokemon",
+        args=["--only", "rest"],
+        depends_on=["pokemon_details"],
+    ),
+    IngestPipeline("yugioh", "yugioh_api_pipeline.py", "rest_api_yugioh"),
+    IngestPipeline("reddit", "reddit_api_pipeline.py", "rest_api_reddit"),
+    IngestPipeline(
+        "landnerds", "landnerds_custom_pipeline.py", "sql_database_landnerds"
+    ),
+]
+
+
+@dataclass
+class PipelineResult:
+    """
+    Outcome of one node.
+
+    Attributes:
+        name (str): The node name.
+        status (str): "ok", "failed" or "skipped" (an upstream node failed).
+        seconds (float): Wall time of the run.
+        rows (int): Rows loaded by this run, None if unknown.
+        bytes (int): Bytes of load files written by this run, None if unknown.
+        error (str): Why the node failed or was skipped.
+    """
+
+    name: str
+    status: str
+    seconds: float = 0.0
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    error: Optional[str] = None
+
+
+def load_stats(pipeline_name: str, since: float) -> tuple[Optional[int], Optional[int]]:
+    """
+    Read the rows and bytes loaded by the last run of a dlt pipeline from its trace.
+    A trace older than `since` means the script loaded nothing (e.g. an unchanged export).
+
+    Args:
+        pipeline_name (str): Name of the dlt pipeline.
+        since (float): Unix time at which the node started.
+    Returns:
+        tuple: (rows, bytes), each None when the trace does not record it.
+    """
+    try:
+        trace = dlt.attach(pipeline_name=pipeline_name).last_trace
+    except Exception:
+        return None, None
+    if trace is None or trace.started_at.timestamp() < since:
+        return 0, 0
+
+    rows = None
+    if trace.last_normalize_info is not None:
+        rows = sum(
+            count
+            for table, count in trace.last_normalize_info.row_counts.items()
+            if not table.startswith("_dlt")
+        )
+    size = None
+    if trace.last_load_info is not None:
+        size = sum(
+            job.file_size
+            for package in trace.last_load_info.load_packages
+            for job in package.jobs["completed_jobs"]
+            if not job.job_file_info.table_name.startswith("_dlt")
+        )
+    return rows, size
+
+
+def run_pipeline(pipeline: IngestPipeline) -> PipelineResult:
+    """
+    Run one pipeline script as __main__ in the current (worker) process and time it.
+    Exceptions are caught and reported in the result so they never reach the scheduler.
+    """
+    script = os.path.join(INGEST_DIR, pipeline.script)
+    sys.argv = [script, *pipeline.args]
+    started_at = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            error = f"exited with {e.code}"
+    except Exception as e:
+        traceback.print_exc()
+        error = f"{type(e).__name__}: {e}"
+    seconds = time.perf_counter() - start
+
+    if error is not None:
+        return PipelineResult(pipeline.name, "failed", seconds, error=error)
+    rows, size = load_stats(pipeline.pipeline_name, started_at)
+    return PipelineResult(pipeline.name, "ok", seconds, rows, size)
+
+
+def run_all(
+    pipelines: list[IngestPipeline], max_workers: int = INGEST_PIPELINE_WORKERS
+) -> list[PipelineResult]:
+    """
+    Run the pipelines as a dependency graph on a process pool.
+
+    Each node starts as soon as the nodes it depends on have succeeded, in its own fresh worker
+    process, so module state, clients and memory are not shared between pipelines. A failing
+    node only causes its dependents to be skipped; the rest of the graph keeps running.
+    Dependencies on nodes that are not in `pipelines` are treated as met.
+
+    Args:
+        pipelines (list[IngestPipeline]): The nodes to run.
+        max_workers (int): Maximum number of pipelines running at once.
+    Returns:
+        list[PipelineResult]: One result per node, in the order of `pipelines`.
+    """
+    names = {pipeline.name for pipeline in pipelines}
+    results: dict[str, PipelineResult] = {}
+    pending = list(pipelines)
+    running = {}
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1,
+    ) as executor:
+        while pending or running:
+            for pipeline in list(pending):
+                upstream = [name for name in pipeline.depends_on if name in names]
+                failed = [
+                    name
+                    for name in upstream
+                    if name in results and results[name].status != "ok"
+                ]
+                if failed:
+                    pending.remove(pipeline)
+                    results[pipeline.name] = PipelineResult(
+                        pipeline.name,
+                        "skipped",
+                        error=f"upstream {failed} did not succeed",
+                    )
+                elif all(name in results for name in upstream):
+                    pending.remove(pipeline)
+                    running[executor.submit(run_pipeline, pipeline)] = pipeline
+                    print(f"started {pipeline.name}")
+
+            if not running:
+                if pending:
+                    raise ValueError(
+                        f"dependency cycle between {[p.name for p in pending]}"
+                    )
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                pipeline = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:  # the worker process itself died
+                    result = PipelineResult(
+                        pipeline.name, "failed", error=f"{type(e).__name__}: {e}"
+                    )
+                results[pipeline.name] = result
+                print(f"finished {pipeline.name}: {result.status}")
+
+    return [results[pipeline.name] for pipeline in pipelines]
+
+
+def _format_bytes(size: Optional[int]) -> str:
+    if size is None:
+        return "-"
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def print_summary(results: list[PipelineResult], elapsed: float) -> None:
+    """
+    Print a table of status, wall time, rows and bytes per pipeline.
+    """
+    print(f"\n{'pipeline':<18}{'status':<10}{'wall time':>10}{'rows':>12}{'bytes':>12}")
+    for result in results:
+        rows = "-" if result.rows is None else f"{result.rows:,}"
+        print(
+            f"{result.name:<18}{result.status:<10}{result.seconds:>9.1f}s"
+            f"{rows:>12}{_format_bytes(result.bytes):>12}"
+        )
+    for result in results:
+        if result.error:
+            print(f"{result.name}: {result.error}")
+    print(
+        f"ingest finished in {elapsed:.1f}s "
+        f"(sum of pipeline wall times {sum(r.seconds for r in results):.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run all ingest pipelines in parallel")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=INGEST_PIPELINE_WORKERS,
+        help="pipelines run at once (env: INGEST_PIPELINE_WORKERS)",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=[pipeline.name for pipeline in PIPELINES],
+        help="run only these pipelines",
+    )
+    args = parser.parse_args()
+
+    selected = [p for p in PIPELINES if not args.only or p.name in args.only]
+    start = time.perf_counter()
+    results = run_all(selected, max_workers=args.workers)
+    print_summary(results, time.perf_counter() - start)
+    sys.exit(0 if all(result.status == "ok" for result in results) else 1)
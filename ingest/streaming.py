@@ -0,0 +1,68 @@
+from typing import Iterable, Iterator, Optional
+
+import polars as pl
+import pyarrow as pa
+from ingest.metrics import get_run_metrics
+
+
+def _conform(df: pl.DataFrame, schema: Optional[pl.Schema]) -> pl.DataFrame:
+    """
+    Give a batch the columns of the batches already emitted, widened to fit the new rows.
+
+    Missing columns are added as nulls, null-typed columns take the known type and new
+    columns are appended. Columns that are still untyped are left out until a batch gives them
+    a type, as dlt would type them differently from the real data. A column whose type has to
+    widen (e.g. a struct that gains a field) takes the common supertype, so no value is cast
+    away; the loader starts a new parquet part when the schema of a batch changes.
+    """
+    if schema:
+        df = pl.concat([pl.DataFrame(schema=schema), df], how="diagonal_relaxed")
+    return df.select(name for name, dtype in df.schema.items() if dtype != pl.Null)
+
+
+def to_arrow(df: pl.DataFrame) -> pa.Table:
+    """
+    Convert a DataFrame to an Arrow table, recorded as the to_arrow stage of the run metrics.
+    """
+    with get_run_metrics().stage("to_arrow") as stage:
+        table = df.to_arrow()
+        stage.rows = table.num_rows
+        stage.bytes = table.nbytes
+    return table
+
+
+def _batch_to_arrow(
+    batch: list[dict], schema: Optional[pl.Schema]
+) -> tuple[pa.Table, pl.Schema]:
+    with get_run_metrics().stage("dataframe") as stage:
+        df = _conform(pl.DataFrame(batch, infer_schema_length=None), schema)
+        stage.rows = df.height
+    return to_arrow(df), df.schema
+
+
+def arrow_batches(
+    records: Iterable[dict], batch_size: int, schema: Optional[pl.Schema] = None
+) -> Iterator[pa.Table]:
+    """
+    Group a stream of records into fixed-size Arrow tables. Each table has the columns of the
+    ones before it, and only widens their types when new rows need it (see _conform).
+    Only one batch of records is held in memory at a time, so records can be yielded straight
+    into a dlt.resource without materialising the whole dataset.
+
+    Args:
+        records (Iterable[dict]): The records to batch, e.g. a generator of API rows.
+        batch_size (int): Number of rows per Arrow table.
+        schema (pl.Schema): Schema of batches emitted earlier, e.g. by the run a checkpoint
+            resumes, so the new batches keep their columns.
+    Yields:
+        pa.Table: Arrow tables of at most `batch_size` rows.
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            table, schema = _batch_to_arrow(batch, schema)
+            yield table
+            batch = []
+    if batch:
+        yield _batch_to_arrow(batch, schema)[0]
@@ -1,62 +1,132 @@
-import dlt
-from dlt.sources.rest_api import (
-    rest_api_source,
-    check_connection,
-)
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
 from dlt.common.pendulum import pendulum
-import requests
+from typing import Iterable, Iterator, Union
+import ijson
 import polars as pl
+import pyarrow as pa
+from constants import INGEST_BATCH_SIZE, YGOPRODECK_BASE_URL
+from ingest.change_detection import ChangeDetector
+from ingest.http_cache import get_response_cache
+from ingest.loader import LOAD_DATE_PARTITION, ParquetLayout, load_to_file_system
+from ingest.metrics import get_run_metrics
+from ingest.streaming import arrow_batches, to_arrow
+from visualise.serving import SERVING_SNAPSHOTS
+
+CARDINFO_URL = f"{YGOPRODECK_BASE_URL}cardinfo.php"
+
+
+def iter_cards() -> Iterator[dict]:
+    """
+    Yield each card of the cardinfo.php `data` array as soon as its bytes have been parsed,
+    rather than parsing the whole response in one go.
+    Yields:
+        dict: A dictionary containing the card information and URLs.
+    """
+    metrics = get_run_metrics()
+    cards = ijson.sendable_list()
+    parser = ijson.items_coro(cards, "data.item", use_float=True)
+    chunks = get_response_cache().iter_bytes(CARDINFO_URL)
+    while True:
+        with metrics.stage("fetch") as stage:
+            chunk = next(chunks, None)
+            stage.bytes = len(chunk or b"")
+        if chunk is None:
+            break
+        with metrics.stage("parse") as stage:
+            parser.send(chunk)
+            stage.rows = len(cards)
+        yield from cards
+        del cards[:]
+    with metrics.stage("parse") as stage:
+        parser.close()
+        stage.rows = len(cards)
+    yield from cards
+
+
+def card_batches(batch_size: int = INGEST_BATCH_SIZE) -> Iterator[pa.Table]:
+    """
+    Stream all Yu-Gi-Oh cards from the API as columnar Arrow batches.
+    Args:
+        batch_size (int): Number of cards per Arrow table.
+    Yields:
+        pa.Table: Arrow tables of card information, with a `date_fetched` column.
+    """
+    date_fetched = pendulum.now().strftime("%Y-%m-%d %H:%M:%S")
+    for batch in arrow_batches(iter_cards(), batch_size):
+        yield batch.append_column(
+            "date_fetched", pa.array([date_fetched] * batch.num_rows, pa.string())
+        )
 
 
 def fetch_all_cards():
     """
     Fetch a list of all Yu-Gi-Oh card information from the API.
     Returns:
-        list: A list of dictionaries containing all card information and URLs.
-    """
-    url = "https://db.ygoprodeck.com/api/v7/cardinfo.php"
-    response = requests.get(url)
-    response.raise_for_status()
-    data = response.json()["data"]
-    df = pl.DataFrame(data)
-    df = df.with_columns([
-        pl.lit(pendulum.now().strftime("%Y-%m-%d %H:%M:%S")).alias("date_fetched")
-    ])
+        pl.DataFrame: A Polars DataFrame containing all card information and URLs.
+    """
+    batches = [pl.from_arrow(batch) for batch in card_batches()]
+    with get_run_metrics().stage("concat") as stage:
+        df = pl.concat(batches, how="diagonal_relaxed")
+        stage.rows = df.height
     return df
 
-df = fetch_all_cards()
-print(df.head())
-print(df.shape)
 
-
-def df_to_file_system(df: pl.DataFrame) -> str:
+def df_to_file_system(
+    df: Union[pl.DataFrame, Iterable[pa.Table]], detect_changes: bool = True
+) -> str:
     """
     Pipeline to load from a df to s3 storage.
 
+    The API only returns the full card list, so by default only the cards that are new or
+    changed since the last load (ChangeDetector) are merged, keyed by id.
+
     Args:
-        full_table_name (str): The (full) name of the BigQuery table to load
-        df (pl.DataFrame): The Polars DataFrame to load
+        df (pl.DataFrame | Iterable[pa.Table]): The Polars DataFrame to load, or a stream of
+            Arrow tables (e.g. from card_batches) that is loaded batch by batch.
+        detect_changes (bool): False to load every card and rebuild the hash index.
     Returns:
         statement indicating the table has been saved to the filesystem.
 
     """
     table_name = "yugioh_cards"
-    arrow_table = df.to_arrow()
-    resource = dlt.resource(arrow_table, name=table_name)
-
-    # Create a dlt pipeline object
-    pipeline = dlt.pipeline(
+    data = [to_arrow(df)] if isinstance(df, pl.DataFrame) else df
+    detector = ChangeDetector(f"yugioh_api/{table_name}", key="id")
+    if not detect_changes:
+        detector.reset()
+    data = (detector.changes(batch) for batch in data)
+    load_to_file_system(
+        data,
+        table_name,
         pipeline_name="rest_api_yugioh",
-        destination="filesystem",
         dataset_name="yugioh_api",
+        layout=ParquetLayout(partition_by=LOAD_DATE_PARTITION),
+        write_disposition="merge",
+        primary_key="id",
     )
+    # only once the changed rows are in the lake, so a failed load is retried in full
+    detector.commit()
+    if isinstance(df, pl.DataFrame):
+        print(f"dataset of shape: {df.shape} uploaded!")
 
-    # Run the pipeline
-    load_info = pipeline.run(resource, loader_file_format="parquet")
-
-    # Pretty print load information
-    print(f"dlt load data: {load_info}")
-    print(f"dataset of shape: {df.shape} uploaded!")
 
 if __name__ == "__main__":
-    df_to_file_system(fetch_all_cards())
\ No newline at end of file
+    parser = argparse.ArgumentParser(
+        description="Ingest Yu-Gi-Oh cards from YGOPRODeck"
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="load every card, not only the ones changed since the last load",
+    )
+    args = parser.parse_args()
+
+    df_to_file_system(card_batches(), detect_changes=not args.all)
+    with get_run_metrics().stage("snapshot"):
+        print(f"serving snapshot: {SERVING_SNAPSHOTS['yugioh_cards'].publish()}")
+    get_response_cache().close()
+    get_run_metrics().publish("rest_api_yugioh")
@@ -0,0 +1,8 @@
+AUDIT (
+  name assert_not_null,
+);
+
+SELECT *
+FROM @this_model
+WHERE
+  @column IS NULL
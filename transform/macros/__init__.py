@@ -0,0 +1,102 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import fsspec
+from sqlglot import exp, parse_one
+from sqlmesh import macro
+from sqlmesh.core.macros import MacroEvaluator
+from constants import (
+    AWS_ACCESS_KEY_ID,
+    AWS_REGION,
+    AWS_SECRET_ACCESS_KEY,
+    DATA_LAKE_URL,
+)
+
+# dlt filesystem datasets registered as <dataset>.<table> views on the local gateway
+LAKE_DATASETS = ["pokemon_api", "yugioh_api", "reddit", "landnerds"]
+
+# The Athena source tables of the models (sources/lake_tables.sql), rebuilt as views:
+# name -> folder under DATA_LAKE_URL. Each is partitioned into load_date=YYYY-MM-DD/ folders.
+LAKE_SOURCES = {
+    "yugioh": "yugioh_api/yugioh_cards",
+    "pokemon_details": "pokemon_api/pokemon_details",
+    "pokemon_stats": "pokemon_api/pokemon_stats",
+    "reddit_posts": "reddit/posts",
+}
+
+
+def _parquet_glob(folder: str) -> str:
+    return f"{DATA_LAKE_URL}{folder}/**/*.parquet"
+
+
+def _has_parquet(fs: fsspec.AbstractFileSystem, path: str) -> bool:
+    return any(name.endswith(".parquet") for name in fs.find(path))
+
+
+def _read_parquet(folder: str, **options: str) -> str:
+    # the load_date column is added from the file name, typed as a date (see lake_views)
+    settings = ", ".join(
+        ["union_by_name = true", "hive_partitioning = false"]
+        + [f"{key} = {value}" for key, value in options.items()]
+    )
+    return f"read_parquet('{_parquet_glob(folder)}', {settings})"
+
+
+def lake_views() -> list[str]:
+    """
+    DuckDB statements creating a view over every landed table in DATA_LAKE_URL, plus the
+    Athena source tables of the models with the same names and partition columns.
+    """
+    statements = []
+    if DATA_LAKE_URL.startswith("s3://"):
+        statements += [
+            "INSTALL httpfs",
+            "LOAD httpfs",
+            f"CREATE OR REPLACE SECRET lake (TYPE s3, KEY_ID '{AWS_ACCESS_KEY_ID or ''}', "
+            f"SECRET '{AWS_SECRET_ACCESS_KEY or ''}', REGION '{AWS_REGION or ''}')",
+        ]
+
+    fs, lake_path = fsspec.core.url_to_fs(DATA_LAKE_URL)
+    for dataset in LAKE_DATASETS:
+        dataset_path = f"{lake_path.rstrip('/')}/{dataset}"
+        if not fs.isdir(dataset_path):
+            continue
+        statements.append(f'CREATE SCHEMA IF NOT EXISTS "{dataset}"')
+        for table_path in fs.ls(dataset_path, detail=False):
+            table = table_path.rstrip("/").rsplit("/", 1)[-1]
+            if table.startswith("_dlt") or not fs.isdir(table_path):
+                continue
+            if _has_parquet(fs, table_path):
+                statements.append(
+                    f'CREATE OR REPLACE VIEW "{dataset}"."{table}" AS '
+                    f"SELECT * FROM {_read_parquet(f'{dataset}/{table}')}"
+                )
+
+    statements.append('CREATE SCHEMA IF NOT EXISTS "sqlmesh"')
+    for name, folder in LAKE_SOURCES.items():
+        if not _has_parquet(fs, f"{lake_path.rstrip('/')}/{folder}"):
+            continue
+        # filters on the partition column are pushed down to the file list
+        statements.append(
+            f'CREATE OR REPLACE VIEW "sqlmesh"."{name}" AS '
+            f"SELECT * EXCLUDE (filename), "
+            f"CAST(regexp_extract(filename, 'load_date=([0-9-]+)', 1) AS DATE) AS load_date "
+            f"FROM {_read_parquet(folder, filename='true')}"
+        )
+    return statements
+
+
+@macro()
+def register_lake_sources(evaluator: MacroEvaluator) -> list[exp.Expression]:
+    """
+    Register the landed parquet as DuckDB views on the local gateway, so the models read the
+    same sources as in Athena. Does nothing on other engines.
+    """
+    if (
+        evaluator.runtime_stage == "loading"
+        or evaluator.engine_adapter.dialect != "duckdb"
+    ):
+        return []
+    return [parse_one(statement, read="duckdb") for statement in lake_views()]
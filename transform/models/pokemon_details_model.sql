@@ -0,0 +1,44 @@
+MODEL (
+  name opensource.pokemon_details,
+  table_format iceberg,
+  dialect athena,
+  kind INCREMENTAL_BY_UNIQUE_KEY (
+    unique_key id
+  ),
+  cron '@daily',
+  grain id,
+  audits (
+    assert_not_null(column := id),
+    assert_non_negative(column := height),
+    assert_non_negative(column := weight),
+  )
+);
+
+-- Incremental ingests land only new or refreshed Pokémon, so each run merges the latest
+-- fetch of each Pokémon from the partitions of its interval.
+SELECT
+  id,
+  "order",
+  name,
+  species,
+  height,
+  weight,
+  base_experience,
+  location_area_encounters,
+  cry_latest,
+  cry_legacy,
+  sprite_default,
+  sprite_artwork,
+  sprite_animated,
+  CAST(date_fetched AS TIMESTAMP) AS date_fetched,
+  load_date
+FROM (
+  SELECT
+    *,
+    ROW_NUMBER() OVER (PARTITION BY id ORDER BY date_fetched DESC) AS fetch_rank
+  FROM "sqlmesh"."pokemon_details"
+  WHERE
+    load_date BETWEEN @start_date AND @end_date
+)
+WHERE
+  fetch_rank = 1
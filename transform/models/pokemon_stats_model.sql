@@ -0,0 +1,29 @@
+MODEL (
+  name opensource.pokemon_stats,
+  table_format iceberg,
+  dialect athena,
+  kind INCREMENTAL_BY_TIME_RANGE (
+    time_column load_date
+  ),
+  partitioned_by load_date,
+  cron '@daily',
+  grain (pokemon_id, stat, load_date),
+  audits (
+    assert_not_null(column := pokemon_id),
+    assert_non_negative(column := base_stat),
+    assert_non_negative(column := effort),
+  )
+);
+
+-- History of base stats per load day. Each run only replaces the load_date partitions of its
+-- interval.
+SELECT
+  pokemon_id,
+  stat,
+  base_stat,
+  effort,
+  CAST(date_fetched AS TIMESTAMP) AS date_fetched,
+  load_date
+FROM "sqlmesh"."pokemon_stats"
+WHERE
+  load_date BETWEEN @start_date AND @end_date
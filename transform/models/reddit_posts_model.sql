@@ -0,0 +1,37 @@
+MODEL (
+  name opensource.reddit_posts,
+  table_format iceberg,
+  dialect athena,
+  kind INCREMENTAL_BY_UNIQUE_KEY (
+    unique_key id
+  ),
+  cron '@daily',
+  grain id,
+  audits (
+    assert_not_null(column := id),
+    assert_non_negative(column := num_comments),
+  )
+);
+
+-- Hot posts are fetched again on later days with new scores, so posts are merged on id from
+-- the load_date partitions of the interval rather than bucketed by created_utc.
+SELECT
+  id,
+  subreddit,
+  title,
+  author,
+  url,
+  score,
+  num_comments,
+  FROM_UNIXTIME(created_utc) AS created_at,
+  load_date
+FROM (
+  SELECT
+    *,
+    ROW_NUMBER() OVER (PARTITION BY id ORDER BY load_date DESC, score DESC) AS load_rank
+  FROM "sqlmesh"."reddit_posts"
+  WHERE
+    load_date BETWEEN @start_date AND @end_date
+)
+WHERE
+  load_rank = 1
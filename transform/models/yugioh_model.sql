@@ -2,9 +2,45 @@ MODEL (
   name opensource.yugioh,
   table_format iceberg,
   dialect athena,
-  kind FULL
+  kind INCREMENTAL_BY_UNIQUE_KEY (
+    unique_key id
+  ),
+  cron '@daily',
+  grain id,
+  audits (
+    assert_not_null(column := id),
+    assert_non_negative(column := atk),
+    assert_non_negative(column := def),
+  )
 );
 
+-- Each ingest lands only the new and changed cards in that day's load_date partition, so
+-- each run reads only the partitions of its interval and merges the latest version of each card.
 SELECT
-  *
-FROM "sqlmesh"."yugioh"
\ No newline at end of file
+  id,
+  name,
+  type,
+  frame_type,
+  "desc",
+  race,
+  archetype,
+  attribute,
+  level,
+  atk,
+  def,
+  ygoprodeck_url,
+  card_sets,
+  card_images,
+  card_prices,
+  CAST(date_fetched AS TIMESTAMP) AS date_fetched,
+  load_date
+FROM (
+  SELECT
+    *,
+    ROW_NUMBER() OVER (PARTITION BY id ORDER BY date_fetched DESC) AS fetch_rank
+  FROM "sqlmesh"."yugioh"
+  WHERE
+    load_date BETWEEN @start_date AND @end_date
+)
+WHERE
+  fetch_rank = 1
@@ -0,0 +1,110 @@
+-- Athena tables over the parquet the ingests land in s3://0-data-lake/, used as the sources
+-- of the incremental models. Run once (e.g. in the Athena console) per environment.
+--
+-- The load_date partitions are projected from the dlt layout folders (load_date=YYYY-MM-DD/),
+-- so no MSCK REPAIR / crawler is needed and a filter on the partition column lists and reads
+-- only the matching days. load_date is the day of the load package, which can be later than
+-- the date_fetched of its rows (e.g. when a checkpointed extraction resumes).
+
+CREATE EXTERNAL TABLE IF NOT EXISTS sqlmesh.yugioh (
+  id bigint,
+  name string,
+  type string,
+  frame_type string,
+  `desc` string,
+  race string,
+  archetype string,
+  attribute string,
+  level bigint,
+  atk bigint,
+  def bigint,
+  ygoprodeck_url string,
+  card_sets array<struct<set_name: string, set_code: string, set_rarity: string, set_price: string>>,
+  card_images array<struct<id: bigint, image_url: string, image_url_small: string, image_url_cropped: string>>,
+  card_prices array<struct<cardmarket_price: string, tcgplayer_price: string, ebay_price: string, amazon_price: string>>,
+  date_fetched string
+)
+PARTITIONED BY (load_date date)
+STORED AS PARQUET
+LOCATION 's3://0-data-lake/yugioh_api/yugioh_cards/'
+TBLPROPERTIES (
+  'projection.enabled' = 'true',
+  'projection.load_date.type' = 'date',
+  'projection.load_date.format' = 'yyyy-MM-dd',
+  'projection.load_date.range' = '2025-05-25,NOW',
+  'projection.load_date.interval' = '1',
+  'projection.load_date.interval.unit' = 'DAYS',
+  'storage.location.template' = 's3://0-data-lake/yugioh_api/yugioh_cards/load_date=${load_date}/'
+);
+
+CREATE EXTERNAL TABLE IF NOT EXISTS sqlmesh.pokemon_details (
+  id bigint,
+  `order` bigint,
+  name string,
+  species string,
+  height bigint,
+  weight bigint,
+  base_experience bigint,
+  location_area_encounters string,
+  cry_latest string,
+  cry_legacy string,
+  sprite_default string,
+  sprite_artwork string,
+  sprite_animated string,
+  date_fetched string
+)
+PARTITIONED BY (load_date date)
+STORED AS PARQUET
+LOCATION 's3://0-data-lake/pokemon_api/pokemon_details/'
+TBLPROPERTIES (
+  'projection.enabled' = 'true',
+  'projection.load_date.type' = 'date',
+  'projection.load_date.format' = 'yyyy-MM-dd',
+  'projection.load_date.range' = '2025-05-25,NOW',
+  'projection.load_date.interval' = '1',
+  'projection.load_date.interval.unit' = 'DAYS',
+  'storage.location.template' = 's3://0-data-lake/pokemon_api/pokemon_details/load_date=${load_date}/'
+);
+
+CREATE EXTERNAL TABLE IF NOT EXISTS sqlmesh.pokemon_stats (
+  pokemon_id bigint,
+  stat string,
+  base_stat bigint,
+  effort bigint,
+  date_fetched string
+)
+PARTITIONED BY (load_date date)
+STORED AS PARQUET
+LOCATION 's3://0-data-lake/pokemon_api/pokemon_stats/'
+TBLPROPERTIES (
+  'projection.enabled' = 'true',
+  'projection.load_date.type' = 'date',
+  'projection.load_date.format' = 'yyyy-MM-dd',
+  'projection.load_date.range' = '2025-05-25,NOW',
+  'projection.load_date.interval' = '1',
+  'projection.load_date.interval.unit' = 'DAYS',
+  'storage.location.template' = 's3://0-data-lake/pokemon_api/pokemon_stats/load_date=${load_date}/'
+);
+
+CREATE EXTERNAL TABLE IF NOT EXISTS sqlmesh.reddit_posts (
+  id string,
+  title string,
+  score bigint,
+  author string,
+  created_utc double,
+  url string,
+  num_comments bigint,
+  subreddit string
+)
+PARTITIONED BY (load_date date)
+STORED AS PARQUET
+LOCATION 's3://0-data-lake/reddit/posts/'
+TBLPROPERTIES (
+  'projection.enabled' = 'true',
+  'projection.load_date.type' = 'date',
+  'projection.load_date.format' = 'yyyy-MM-dd',
+  'projection.load_date.range' = '2025-05-25,NOW',
+  'projection.load_date.interval' = '1',
+  'projection.load_date.interval.unit' = 'DAYS',
+  'storage.location.template' = 's3://0-data-lake/reddit/posts/load_date=${load_date}/'
+);
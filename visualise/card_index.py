@@ -0,0 +1,114 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+CATEGORIES = ["Monster", "Spell", "Trap"]
+
+
+def categorize_card_type(card_type: Optional[str]) -> str:
+    """
+    Map a card type into 'Monster', 'Spell', 'Trap' or 'Other'.
+    """
+    t = (card_type or "").lower()
+    if "monster" in t:
+        return "Monster"
+    elif "spell" in t:
+        return "Spell"
+    elif "trap" in t:
+        return "Trap"
+    else:
+        return "Other"
+
+
+class CardIndex:
+    """
+    Lookups over the Yu-Gi-Oh card set, built once per dataset version so a dashboard
+    interaction is a dict lookup or an array take instead of a scan over every card.
+
+    Cards are identified by their row position in `cards`, the columnar backing store: the
+    memory-mapped serving snapshot (see visualise.serving), which already holds the flattened
+    first image and price. Only the rows a page shows are converted to Python or pandas, so a
+    table for k cards is a single `take` of k rows.
+
+    Args:
+        cards (pa.Table): The yugioh_cards serving snapshot.
+    """
+
+    DISPLAY_COLUMNS = {
+        "image": "image_url",
+        "name": "name",
+        "atk": "atk",
+        "def": "def",
+        "price ($)": "amazon_price",
+        "type": "type",
+    }
+
+    def __init__(self, cards: pa.Table):
+        self.cards = cards
+        card_type = pc.utf8_lower(
+            pc.fill_null(cards["type"].cast(pa.large_string()), "")
+        )
+        self.category = np.select(
+            [
+                pc.match_substring(card_type, "monster").to_numpy(),
+                pc.match_substring(card_type, "spell").to_numpy(),
+                pc.match_substring(card_type, "trap").to_numpy(),
+            ],
+            CATEGORIES,
+            default="Other",
+        )
+
+        names = np.array(cards["name"].to_pylist(), dtype=object)
+        self.ids_by_category = {
+            category: np.flatnonzero(self.category == category)
+            for category in CATEGORIES
+        }
+        self.names_by_category = {
+            category: names[ids].tolist()
+            for category, ids in self.ids_by_category.items()
+        }
+        self.id_by_name: dict[str, int] = {}
+        for card_id, name in enumerate(names):
+            self.id_by_name.setdefault(name, card_id)
+
+        archetypes = pd.Series(cards["archetype"].to_pylist(), dtype=object)
+        self.ids_by_archetype = {
+            archetype: ids
+            for archetype, ids in archetypes.groupby(archetypes).indices.items()
+        }
+
+    def __len__(self) -> int:
+        return self.cards.num_rows
+
+    def names(self, category: str) -> list[str]:
+        """
+        Names of the cards in `category`, in dataset order.
+        """
+        return self.names_by_category.get(category, [])
+
+    def card(self, card_id: int) -> dict:
+        """
+        All fields of one card, with its category added.
+        """
+        card = self.cards.slice(card_id, 1).to_pylist()[0]
+        card["category"] = self.category[card_id]
+        return card
+
+    def card_by_name(self, name: str) -> Optional[dict]:
+        card_id = self.id_by_name.get(name)
+        return None if card_id is None else self.card(card_id)
+
+    def archetype_table(self, archetype: str) -> pd.DataFrame:
+        """
+        The display rows of every card in `archetype`.
+        """
+        ids = self.ids_by_archetype.get(archetype, np.array([], dtype=int))
+        rows = self.cards.select(list(self.DISPLAY_COLUMNS.values())).take(ids)
+        table = rows.to_pandas()
+        table.columns = list(self.DISPLAY_COLUMNS)
+        table["card_type"] = self.category[ids]
+        table["archetype"] = archetype
+        return table
@@ -0,0 +1,113 @@
+import os
+import re
+from typing import Any, Optional, Union
+
+import fsspec
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+# dlt names load files "<load_id>.<file_id>.<ext>", where the load id is a unix timestamp
+LOAD_FILE_PATTERN = re.compile(r"^(\d+\.\d+)\.[^.]+\.parquet$")
+
+Filters = Union[dict[str, Any], pc.Expression, None]
+
+
+def list_load_files(table_url: str) -> dict[str, list[str]]:
+    """
+    Group the parquet files of a dlt table folder by the load package that wrote them.
+
+    Args:
+        table_url (str): Folder of the table, e.g. s3://0-data-lake/yugioh_api/yugioh_cards/.
+    Returns:
+        dict: load id -> file paths, in load order.
+    """
+    fs, path = fsspec.core.url_to_fs(table_url)
+    loads: dict[str, list[str]] = {}
+    for file_path in fs.find(path):
+        match = LOAD_FILE_PATTERN.match(os.path.basename(file_path))
+        if match:
+            loads.setdefault(match.group(1), []).append(file_path)
+    return dict(sorted(loads.items(), key=lambda item: float(item[0])))
+
+
+def latest_load_id(table_url: str) -> Optional[str]:
+    """
+    Id of the most recent load package of a table, e.g. to key caches on the dataset version.
+    """
+    loads = list_load_files(table_url)
+    return next(reversed(loads), None)
+
+
+def _expression(filters: Filters) -> Optional[pc.Expression]:
+    """
+    Turn {column: value} / {column: [values]} filters into an Arrow expression.
+    """
+    if filters is None or isinstance(filters, pc.Expression):
+        return filters
+    expression = None
+    for column, value in filters.items():
+        if isinstance(value, (list, tuple, set)):
+            condition = pc.field(column).isin(list(value))
+        else:
+            condition = pc.field(column) == value
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_table(
+    table_url: str,
+    columns: Optional[list[str]] = None,
+    filters: Filters = None,
+    snapshot: str = "latest",
+    since: Optional[str] = None,
+) -> pa.Table:
+    """
+    Read a dlt table from the data lake, fetching only what the page needs.
+
+    Only `columns` are read, and `filters` are pushed down to the parquet scan, so row groups
+    whose statistics cannot match are skipped without being downloaded.
+
+    Args:
+        table_url (str): Folder of the table, e.g. s3://0-data-lake/pokemon_api/berry/.
+        columns (list[str]): Columns to read; those missing from the table are skipped. None
+            reads all of them.
+        filters (dict | pc.Expression): {column: value} or {column: [values]} equality filters
+            (combined with AND), or any Arrow expression.
+        snapshot (str): "latest" reads only the most recent load package (tables reloaded in
+            full on every run), "all" reads every load (appended or merged tables).
+        since (str): Only read the loads after this load id, e.g. to update a copy of the
+            table built from the loads up to it.
+    Returns:
+        pa.Table: The matching rows.
+    """
+    fs, _ = fsspec.core.url_to_fs(table_url)
+    loads = list_load_files(table_url)
+    if not loads:
+        raise FileNotFoundError(f"no dlt load files in {table_url}")
+    if since is not None:
+        loads = {
+            load_id: paths
+            for load_id, paths in loads.items()
+            if float(load_id) > float(since)
+        }
+        if not loads:
+            raise FileNotFoundError(f"no dlt loads after {since} in {table_url}")
+    if snapshot == "latest":
+        files = loads[next(reversed(loads))]
+    elif snapshot == "all":
+        files = [file_path for paths in loads.values() for file_path in paths]
+    else:
+        raise ValueError(f"unknown snapshot {snapshot!r}, expected 'latest' or 'all'")
+
+    dataset = ds.dataset(files, filesystem=fs, format="parquet")
+    if snapshot == "all":
+        # the schema of merged tables evolves between loads; the first file may lack columns
+        schema = pa.unify_schemas(
+            [fragment.physical_schema for fragment in dataset.get_fragments()],
+            promote_options="permissive",
+        )
+        dataset = ds.dataset(files, schema=schema, filesystem=fs, format="parquet")
+    if columns is not None:
+        columns = [column for column in columns if column in dataset.schema.names]
+    return dataset.to_table(columns=columns, filter=_expression(filters))
@@ -0,0 +1,265 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import base64
+import hashlib
+import io
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from constants import (
+    IMAGE_CACHE_DIR,
+    IMAGE_CACHE_MAX_BYTES,
+    IMAGE_FETCH_WORKERS,
+    IMAGE_THUMBNAIL_SIZE,
+)
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp"}
+
+# Failed downloads are not retried for this long, so an unreachable host costs one timeout
+RETRY_FAILED_SECONDS = 300
+
+
+class ImageCache:
+    """
+    Local cache of the artwork the dashboards show (card images, Pokémon sprites).
+
+    Images are downloaded once by the Streamlit server, stored on disk under a hash of their URL
+    and handed to st.image as local paths, so the browser never fetches them from the remote
+    hosts and the dashboards work where only the server can reach them (e.g. through the
+    HTTPS_PROXY of an egress proxy, which requests picks up from the environment). Thumbnails
+    are stored next to the originals and served to table image columns as data URIs.
+
+    Downloads run on a thread pool: `prefetch` queues images in the background, `thumbnails`
+    waits for a whole table's worth in parallel. The least recently used files are evicted once
+    the cache grows past `max_bytes`.
+
+    Args:
+        cache_dir (str): Directory holding the images and thumbnails.
+        max_bytes (int): Maximum total size of the cache.
+        thumbnail_size (int): Longest side of the thumbnails in pixels.
+        max_workers (int): Number of concurrent downloads.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int,
+        thumbnail_size: int = 96,
+        max_workers: int = 8,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.thumbnail_size = thumbnail_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="image-cache"
+        )
+        self._pending: dict[str, Future] = {}
+        self._failed: dict[str, float] = {}
+        self._no_thumbnail: set[str] = set()
+        self._lock = threading.Lock()
+        self._written = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url: str) -> tuple[str, str]:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        extension = os.path.splitext(urlparse(url).path)[1].lower()
+        if extension not in IMAGE_EXTENSIONS:
+            extension = ".img"
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}{extension}", f"{base}.thumb.webp"
+
+    def _download(self, url: str) -> Optional[str]:
+        """
+        Download `url` and write its thumbnail. Returns the local path, None if it failed.
+        """
+        image_path, thumbnail_path = self._paths(url)
+        if os.path.exists(image_path):
+            if not self._cached(url):
+                with open(image_path, "rb") as f:
+                    self._thumbnail(url, f.read(), thumbnail_path)
+            return image_path
+        try:
+            response = self.session.get(url, timeout=30)
+            response.raise_for_status()
+        except requests.RequestException:
+            with self._lock:
+                self._failed[url] = time.time()
+            return None
+
+        tmp_path = f"{image_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(response.content)
+        os.replace(tmp_path, image_path)
+        size = len(response.content)
+        if not image_path.endswith(".svg"):
+            size += self._thumbnail(url, response.content, thumbnail_path)
+
+        with self._lock:
+            self._written += size
+            evict = self._written > self.max_bytes // 10
+            if evict:
+                self._written = 0
+        if evict:
+            self.evict()
+        return image_path
+
+    def _thumbnail(self, url: str, content: bytes, thumbnail_path: str) -> int:
+        """
+        Write the thumbnail of `url`, remembering images that cannot be decoded so they are
+        not downloaded again on every rerun. Returns the size of the thumbnail.
+        """
+        size = self._write_thumbnail(content, thumbnail_path)
+        if not size:
+            with self._lock:
+                self._no_thumbnail.add(url)
+        return size
+
+    def _write_thumbnail(self, content: bytes, thumbnail_path: str) -> int:
+        try:
+            with Image.open(io.BytesIO(content)) as image:
+                # first frame of animated sprites; keep transparency
+                thumbnail = image.convert("RGBA")
+        except (OSError, ValueError):
+            return 0
+        thumbnail.thumbnail((self.thumbnail_size, self.thumbnail_size))
+        tmp_path = f"{thumbnail_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        thumbnail.save(tmp_path, format="WEBP", quality=80)
+        os.replace(tmp_path, thumbnail_path)
+        return os.path.getsize(thumbnail_path)
+
+    def _submit(self, url: str) -> Optional[Future]:
+        with self._lock:
+            if time.time() - self._failed.get(url, 0) < RETRY_FAILED_SECONDS:
+                return None
+            future = self._pending.get(url)
+            if future is not None:
+                return future
+            future = self._executor.submit(self._download, url)
+            self._pending[url] = future
+        # outside the lock: the callback runs right away if the download already finished
+        future.add_done_callback(lambda _: self._done(url))
+        return future
+
+    def _done(self, url: str) -> None:
+        with self._lock:
+            self._pending.pop(url, None)
+
+    def prefetch(self, urls: Iterable[Optional[str]]) -> None:
+        """
+        Queue downloads of `urls` in the background; cached and empty URLs are skipped.
+        """
+        for url in urls:
+            if url and not os.path.exists(self._paths(url)[0]):
+                self._submit(url)
+
+    def path(self, url: Optional[str]) -> Optional[str]:
+        """
+        Local path of the image at `url`, downloading it first when it is not cached.
+        Falls back to the URL itself when the download fails.
+        """
+        if not url:
+            return None
+        image_path = self._paths(url)[0]
+        if os.path.exists(image_path):
+            os.utime(image_path)
+            return image_path
+        future = self._submit(url)
+        return (future and future.result()) or url
+
+    def thumbnails(
+        self, urls: list[Optional[str]], timeout: Optional[float] = None
+    ) -> list[Optional[str]]:
+        """
+        Thumbnails of `urls` as data URIs, for st.column_config.ImageColumn.
+
+        Missing thumbnails are downloaded in parallel; those not ready within `timeout` seconds
+        keep downloading in the background and are None until a later rerun.
+        """
+        with self._lock:
+            no_thumbnail = set(self._no_thumbnail)
+        futures = [
+            self._submit(url)
+            for url in set(urls) - no_thumbnail
+            if url and not self._cached(url)
+        ]
+        futures = [future for future in futures if future is not None]
+        if futures:
+            wait(futures, timeout=timeout)
+        return [self._data_uri(url) if url else None for url in urls]
+
+    def _cached(self, url: str) -> bool:
+        image_path, thumbnail_path = self._paths(url)
+        return os.path.exists(thumbnail_path) or (
+            image_path.endswith(".svg") and os.path.exists(image_path)
+        )
+
+    def _data_uri(self, url: str) -> Optional[str]:
+        image_path, thumbnail_path = self._paths(url)
+        path, mime = thumbnail_path, "image/webp"
+        if image_path.endswith(".svg"):
+            path, mime = image_path, "image/svg+xml"
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return f"data:{mime};base64,{base64.b64encode(content).decode()}"
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used files until the cache fits in `max_bytes`.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:  # evicted by another dashboard process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+_image_cache: Optional[ImageCache] = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """
+    Return the process-wide ImageCache configured from constants.py.
+    """
+    global _image_cache
+    with _image_cache_lock:
+        if _image_cache is None:
+            _image_cache = ImageCache(
+                IMAGE_CACHE_DIR,
+                max_bytes=IMAGE_CACHE_MAX_BYTES,
+                thumbnail_size=IMAGE_THUMBNAIL_SIZE,
+                max_workers=IMAGE_FETCH_WORKERS,
+            )
+        return _image_cache
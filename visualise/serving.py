@@ -0,0 +1,390 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import fsspec
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+from constants import DATA_LAKE_URL, SERVING_CACHE_DIR
+from visualise.dataset_reader import latest_load_id, read_table
+
+
+def _field(column: pa.ChunkedArray, *path: str) -> pa.ChunkedArray:
+    """
+    Follow `path` into a struct column; null where a level does not exist in the schema.
+    """
+    for name in path:
+        data_type = column.type
+        if not pa.types.is_struct(data_type) or data_type.get_field_index(name) < 0:
+            return pa.nulls(len(column), pa.large_string())
+        column = pc.struct_field(column, name)
+    return column
+
+
+def _first(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """
+    First element of each list, null for empty or null lists.
+    """
+    not_empty = pc.fill_null(pc.greater(pc.list_value_length(column), 0), False)
+    return pc.list_element(pc.if_else(not_empty, column, None), 0)
+
+
+def _join_names(column: pa.ChunkedArray, *path: str) -> pa.Array:
+    """
+    Join `path` of every element of a list-of-structs column, e.g. types -> "grass, poison".
+    """
+    column = column.combine_chunks()
+    values = _field(column.flatten(), *path).cast(pa.large_string())
+    names = pa.LargeListArray.from_arrays(
+        column.offsets.cast(pa.int64()), values, mask=column.is_null()
+    )
+    return pc.binary_join(names, pa.scalar(", ", pa.large_string()))
+
+
+# Columns of the landed yugioh_cards table read by flatten_cards
+CARD_COLUMNS = [
+    "id",
+    "name",
+    "type",
+    "race",
+    "archetype",
+    "attribute",
+    "level",
+    "atk",
+    "def",
+    "desc",
+    "card_images",
+    "card_prices",
+    "date_fetched",
+]
+
+
+def flatten_cards(cards: pa.Table) -> pa.Table:
+    """
+    The Yu-Gi-Oh card columns the dashboard renders, with the first image and price flattened.
+    The id and date_fetched let a later snapshot merge newer fetches of a card into it.
+    """
+    images = _first(cards["card_images"])
+    prices = _first(cards["card_prices"])
+    return pa.table(
+        {
+            "id": cards["id"],
+            "name": cards["name"],
+            "type": cards["type"],
+            "race": cards["race"],
+            "archetype": cards["archetype"],
+            "attribute": cards["attribute"],
+            "level": cards["level"],
+            "atk": cards["atk"],
+            "def": cards["def"],
+            "desc": cards["desc"],
+            "image_url": _field(images, "image_url"),
+            "image_url_cropped": _field(images, "image_url_cropped"),
+            "amazon_price": _field(prices, "amazon_price"),
+            "date_fetched": cards["date_fetched"],
+        }
+    )
+
+
+def _names_by_pokemon(children: pa.Table, column: str, name: str) -> pa.Table:
+    """
+    Join `column` of a child table per (pokemon_id, date_fetched) in slot order, e.g.
+    pokemon_types -> "grass, poison".
+    """
+    children = children.sort_by([("slot", "ascending")])
+    names = children.group_by(
+        ["pokemon_id", "date_fetched"], use_threads=False
+    ).aggregate([(column, "list")])
+    return pa.table(
+        {
+            "id": names["pokemon_id"],
+            "date_fetched": names["date_fetched"],
+            name: pc.binary_join(
+                names[f"{column}_list"].cast(pa.list_(pa.large_string())),
+                pa.scalar(", ", pa.large_string()),
+            ),
+        }
+    )
+
+
+# Columns of the landed pokemon_details table read by flatten_pokemon
+POKEMON_COLUMNS = [
+    "id",
+    "name",
+    "height",
+    "weight",
+    "base_experience",
+    "sprite_default",
+    "sprite_artwork",
+    "sprite_animated",
+    "date_fetched",
+]
+
+
+def flatten_pokemon(
+    pokemon: pa.Table, pokemon_types: pa.Table, pokemon_abilities: pa.Table
+) -> pa.Table:
+    """
+    The Pokémon detail columns the dashboard renders, with the types and abilities of each
+    fetch joined from the child tables.
+    """
+    table = pokemon.select(
+        [column for column in POKEMON_COLUMNS if column in pokemon.column_names]
+    )
+    for children, column, name in [
+        (pokemon_types, "type", "types"),
+        (pokemon_abilities, "ability", "abilities"),
+    ]:
+        table = table.join(
+            _names_by_pokemon(children, column, name),
+            keys=["id", "date_fetched"],
+            join_type="left outer",
+        )
+    return table.select(
+        ["id", "name", "types", "abilities"]
+        + [column for column in POKEMON_COLUMNS[2:] if column in table.column_names]
+    )
+
+
+def _latest_by(table: pa.Table, key: str, order_by: str) -> pa.Table:
+    """
+    Keep the row with the greatest `order_by` for each `key`, e.g. the latest merged fetch.
+    """
+    order = pc.sort_indices(
+        table, sort_keys=[(key, "ascending"), (order_by, "descending")]
+    )
+    keys = table[key].take(order).to_numpy()
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    return table.take(order.to_numpy()[first])
+
+
+@dataclass
+class ServingSnapshot:
+    """
+    A compact, read-optimised copy of one landed table, built after each load for the
+    dashboards.
+
+    The snapshot holds only the flattened display columns, sorted by name, with repetitive
+    strings dictionary-encoded, in the uncompressed Arrow IPC (Feather v2) format. Dashboards
+    memory-map it, so building their indexes is zero-copy and every Streamlit process shares
+    the same page-cached file instead of parsing the landing parquet into its own pandas copy.
+
+    Snapshots are written to <DATA_LAKE_URL>serving/<name>/<load id>.arrow and copied once into
+    SERVING_CACHE_DIR on the dashboard host, where they are mapped. A snapshot of a merged
+    table (snapshot="all") is built from the previous published one and only the loads since,
+    so a publish does not reread the whole history.
+
+    Attributes:
+        name (str): Name of the snapshot.
+        table (str): Path of the landed table under DATA_LAKE_URL.
+        flatten (Callable): Projects the landed table to the display columns.
+        dictionary_columns (list[str]): Columns stored dictionary-encoded.
+        snapshot (str): Load packages to read, "latest" or "all" (merged tables).
+        key (str): With snapshot="all", keep only the latest `date_fetched` row per key.
+        children (dict[str, str]): Child tables read alongside `table` and passed to `flatten`
+            as keyword arguments, argument -> path under DATA_LAKE_URL.
+        columns (list[str]): Columns of `table` that `flatten` reads. None reads all of them.
+        child_columns (dict[str, list[str]]): Columns read from each child table.
+    """
+
+    name: str
+    table: str
+    flatten: Callable[..., pa.Table]
+    dictionary_columns: list[str] = field(default_factory=list)
+    snapshot: str = "latest"
+    key: Optional[str] = None
+    children: dict[str, str] = field(default_factory=dict)
+    columns: Optional[list[str]] = None
+    child_columns: dict[str, list[str]] = field(default_factory=dict)
+
+    @property
+    def table_url(self) -> str:
+        return f"{DATA_LAKE_URL}{self.table}"
+
+    def lake_url(self, load_id: str) -> str:
+        return f"{DATA_LAKE_URL}serving/{self.name}/{load_id}.arrow"
+
+    def local_path(self, load_id: str) -> str:
+        return os.path.join(SERVING_CACHE_DIR, self.name, f"{load_id}.arrow")
+
+    def _flattened(self, since: Optional[str] = None) -> pa.Table:
+        """
+        Read the landed table (only the loads after `since`, if given) and flatten it.
+        """
+        table = read_table(
+            self.table_url, columns=self.columns, snapshot=self.snapshot, since=since
+        )
+        filters = None
+        if self.key is not None:
+            table = _latest_by(table, self.key, "date_fetched")
+            # children are joined on the kept fetches, so older row groups are skipped
+            oldest = pc.min(table["date_fetched"]).as_py()
+            if oldest is not None:
+                filters = pc.field("date_fetched") >= oldest
+        children = {
+            name: read_table(
+                f"{DATA_LAKE_URL}{path}",
+                columns=self.child_columns.get(name),
+                filters=filters,
+                snapshot=self.snapshot,
+                since=since,
+            )
+            for name, path in self.children.items()
+        }
+        return self.flatten(table, **children)
+
+    def _merge(self, load_id: str, previous: pa.Table) -> Optional[pa.Table]:
+        """
+        Merge the loads after `load_id` into `previous`, its snapshot, keeping the latest row
+        per key. None when the snapshot cannot be updated this way and has to be rebuilt.
+        """
+        if (
+            self.snapshot != "all"
+            or self.key is None
+            or not {self.key, "date_fetched"} <= set(previous.column_names)
+        ):
+            return None
+        try:
+            table = self._flattened(since=load_id)
+        except FileNotFoundError:  # e.g. a child table without rows in the new loads
+            return None
+        for name in self.dictionary_columns:
+            index = previous.schema.get_field_index(name)
+            if pa.types.is_dictionary(previous.schema.field(index).type):
+                column = previous[name]
+                previous = previous.set_column(
+                    index, name, column.cast(column.type.value_type)
+                )
+        table = pa.concat_tables([previous, table], promote_options="permissive")
+        return _latest_by(table, self.key, "date_fetched")
+
+    def build(self, previous: Optional[tuple[str, pa.Table]] = None) -> pa.Table:
+        """
+        Read the landed table and turn it into the serving layout.
+
+        Args:
+            previous (tuple[str, pa.Table]): Load id and snapshot of an earlier load. When
+                given, only the loads after it are read and merged into it (see _merge).
+        Returns:
+            pa.Table: The snapshot.
+        """
+        table = self._merge(*previous) if previous is not None else None
+        if table is None:
+            table = self._flattened()
+        table = table.take(pc.sort_indices(table, sort_keys=[("name", "ascending")]))
+        for name in self.dictionary_columns:
+            index = table.schema.get_field_index(name)
+            table = table.set_column(
+                index, name, pc.dictionary_encode(table[name]).combine_chunks()
+            )
+        return table.combine_chunks()
+
+    def _write_local(self, table: pa.Table, load_id: str) -> str:
+        path = self.local_path(load_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        # uncompressed, so the columns can be mapped straight from the file
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+        for name in os.listdir(os.path.dirname(path)):  # older versions
+            if name.endswith(".arrow") and name != os.path.basename(path):
+                os.remove(os.path.join(os.path.dirname(path), name))
+        return path
+
+    def previous_load_id(self, load_id: str) -> Optional[str]:
+        """
+        Load id of the newest snapshot in the data lake older than load `load_id`.
+        """
+        fs, path = fsspec.core.url_to_fs(f"{DATA_LAKE_URL}serving/{self.name}/")
+        if not fs.exists(path):
+            return None
+        load_ids = [
+            os.path.basename(file_path)[: -len(".arrow")]
+            for file_path in fs.ls(path, detail=False)
+            if file_path.endswith(".arrow")
+        ]
+        return max(
+            (previous for previous in load_ids if float(previous) < float(load_id)),
+            key=float,
+            default=None,
+        )
+
+    def publish(self) -> str:
+        """
+        Build the snapshot of the latest load and write it to the data lake. Merged tables
+        start from the previous published snapshot (see build).
+
+        Returns:
+            str: URL of the written snapshot.
+        """
+        load_id = latest_load_id(self.table_url)
+        if load_id is None:
+            raise FileNotFoundError(f"no dlt load files in {self.table_url}")
+        previous_id = self.previous_load_id(load_id)
+        previous = None
+        if previous_id is not None and self.snapshot == "all":
+            previous = (previous_id, self.open(previous_id))
+        path = self._write_local(self.build(previous), load_id)
+        fs, lake_path = fsspec.core.url_to_fs(self.lake_url(load_id))
+        fs.makedirs(os.path.dirname(lake_path), exist_ok=True)
+        fs.put_file(path, lake_path)
+        return self.lake_url(load_id)
+
+    def open(self, load_id: str) -> pa.Table:
+        """
+        Memory-map the snapshot of load `load_id`, fetching it from the data lake first if it is
+        not on this host yet. A load that has no snapshot (e.g. landed before snapshots were
+        built) gets one built locally from the landed table.
+        """
+        path = self.local_path(load_id)
+        if not os.path.exists(path):
+            fs, lake_path = fsspec.core.url_to_fs(self.lake_url(load_id))
+            if fs.exists(lake_path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                fs.get_file(lake_path, tmp_path)
+                os.replace(tmp_path, path)
+            else:
+                self._write_local(self.build(), load_id)
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all()
+
+
+SERVING_SNAPSHOTS = {
+    "yugioh_cards": ServingSnapshot(
+        "yugioh_cards",
+        "yugioh_api/yugioh_cards/",
+        flatten_cards,
+        dictionary_columns=["type", "race", "archetype", "attribute"],
+        # each load only merges the cards that changed since the last one
+        snapshot="all",
+        key="id",
+        columns=CARD_COLUMNS,
+    ),
+    "pokemon_details": ServingSnapshot(
+        "pokemon_details",
+        "pokemon_api/pokemon_details/",
+        flatten_pokemon,
+        dictionary_columns=["types", "abilities"],
+        # incremental runs merge new details as extra load packages
+        snapshot="all",
+        key="id",
+        children={
+            "pokemon_types": "pokemon_api/pokemon_types/",
+            "pokemon_abilities": "pokemon_api/pokemon_abilities/",
+        },
+        columns=POKEMON_COLUMNS,
+        child_columns={
+            "pokemon_types": ["pokemon_id", "date_fetched", "slot", "type"],
+            "pokemon_abilities": ["pokemon_id", "date_fetched", "slot", "ability"],
+        },
+    ),
+}
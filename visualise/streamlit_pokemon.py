@@ -1,25 +1,48 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+from constants import DATA_LAKE_URL
+from visualise.dataset_reader import latest_load_id, read_table
+from visualise.image_cache import get_image_cache
+from visualise.serving import SERVING_SNAPSHOTS
+from visualise.table_explorer import TableExplorer
 
-# Set your S3 path (can be private or public if permissions are open)
-S3_PATH = "s3://0-data-lake/"
-
-# Files to load
+# Files to load (the latest load package of each table is read)
 files = {
-    "berry": f"{S3_PATH}pokemon_api/berry/",
-    "pokemon": f"{S3_PATH}pokemon_api/pokemon_details/",
-    "item": f"{S3_PATH}pokemon_api/item/",
-    "location": f"{S3_PATH}pokemon_api/location/",
-    "move": f"{S3_PATH}pokemon_api/move/",
-    "version": f"{S3_PATH}pokemon_api/version/",
+    "berry": f"{DATA_LAKE_URL}pokemon_api/berry/",
+    "pokemon": f"{DATA_LAKE_URL}pokemon_api/pokemon_details/",
+    "item": f"{DATA_LAKE_URL}pokemon_api/item/",
+    "location": f"{DATA_LAKE_URL}pokemon_api/location/",
+    "move": f"{DATA_LAKE_URL}pokemon_api/move/",
+    "version": f"{DATA_LAKE_URL}pokemon_api/version/",
 }
 
+# Datasets served from a compact snapshot built at ingest time instead of the landed parquet
+snapshots = {"pokemon": SERVING_SNAPSHOTS["pokemon_details"]}
+
+# Columns rendered for the other datasets (PokeAPI list endpoints); dlt's _dlt_id and
+# _dlt_load_id are not read
+list_columns = ["name", "url"]
+
 
-@st.cache_data
-def load_data(s3_path):
-    df = pd.read_parquet(s3_path, engine="pyarrow")
-    return df
+# Newest load package of the table, re-checked every 5 minutes
+@st.cache_data(ttl=300)
+def dataset_version(table_url):
+    return latest_load_id(table_url)
+
+
+# One explorer per dataset version, shared by every session. cache_resource hands out the
+# same Arrow table instead of copying the whole dataset into each rerun.
+@st.cache_resource
+def load_explorer(selected, load_id):
+    if selected in snapshots:
+        # memory-mapped, so every Streamlit process shares the same page-cached file
+        return TableExplorer(snapshots[selected].open(load_id))
+    return TableExplorer(read_table(files[selected], columns=list_columns))
 
 
 st.title("Pokémon Data")
@@ -28,59 +51,78 @@ st.title("Pokémon Data")
 selected = st.selectbox("Choose a dataset", list(files.keys()))
 
 try:
-    df = load_data(files[selected])
+    explorer = load_explorer(selected, dataset_version(files[selected]))
     st.success(f"Loaded {selected} dataset")
-    # st.dataframe(df)
 except Exception as e:
     st.error(f"Error loading data: {e}")
+    st.stop()
+
+selected_pokemon = st.selectbox("Select Name", explorer.names, index=None)
+
+if selected_pokemon is None:
+    # Paginated explorer: filter and sort run on the server, only one page is sent
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        search = st.text_input("Search names")
+    with col2:
+        sort_by = st.selectbox("Sort by", explorer.sortable_columns, index=None)
+    with col3:
+        descending = st.checkbox("Descending")
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+
+    indices = explorer.query(search, sort_by, descending)
+    pages = TableExplorer.num_pages(len(indices), page_size)
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1) - 1
+    first = min(page * page_size + 1, len(indices))
+    last = min((page + 1) * page_size, len(indices))
+    st.caption(
+        f"Rows {first:,}-{last:,} of {len(indices):,} (page {page + 1} of {pages:,})"
+    )
+    page_df = explorer.page(indices, page, page_size)
+    st.dataframe(page_df)
+    if "sprite_default" in page_df:
+        # Warm the cache for the Pokémon the user is most likely to pick next
+        get_image_cache().prefetch(page_df["sprite_default"])
+else:
+    rows = explorer.rows_by_name[selected_pokemon]
+    st.dataframe(explorer.page(rows, 0, len(rows)))
+    pokemon = explorer.row(selected_pokemon)
+    if selected == "pokemon":
+        images = get_image_cache()
+        sprites = ["sprite_artwork", "sprite_animated", "sprite_default"]
+        # Downloaded together in the background, then served from local files
+        images.prefetch(pokemon.get(sprite) for sprite in sprites)
+
+        # Create Columns for Side-by-Side Layout
+        col1, col2, col3 = st.columns(3)
+
+        # Column 1: Dream World Artwork
+        with col1:
+            artwork = images.path(pokemon.get("sprite_artwork"))
+            if artwork:
+                st.image(artwork, width=100, caption="Artwork")
+            else:
+                st.write("No artwork available")
 
-if files["pokemon"]:
-
-    pokemon_names = df["name"].unique().tolist()
-    selected_pokemon = st.selectbox("Select Name", pokemon_names, index=None)
-
-    # Step 3: Display Pokémon Details
-    if selected_pokemon is None:
-        data = st.dataframe(df)
-    else:
-        filtered = df[df["name"] == selected_pokemon]
-        data = st.dataframe(filtered)
-        if selected == "pokemon":
-            # Create Columns for Side-by-Side Layout
-            col1, col2, col3 = st.columns(3)
-
-            # Column 1: Regular Pokémon Sprite
-            with col1:
-                st.image(
-                    data["sprites"]["other"]["dream_world"]["front_default"],
-                    width=100,
-                    caption="Artwork",
-                )
-
-            # Column 2: Dream World Artwork
-            with col2:
-                gif_sprite = data["sprites"]["versions"]["generation-v"]["black-white"][
-                    "animated"
-                ]["front_default"]
-                if gif_sprite:
-                    st.image(gif_sprite, width=100, caption="Animated Sprite")
-                else:
-                    st.write("No GIF available")
-
-            # Column 3: Animated (GIF) Sprite
-            with col3:
-                st.image(
-                    data["sprites"]["front_default"],
-                    width=100,
-                    caption="Default Sprite",
-                )
-
-            # Pokémon Cry (Sound)
-            cry_url = f"https://play.pokemonshowdown.com/audio/cries/{selected_pokemon.lower()}.mp3"  # Pokémon cry URL
-            try:
-                st.audio(cry_url, format="audio/mp3")
-            except:
-                st.write("No cry available for this Pokémon.")
+        # Column 2: Animated (GIF) Sprite
+        with col2:
+            gif_sprite = images.path(pokemon.get("sprite_animated"))
+            if gif_sprite:
+                st.image(gif_sprite, width=100, caption="Animated Sprite")
+            else:
+                st.write("No GIF available")
 
+        # Column 3: Regular Pokémon Sprite
+        with col3:
+            default_sprite = images.path(pokemon.get("sprite_default"))
+            if default_sprite:
+                st.image(default_sprite, width=100, caption="Default Sprite")
             else:
-                st.write("No version information available for this Pokémon.")
+                st.write("No sprite available")
+
+        # Pokémon Cry (Sound)
+        cry_url = f"https://play.pokemonshowdown.com/audio/cries/{selected_pokemon.lower()}.mp3"  # Pokémon cry URL
+        try:
+            st.audio(cry_url, format="audio/mp3")
+        except:
+            st.write("No cry available for this Pokémon.")
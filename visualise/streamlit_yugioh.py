@@ -1,53 +1,51 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 import streamlit as st
 import pandas as pd
 import math
-from PIL import Image
 from pathlib import Path
+from constants import IMAGE_TABLE_WAIT_SECONDS
+from visualise.card_index import CardIndex
+from visualise.dataset_reader import latest_load_id
+from visualise.image_cache import get_image_cache
+from visualise.serving import SERVING_SNAPSHOTS
+
+cards_snapshot = SERVING_SNAPSHOTS["yugioh_cards"]
+
+
+# Newest load package of the table, re-checked every 5 minutes
+@st.cache_data(ttl=300)
+def dataset_version(table_url):
+    return latest_load_id(table_url)
 
-@st.cache_data
-def load_data(s3_path):
-    df = pd.read_parquet(s3_path, engine="pyarrow")
-    return df
 
-s3_path = f"s3://0-data-lake/yugioh_api/yugioh_cards/1748537410.767642.428df4f96a.parquet"
+# Built once per dataset version over the memory-mapped serving snapshot, and shared by
+# every session and rerun
+@st.cache_resource
+def load_card_index(load_id):
+    return CardIndex(cards_snapshot.open(load_id))
+
 
 # Load data
-cards_df = load_data(s3_path)
+card_index = load_card_index(dataset_version(cards_snapshot.table_url))
+
+# Local assets of the repo, so the page needs no remote fetch for its chrome
+ASSETS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "assets"))
 
 ATTRIBUTE_ICON_URLS = {
-    "DARK": "/Users/zaineisa/Documents/VSCode/OpenSourcePipeline/assets/yugioh_assets/dark.png",
-    "DIVINE": "/Users/zaineisa/Documents/VSCode/OpenSourcePipeline/assets/yugioh_assets/divine.png",
-    "EARTH": "/Users/zaineisa/Documents/VSCode/OpenSourcePipeline/assets/yugioh_assets/earth.png",
-    "FIRE": "/Users/zaineisa/Documents/VSCode/OpenSourcePipeline/assets/yugioh_assets/fire.png",
-    "LIGHT": "/Users/zaineisa/Documents/VSCode/OpenSourcePipeline/assets/yugioh_assets/light.png",
-    "WATER": "/Users/zaineisa/Documents/VSCode/OpenSourcePipeline/assets/yugioh_assets/water.png",
-    "WIND": "/Users/zaineisa/Documents/VSCode/OpenSourcePipeline/assets/yugioh_assets/wind.png",
+    "DARK": os.path.join(ASSETS_DIR, "yugioh_assets", "dark.png"),
+    "DIVINE": os.path.join(ASSETS_DIR, "yugioh_assets", "divine.png"),
+    "EARTH": os.path.join(ASSETS_DIR, "yugioh_assets", "earth.png"),
+    "FIRE": os.path.join(ASSETS_DIR, "yugioh_assets", "fire.png"),
+    "LIGHT": os.path.join(ASSETS_DIR, "yugioh_assets", "light.png"),
+    "WATER": os.path.join(ASSETS_DIR, "yugioh_assets", "water.png"),
+    "WIND": os.path.join(ASSETS_DIR, "yugioh_assets", "wind.png"),
 }
 
-# If 'data' column contains dictionaries (as strings), parse them
-if isinstance(cards_df.iloc[0], str):
-    import json
-    cards = cards_df["data"].apply(json.loads).tolist()
-else:
-    cards = cards_df.to_dict(orient="records")
-
-# Map card type into 'Monster', 'Spell', or 'Trap'
-def categorize_card_type(card):
-    t = card.get("type", "").lower()
-    if "monster" in t:
-        return "Monster"
-    elif "spell" in t:
-        return "Spell"
-    elif "trap" in t:
-        return "Trap"
-    else:
-        return "Other"
-
-# Add category field to each card
-for card in cards:
-    card["category"] = categorize_card_type(card)
-
-logo_url = "/Users/zaineisa/Documents/VSCode/OpenSourcePipeline/assets/Yu-Gi-Oh-Logo.png"
+logo_url = os.path.join(ASSETS_DIR, "Yu-Gi-Oh-Logo.png")
 st.image(logo_url, width=200)
 
 # Let the user filter by high-level type
@@ -55,17 +53,10 @@ type_options = {"Monster", "Spell", "Trap"}
 
 col1, col2, col3 = st.columns(3)
 
-card_type = st.sidebar.radio(
-    "",
-    options=["Monster", "Spell", "Trap"],
-    horizontal=True
-)
-
-# Filter cards based on selected category
-filtered_cards = [card for card in cards if card["category"] == card_type]
+card_type = st.sidebar.radio("", options=["Monster", "Spell", "Trap"], horizontal=True)
 
-# Extract card names from filtered cards
-card_names = [card["name"] for card in filtered_cards]
+# Names of the cards in the selected category (precomputed in the index)
+card_names = card_index.names(card_type)
 
 # Multi-select interface for filtered cards
 selected_names = st.sidebar.multiselect(
@@ -74,20 +65,28 @@ selected_names = st.sidebar.multiselect(
     max_selections=1,
 )
 
-selected_cards = [card for card in filtered_cards if card["name"] in selected_names]
+selected_cards = [card_index.card_by_name(name) for name in selected_names]
+
+# Artwork is served from the local image cache instead of the remote host
+images = get_image_cache()
+for card in selected_cards:
+    # Start on the archetype's images while the card itself renders
+    archetype = card.get("archetype")
+    if archetype:
+        images.prefetch(card_index.archetype_table(archetype)["image"])
 
 # UI
 for card in selected_cards:
     col1, col2 = st.columns([1, 2])
     with col1:
-        st.image(card["card_images"][0]["image_url"], width=150)
-        st.image(card["card_images"][0]["image_url_cropped"], width=150)
+        st.image(images.path(card["image_url"]), width=150)
+        st.image(images.path(card["image_url_cropped"]), width=150)
     with col2:
         st.subheader(card["name"])
         st.markdown(f"_[{card.get('type')} / {card.get('race')}]_")
         st.markdown(f"_[{card.get('archetype', 'N/A')}]_")
 
-        attribute = card.get('attribute')
+        attribute = card.get("attribute")
         icon_path = ATTRIBUTE_ICON_URLS.get(attribute)
         if attribute and icon_path and Path(icon_path).exists():
             col_icon, col_text = st.columns([1, 5])
@@ -98,21 +97,21 @@ for card in selected_cards:
         else:
             st.markdown(f"**Attribute:** {attribute if attribute else 'None'}")
 
-        level = card.get('level')
+        level = card.get("level")
         if level is None or (isinstance(level, float) and math.isnan(level)):
             st.markdown("**Level:** N/A")
         else:
             try:
-                level_int = int(card.get('level'))
+                level_int = int(card.get("level"))
                 circles = " 🟠 " * level_int
                 st.markdown(f"**Level:** {circles}")
             except Exception:
                 st.markdown("**Level:** N/A")
 
-        atk = card.get('atk')
-        def_ = card.get('def')
-        atk_display = int(atk) if pd.notna(atk) else 'None'
-        def_display = int(def_) if pd.notna(def_) else 'None'
+        atk = card.get("atk")
+        def_ = card.get("def")
+        atk_display = int(atk) if pd.notna(atk) else "None"
+        def_display = int(def_) if pd.notna(def_) else "None"
         st.markdown(f"**ATK/DEF:** **{atk_display}** / **{def_display}**")
         st.markdown(f"_{card.get('desc')}_")
 
@@ -123,34 +122,24 @@ if selected_cards:
     selected_archetype = selected_card.get("archetype", None)
 
     if selected_archetype:
-        filtered_by_archetype = [card for card in cards if card.get("archetype") == selected_archetype]
-
-        editor_rows = []
-        for card in filtered_by_archetype:
-            try:
-                editor_rows.append({
-                    "image": card['card_images'][0]['image_url'],
-                    "name": card['name'],
-                    "atk": card.get('atk', 'N/A'),
-                    "def": card.get('def', 'N/A'),
-                    "price ($)": card['card_prices'][0].get('amazon_price', 'N/A'),
-                    "type": card.get('type', 'N/A'),
-                    "card_type": categorize_card_type(card),
-                    "archetype": card.get('archetype', 'N/A'),
-                })
-            except Exception as e:
-                st.warning(f"Skipping card due to error: {e}")
-
-        archetype_df = pd.DataFrame(editor_rows)
+        archetype_df = card_index.archetype_table(selected_archetype)
+        # Thumbnails inlined as data URIs; any still downloading show on the next rerun
+        archetype_df["image"] = images.thumbnails(
+            archetype_df["image"].tolist(), timeout=IMAGE_TABLE_WAIT_SECONDS
+        )
 
         st.data_editor(
             archetype_df,
             column_config={
-                "image": st.column_config.ImageColumn("Card Image", width="small", help="Card description shown on hover"),
-                "attribute_icon": st.column_config.ImageColumn("Attribute", width="small"),
+                "image": st.column_config.ImageColumn(
+                    "Card Image", width="small", help="Card description shown on hover"
+                ),
+                "attribute_icon": st.column_config.ImageColumn(
+                    "Attribute", width="small"
+                ),
             },
             hide_index=True,
-            use_container_width=False
+            use_container_width=False,
         )
     else:
         st.info("This card has no archetype.")
@@ -0,0 +1,103 @@
+import math
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+def _is_nested(data_type: pa.DataType) -> bool:
+    return (
+        pa.types.is_struct(data_type)
+        or pa.types.is_list(data_type)
+        or pa.types.is_large_list(data_type)
+    )
+
+
+class TableExplorer:
+    """
+    Server-side filtering, sorting and paging over one dataset, kept as an Arrow table.
+
+    A query runs as vectorised Arrow compute and yields row indices; only the rows of the
+    visible page are taken and converted to pandas for the browser, so datasets with large
+    nested columns (sprites, moves) cost one page of rows per rerun instead of the whole table.
+    The name list and the name -> rows index are built once per dataset version.
+
+    Args:
+        table (pa.Table): The dataset as read from the data lake.
+    """
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self.sortable_columns = [
+            field.name for field in table.schema if not _is_nested(field.type)
+        ]
+
+        self.rows_by_name: dict[str, np.ndarray] = {}
+        if "name" in table.column_names:
+            # sort once, then split the row numbers at every change of name
+            names = table.column("name")
+            order = pc.sort_indices(names, null_placement="at_end")
+            order = order[: len(names) - names.null_count].to_numpy()
+            sorted_names = names.take(order).to_numpy(zero_copy_only=False)
+            unique, starts = np.unique(sorted_names, return_index=True)
+            for name, rows in zip(unique.tolist(), np.split(order, starts[1:])):
+                self.rows_by_name[name] = np.sort(rows)
+        self.names = list(self.rows_by_name)
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def query(
+        self,
+        search: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+    ) -> pa.Array:
+        """
+        Indices of the rows whose name contains `search` (case-insensitive), in `sort_by` order.
+
+        Args:
+            search (str): Substring to match in the name column. None or "" keeps every row.
+            sort_by (str): One of `sortable_columns`. None keeps the dataset order.
+            descending (bool): Sort in descending order.
+        Returns:
+            pa.Array: Row indices into `table`.
+        """
+        table = self.table
+        indices = pa.array(np.arange(table.num_rows))
+        if search and "name" in table.column_names:
+            mask = pc.match_substring(table.column("name"), search, ignore_case=True)
+            indices = pc.filter(indices, pc.fill_null(mask, False))
+        if sort_by is not None:
+            keys = table.column(sort_by).take(indices)
+            if pa.types.is_dictionary(keys.type):  # sort by value, not by code
+                keys = keys.cast(keys.type.value_type)
+            order = pc.sort_indices(
+                keys,
+                sort_keys=[("", "descending" if descending else "ascending")],
+                null_placement="at_end",
+            )
+            indices = indices.take(order)
+        return indices
+
+    def page(self, indices: pa.Array, page: int, page_size: int) -> pd.DataFrame:
+        """
+        The rows of page `page` (0-based) of a query result, as a DataFrame.
+        """
+        start = page * page_size
+        return self.table.take(indices[start : start + page_size]).to_pandas()
+
+    def row(self, name: str) -> Optional[dict]:
+        """
+        All fields of the first row named `name`, with nested columns as plain dicts / lists.
+        """
+        rows = self.rows_by_name.get(name)
+        if rows is None:
+            return None
+        return self.table.slice(int(rows[0]), 1).to_pylist()[0]
+
+    @staticmethod
+    def num_pages(num_rows: int, page_size: int) -> int:
+        return max(1, math.ceil(num_rows / page_size))